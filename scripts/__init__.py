@@ -5,7 +5,8 @@
 from .core.publisher import XiaohongshuPublisher
 from .core.browser_controller import BrowserController
 from .core.login_handler import LoginHandler
-from .core.content_generator import ContentGenerator, GeneratedContent
+from .core.content_generator import BatchResult, ContentGenerator, GeneratedContent
+from .core.page_pool import PublishPagePool
 
 __all__ = [
     "XiaohongshuPublisher",
@@ -13,4 +14,6 @@ __all__ = [
     "LoginHandler",
     "ContentGenerator",
     "GeneratedContent",
+    "BatchResult",
+    "PublishPagePool",
 ]
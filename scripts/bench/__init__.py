@@ -0,0 +1,3 @@
+"""
+性能基准 - 基于本地模拟创作平台驱动发布流程
+"""
@@ -0,0 +1,126 @@
+"""
+基准公共工具：统计、测试图片、发布器构造
+"""
+
+import contextlib
+import io
+import math
+import subprocess
+import tempfile
+import uuid
+from pathlib import Path
+
+from ..core.browser_controller import BrowserController
+from ..core.capture import ArtifactStore
+from ..core.ledger import PublishLedger
+from ..core.login_handler import LoginHandler
+from ..core.publisher import XiaohongshuPublisher
+from ..mock_site import MockCreatorSite
+
+# 发布流程的步骤顺序（confirmation 由基准根据模拟站点记录的笔记测得）
+STEPS = [
+    "launch",
+    "login_check",
+    "navigation",
+    "upload",
+    "title",
+    "body",
+    "tags",
+    "publish_click",
+    "confirmation",
+]
+
+
+def percentile(values: list, pct: float) -> float:
+    """最近秩百分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = math.ceil(pct / 100 * len(ordered))
+    return ordered[max(0, min(len(ordered), rank) - 1)]
+
+
+def summarize(values: list) -> dict:
+    """汇总一组耗时（秒）"""
+    if not values:
+        return {"n": 0}
+    return {
+        "n": len(values),
+        "mean": sum(values) / len(values),
+        "min": min(values),
+        "max": max(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+    }
+
+
+def git_revision() -> str:
+    """当前提交号，便于对比两次结果"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return ""
+
+
+def make_test_image(directory: Path, name: str = "bench_励志海报.png", size=(1080, 1440)) -> Path:
+    """生成基准用测试图片"""
+    from PIL import Image
+
+    path = Path(directory) / name
+    if not path.exists():
+        Image.new("RGB", size, (255, 170, 60)).save(path)
+    return path
+
+
+def make_publisher(
+    site: MockCreatorSite,
+    workdir: Path,
+    headless: bool = True,
+    account: str = "default",
+    browser: BrowserController = None,
+) -> XiaohongshuPublisher:
+    """创建指向模拟站点的发布器（每个账号一个 cookie 文件，存放在基准工作目录）
+
+    传入 browser 时复用已启动的浏览器控制器（如同一浏览器中的其他标签页/账号）。
+    """
+    publisher = XiaohongshuPublisher()
+    publisher.mock_site = site
+    site.point_config(publisher.config)
+    publisher.config["platform"]["cookie_file"] = str(Path(workdir) / f"cookies_{account}.json")
+    publisher.account = account
+    # 失败现场写入基准工作目录，不占用默认产物目录
+    publisher.browser.capture.store = ArtifactStore(Path(workdir) / "artifacts")
+    # 基准反复发布同一张测试图片，不做查重（每次发布用 bench_key() 生成独立的幂等键）
+    publisher.config.setdefault("dedup", {})["enabled"] = False
+    publisher.content_generator.text_index = None
+    publisher.ledger = PublishLedger(Path(workdir) / "ledger.sqlite3")
+    publisher.config["settings"]["headless"] = headless
+    if browser is not None:
+        publisher.browser = browser
+        publisher.login_handler = LoginHandler(browser, publisher.config)
+    return publisher
+
+
+def bench_key() -> str:
+    """基准任务的幂等键：每次发布各不相同，同一张测试图片可以反复发布"""
+    return f"bench:{uuid.uuid4().hex}"
+
+
+@contextlib.contextmanager
+def quiet(enabled: bool = True):
+    """屏蔽发布流程的控制台输出"""
+    if not enabled:
+        yield
+        return
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def workdir() -> Path:
+    return Path(tempfile.mkdtemp(prefix="xhs_bench_"))
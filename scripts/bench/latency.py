@@ -0,0 +1,204 @@
+"""
+端到端发布延迟基准 - 对模拟创作平台执行 N 次发布，输出各步骤 p50/p95/p99
+
+用法:
+  python -m scripts.bench.latency --runs 20 --output bench_latency.json
+  python -m scripts.bench.latency --runs 20 --compare bench_latency.json
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from ..mock_site import FAULT_PROFILES, MockCreatorSite, get_fault_profile
+from ..utils.event_log import setup_logging
+from ..utils.profiler import SamplingProfiler
+from ..utils.tracing import tracer
+from .common import (
+    STEPS,
+    bench_key,
+    git_revision,
+    make_publisher,
+    make_test_image,
+    quiet,
+    summarize,
+    workdir,
+)
+
+
+async def wait_for_note(site: MockCreatorSite, count: int, timeout: float = 30) -> bool:
+    """等待模拟站点记录到第 count 条笔记"""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if len(site.notes) >= count:
+            return True
+        await asyncio.sleep(0.01)
+    return False
+
+
+async def run_once(site: MockCreatorSite, image: Path, work: Path, headless: bool, verbose: bool) -> dict:
+    """执行一次完整发布，返回各步骤耗时"""
+    publisher = make_publisher(site, work, headless=headless)
+    expected = len(site.notes) + 1
+    started = time.perf_counter()
+    error = None
+    result = {}
+    confirmation = None
+
+    try:
+        with quiet(not verbose), tracer.span("publish_job", "job"):
+            if not await publisher.initialize():
+                raise RuntimeError("浏览器初始化失败")
+            if not await publisher.ensure_login():
+                raise RuntimeError("登录失败")
+            result = await publisher.publish_image_note(
+                str(image), preview=False, confirm_before_publish=False, idempotency_key=bench_key()
+            )
+        if not result.get("success"):
+            raise RuntimeError(result.get("error", "发布失败"))
+
+        confirm_start = time.perf_counter()
+        if not await wait_for_note(site, expected):
+            raise RuntimeError("未收到发布请求")
+        confirmation = time.perf_counter() - confirm_start
+    except Exception as e:
+        error = str(e)
+    finally:
+        await publisher.close()
+
+    return {
+        "success": error is None,
+        "error": error,
+        "total": time.perf_counter() - started,
+        # 发布成功时取任务结果中的步骤耗时；发布前失败时取计时器中已记录的启动/登录
+        "steps": {
+            **publisher.timer.durations,
+            **result.get("timings", {}),
+            **({"confirmation": confirmation} if confirmation is not None else {}),
+        },
+        "job_id": result.get("job_id"),
+        "artifact": result.get("artifact"),
+    }
+
+
+def build_report(runs: list, args) -> dict:
+    ok = [run for run in runs if run["success"]]
+    return {
+        "meta": {
+            "revision": git_revision(),
+            "time": datetime.now().isoformat(),
+            "runs": len(runs),
+            "failures": len(runs) - len(ok),
+            "upload_latency": args.upload_latency,
+            "upload_bandwidth": args.upload_bandwidth,
+            "faults": args.faults,
+        },
+        "steps": {step: summarize([run["steps"][step] for run in ok if step in run["steps"]]) for step in STEPS},
+        "total": summarize([run["total"] for run in ok]),
+        "time_to_fail": summarize([run["total"] for run in runs if not run["success"]]),
+        "runs": runs,
+    }
+
+
+def print_report(report: dict):
+    print(f"\n📊 发布延迟基准 ({report['meta']['runs']} 次, 失败 {report['meta']['failures']} 次)")
+    print(f"{'步骤':<16}{'p50':>10}{'p95':>10}{'p99':>10}")
+    rows = list(report["steps"].items()) + [("total", report["total"]), ("time_to_fail", report["time_to_fail"])]
+    for step, stats in rows:
+        if stats.get("n"):
+            print(f"{step:<16}{stats['p50']:>10.3f}{stats['p95']:>10.3f}{stats['p99']:>10.3f}")
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> list:
+    """与基线对比，返回 p50/p95 劣化超过阈值的步骤"""
+    regressions = []
+    print(f"\n🔍 对比基线 {baseline['meta'].get('revision') or '?'} -> {report['meta'].get('revision') or '?'}")
+    for step in STEPS + ["total"]:
+        new = report["total"] if step == "total" else report["steps"].get(step, {})
+        old = baseline["total"] if step == "total" else baseline["steps"].get(step, {})
+        if not new.get("n") or not old.get("n"):
+            continue
+        for key in ("p50", "p95"):
+            delta = new[key] - old[key]
+            ratio = delta / old[key] if old[key] else 0
+            marker = "⚠️ " if ratio > threshold else "  "
+            print(f"{marker}{step:<16}{key} {old[key]:.3f} -> {new[key]:.3f} ({ratio:+.1%})")
+            if ratio > threshold:
+                regressions.append((step, key, ratio))
+    return regressions
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="端到端发布延迟基准")
+    parser.add_argument("--runs", type=int, default=10, help="计入统计的发布次数")
+    parser.add_argument("--warmup", type=int, default=1, help="预热次数（完成首次扫码登录，不计入统计）")
+    parser.add_argument("--image", help="测试图片（默认自动生成）")
+    parser.add_argument("--output", "-o", help="结果 JSON 路径")
+    parser.add_argument("--compare", help="基线结果 JSON，对比并在劣化时返回非零")
+    parser.add_argument("--threshold", type=float, default=0.1, help="劣化阈值（比例）")
+    parser.add_argument("--upload-latency", type=float, default=0.2)
+    parser.add_argument("--upload-bandwidth", type=float, default=0)
+    parser.add_argument("--faults", choices=list(FAULT_PROFILES), default="none", help="故障注入配置")
+    parser.add_argument("--headed", action="store_true", help="显示浏览器窗口")
+    parser.add_argument("--trace", metavar="PATH", help="导出计入统计各次发布的 Chrome Trace JSON")
+    parser.add_argument("--profile", metavar="PREFIX", help="对计入统计的发布做采样分析（collapsed 栈 + 步骤汇总）")
+    parser.add_argument("--verbose", action="store_true", help="保留发布流程输出")
+    args = parser.parse_args()
+    # 非 verbose 时只显示警告以上的日志，发布流程的进度输出不刷屏
+    setup_logging({"level": "INFO" if args.verbose else "WARNING"})
+
+    work = workdir()
+    image = Path(args.image) if args.image else make_test_image(work)
+    site = MockCreatorSite(
+        upload_latency=args.upload_latency,
+        upload_bandwidth=args.upload_bandwidth,
+        scan_delay=0.2,
+        faults=get_fault_profile(args.faults),
+    ).start()
+
+    try:
+        for _ in range(args.warmup):
+            await run_once(site, image, work, not args.headed, args.verbose)
+
+        if args.trace:
+            tracer.enable()
+        profiler = SamplingProfiler().start() if args.profile else None
+
+        runs = []
+        for i in range(args.runs):
+            run = await run_once(site, image, work, not args.headed, args.verbose)
+            status = "✅" if run["success"] else f"❌ {run['error']}"
+            print(f"   [{i + 1}/{args.runs}] {run['total']:.2f}s {status}")
+            runs.append(run)
+        if profiler:
+            profiler.stop()
+    finally:
+        site.stop()
+
+    report = build_report(runs, args)
+    print_report(report)
+
+    if args.trace:
+        print(f"\n🧭 追踪文件已保存: {tracer.export(args.trace)}")
+
+    if profiler:
+        collapsed, summary = profiler.write(args.profile)
+        print(f"\n🔬 采样分析 ({profiler.samples} 个样本)\n{profiler.format_summary()}")
+        print(f"   火焰图数据: {collapsed}\n   步骤汇总: {summary}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\n💾 结果已保存: {args.output}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        if compare(report, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,259 @@
+"""
+吞吐量负载测试 - 在本地模拟创作平台上扫描 浏览器进程 × 账号 × 标签页 并发度
+
+每个并发档位从同一批合成任务队列中消费，记录吞吐（笔记/分钟）、错误率、
+Chromium 进程 CPU 与 RSS，输出扩展曲线用于机器选型。
+
+用法:
+  python -m scripts.bench.load --jobs 2000 --workers 1,2,4 --tabs 1,2 --accounts 1 \\
+      --duration 120 --output bench_load.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from ..mock_site import MockCreatorSite
+from ..utils.event_log import setup_logging
+from .common import bench_key, git_revision, make_publisher, make_test_image, quiet, summarize, workdir
+
+try:
+    import psutil
+except ImportError:  # 可选依赖，缺失时不采集 CPU/RSS
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+# 合成任务使用的图片名，覆盖不同内容类型
+IMAGE_NAMES = ["励志海报", "美食探店", "旅行风景", "护肤好物", "深夜情感", "日常记录"]
+
+
+class ResourceSampler:
+    """周期采样 Chromium 进程（当前进程的子孙进程）的 CPU 与 RSS"""
+
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self.samples: list = []
+        self._procs: dict = {}
+
+    def _chromium_processes(self) -> list:
+        procs = []
+        for child in psutil.Process().children(recursive=True):
+            try:
+                name = child.name().lower()
+            except psutil.Error:
+                continue
+            if "chrom" in name or "headless_shell" in name:
+                # 复用 Process 对象，cpu_percent 才能按采样间隔计算
+                procs.append(self._procs.setdefault(child.pid, child))
+        return procs
+
+    def sample(self):
+        cpu = rss = 0.0
+        procs = self._chromium_processes()
+        for proc in procs:
+            try:
+                cpu += proc.cpu_percent(None)
+                rss += proc.memory_info().rss
+            except psutil.Error:
+                self._procs.pop(proc.pid, None)
+        self.samples.append({"cpu": cpu, "rss_mb": rss / 1024 / 1024, "processes": len(procs)})
+
+    async def run(self):
+        if psutil is None:
+            logger.warning("⚠️  未安装 psutil，跳过 CPU/RSS 采样")
+            return
+        while True:
+            self.sample()
+            await asyncio.sleep(self.interval)
+
+    def summary(self) -> dict:
+        # 首个样本的 cpu_percent 没有参考区间，不计入
+        samples = self.samples[1:] or self.samples
+        if not samples:
+            return {"cpu_percent_mean": None, "rss_mb_mean": None, "rss_mb_peak": None}
+        return {
+            "cpu_percent_mean": sum(s["cpu"] for s in samples) / len(samples),
+            "rss_mb_mean": sum(s["rss_mb"] for s in samples) / len(samples),
+            "rss_mb_peak": max(s["rss_mb"] for s in samples),
+            "processes_peak": max(s["processes"] for s in samples),
+        }
+
+
+async def start_slots(site, work, workers: int, accounts: int, tabs: int, headless: bool):
+    """启动 workers 个浏览器，每个浏览器 accounts 个上下文，每个上下文 tabs 个标签页
+
+    返回 (所有标签页对应的发布器, 需要关闭的浏览器控制器)
+    """
+    slots, roots = [], []
+    for w in range(workers):
+        root = make_publisher(site, work, headless, account="acct0")
+        with quiet():
+            if not await root.initialize():
+                raise RuntimeError("浏览器初始化失败")
+        roots.append(root.browser)
+
+        for a in range(accounts):
+            controller = root.browser if a == 0 else await root.browser.new_account()
+            first = make_publisher(site, work, headless, account=f"acct{a}", browser=controller)
+            with quiet():
+                if not await first.ensure_login():
+                    raise RuntimeError(f"账号 acct{a} 登录失败")
+            slots.append(first)
+            for _ in range(tabs - 1):
+                tab = await controller.new_tab()
+                slots.append(make_publisher(site, work, headless, account=f"acct{a}", browser=tab))
+    return slots, roots
+
+
+async def consume(publisher, queue: asyncio.Queue, results: list, deadline: float):
+    """单个标签页循环消费任务，直到队列清空或到达时限"""
+    while time.perf_counter() < deadline:
+        try:
+            job = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+
+        started = time.perf_counter()
+        try:
+            with quiet():
+                result = await publisher.publish_image_note(
+                    job["image"], preview=False, confirm_before_publish=False, idempotency_key=bench_key()
+                )
+            success, error = bool(result.get("success")), result.get("error")
+        except Exception as e:
+            success, error = False, str(e)
+        results.append(
+            {
+                "job": job["id"],
+                "success": success,
+                "error": error,
+                "duration": time.perf_counter() - started,
+            }
+        )
+
+
+async def run_level(site, work, images, workers, accounts, tabs, jobs, duration, headless) -> dict:
+    """执行一个并发档位"""
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(jobs):
+        queue.put_nowait({"id": i, "image": str(images[i % len(images)])})
+
+    slots, roots = await start_slots(site, work, workers, accounts, tabs, headless)
+    sampler = ResourceSampler()
+    sampler_task = asyncio.create_task(sampler.run())
+    results: list = []
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(
+            *(consume(slot, queue, results, started + duration) for slot in slots)
+        )
+    finally:
+        elapsed = time.perf_counter() - started
+        sampler_task.cancel()
+        for controller in roots:
+            await controller.close()
+
+    done = [r for r in results if r["success"]]
+    return {
+        "workers": workers,
+        "accounts": accounts,
+        "tabs": tabs,
+        "concurrency": len(slots),
+        "attempted": len(results),
+        "succeeded": len(done),
+        "error_rate": (len(results) - len(done)) / len(results) if results else 0.0,
+        "errors": dict(Counter(r["error"] for r in results if not r["success"])),
+        "elapsed": elapsed,
+        "notes_per_min": len(done) / elapsed * 60 if elapsed else 0.0,
+        "latency": summarize([r["duration"] for r in done]),
+        **sampler.summary(),
+    }
+
+
+def print_curve(levels: list):
+    print("\n📈 扩展曲线")
+    print(f"{'W×A×T':<10}{'并发':>6}{'笔记/分':>10}{'效率':>8}{'错误率':>8}{'CPU%':>8}{'RSS峰值MB':>12}")
+    base = levels[0]["notes_per_min"] / levels[0]["concurrency"] if levels and levels[0]["concurrency"] else 0
+    for level in levels:
+        shape = f"{level['workers']}×{level['accounts']}×{level['tabs']}"
+        efficiency = level["notes_per_min"] / (base * level["concurrency"]) if base else 0
+        cpu = f"{level['cpu_percent_mean']:.0f}" if level["cpu_percent_mean"] is not None else "-"
+        rss = f"{level['rss_mb_peak']:.0f}" if level["rss_mb_peak"] is not None else "-"
+        print(
+            f"{shape:<10}{level['concurrency']:>6}{level['notes_per_min']:>10.1f}"
+            f"{efficiency:>8.0%}{level['error_rate']:>8.1%}{cpu:>8}{rss:>12}"
+        )
+
+
+def parse_levels(value: str) -> list:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="发布吞吐量负载测试")
+    parser.add_argument("--jobs", type=int, default=1000, help="每个档位的合成任务数")
+    parser.add_argument("--workers", default="1,2", help="浏览器进程数档位，逗号分隔")
+    parser.add_argument("--accounts", default="1", help="每个浏览器的账号（上下文）数档位")
+    parser.add_argument("--tabs", default="1,2", help="每个账号的标签页数档位")
+    parser.add_argument("--duration", type=float, default=120, help="每个档位最长运行时间（秒）")
+    parser.add_argument("--upload-latency", type=float, default=0.2)
+    parser.add_argument("--upload-bandwidth", type=float, default=0)
+    parser.add_argument("--output", "-o", help="结果 JSON 路径")
+    parser.add_argument("--headed", action="store_true", help="显示浏览器窗口")
+    args = parser.parse_args()
+    setup_logging({"level": "WARNING"})
+
+    work = workdir()
+    images = [make_test_image(work, f"bench_{name}.png") for name in IMAGE_NAMES]
+    site = MockCreatorSite(
+        upload_latency=args.upload_latency,
+        upload_bandwidth=args.upload_bandwidth,
+        scan_delay=0.2,
+    ).start()
+
+    levels = []
+    try:
+        for workers, accounts, tabs in itertools.product(
+            parse_levels(args.workers), parse_levels(args.accounts), parse_levels(args.tabs)
+        ):
+            print(f"🚦 档位 workers={workers} accounts={accounts} tabs={tabs} ...")
+            level = await run_level(
+                site, work, images, workers, accounts, tabs,
+                args.jobs, args.duration, not args.headed,
+            )
+            print(
+                f"   {level['succeeded']}/{level['attempted']} 成功, "
+                f"{level['notes_per_min']:.1f} 笔记/分钟"
+            )
+            levels.append(level)
+    finally:
+        site.stop()
+
+    print_curve(levels)
+
+    if args.output:
+        report = {
+            "meta": {
+                "revision": git_revision(),
+                "time": datetime.now().isoformat(),
+                "jobs": args.jobs,
+                "duration": args.duration,
+                "upload_latency": args.upload_latency,
+                "upload_bandwidth": args.upload_bandwidth,
+            },
+            "levels": levels,
+        }
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\n💾 结果已保存: {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
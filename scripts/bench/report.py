@@ -0,0 +1,339 @@
+"""
+运行报告 - 由已记录的追踪文件和发布结果生成单个自包含 HTML 报告，无需重新运行
+
+报告包含：整体成功率与各步骤 p50/p95、按耗时排序的任务列表（慢尾在前），
+每个任务的步骤瀑布图、尝试过的选择器候选及命中项、上传吞吐与重试、内联的失败截图。
+
+用法:
+  python -m scripts.bench.latency --runs 50 --trace trace.json --output latency.json
+  python -m scripts.bench.report --trace trace.json --results latency.json --output report.html
+
+--results 接受基准结果 JSON（含 runs）、结果列表 JSON，或结构化事件日志（JSON Lines，
+取 job_finished 事件）。
+"""
+
+import argparse
+import base64
+import bisect
+import html
+import json
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+from ..utils.tracing import STEP_CATEGORIES
+from .common import summarize
+
+JOB_SPANS = ("publish_job", "publish_note")
+
+
+def load_trace(path) -> list:
+    """读取 Chrome Trace 文件中的完整区间事件（ph=X）"""
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    events = data["traceEvents"] if isinstance(data, dict) else data
+    return [e for e in events if e.get("ph") == "X"]
+
+
+def load_results(path) -> dict:
+    """读取发布结果，按 job_id 索引
+
+    支持基准结果 JSON（{"runs": [...]} 或结果列表）和结构化事件日志（.jsonl，取 job_finished 事件）。
+    """
+    path = Path(path)
+    text = path.read_text(encoding="utf-8").strip()
+    data = None
+    if path.suffix not in (".jsonl", ".ndjson"):
+        try:
+            data = json.loads(text) if text else []
+        except json.JSONDecodeError:
+            pass  # 扩展名不是 .jsonl 的多行事件日志
+    if data is None:
+        records = [json.loads(line) for line in text.splitlines() if line.strip()]
+    elif isinstance(data, dict) and "runs" in data:
+        records = data["runs"]
+    elif isinstance(data, dict):
+        records = [data]  # 只有一行的事件日志
+    else:
+        records = data
+    rows = [r for r in records if "event" not in r or r["event"] == "job_finished"]
+    return {row["job_id"]: row for row in rows if row.get("job_id")}
+
+
+def group_jobs(events: list) -> list:
+    """把区间按所在轨道和时间范围归入任务；任务以最外层的 publish_job / publish_note 为根"""
+    roots = defaultdict(list)
+    for event in events:
+        if event["name"] in JOB_SPANS:
+            roots[(event["pid"], event["tid"])].append(event)
+
+    jobs = []
+    index = {}
+    for lane, candidates in roots.items():
+        candidates.sort(key=lambda e: (e["ts"], -e["dur"]))
+        outer = []
+        for event in candidates:
+            if outer and event["ts"] + event["dur"] <= outer[-1]["root"]["ts"] + outer[-1]["root"]["dur"]:
+                # 内层的 publish_note 提供 job_id
+                job_id = (event.get("args") or {}).get("job_id")
+                if job_id:
+                    outer[-1]["job_id"] = job_id
+                continue
+            job = {
+                "root": event,
+                "job_id": (event.get("args") or {}).get("job_id"),
+                "spans": [],
+            }
+            outer.append(job)
+        index[lane] = ([job["root"]["ts"] for job in outer], outer)
+        jobs.extend(outer)
+
+    for event in events:
+        lane = (event["pid"], event["tid"])
+        if lane not in index or event["name"] in JOB_SPANS:
+            continue
+        starts, lane_jobs = index[lane]
+        i = bisect.bisect_right(starts, event["ts"]) - 1
+        if i >= 0:
+            root = lane_jobs[i]["root"]
+            if event["ts"] + event["dur"] <= root["ts"] + root["dur"] + 1:
+                lane_jobs[i]["spans"].append(event)
+
+    for number, job in enumerate(jobs, 1):
+        job["job_id"] = job["job_id"] or f"job-{number}"
+        job["duration"] = job["root"]["dur"] / 1e6
+        job["spans"].sort(key=lambda e: e["ts"])
+    return jobs
+
+
+def analyze_job(job: dict, result: dict) -> dict:
+    """提取任务的步骤、选择器尝试、上传记录"""
+    start = job["root"]["ts"]
+    steps = [
+        {
+            "name": e["name"],
+            "cat": e["cat"],
+            "offset": (e["ts"] - start) / 1e6,
+            "duration": e["dur"] / 1e6,
+            "error": (e.get("args") or {}).get("error"),
+        }
+        for e in job["spans"]
+        if e["cat"] in STEP_CATEGORIES
+    ]
+    selectors = [
+        {
+            "field": e["args"].get("field") or "-",
+            "candidates": e["args"].get("candidates") or [],
+            "winner": e["args"].get("winner"),
+            "duration": e["dur"] / 1e6,
+        }
+        for e in job["spans"]
+        if e["name"] == "find_first" and e.get("args")
+    ]
+    uploads = []
+    for e in job["spans"]:
+        if e["name"] != "upload_request" or not e.get("args"):
+            continue
+        seconds = e["dur"] / 1e6
+        size = e["args"].get("bytes") or 0
+        uploads.append(
+            {
+                "attempt": e["args"].get("attempt", 0),
+                "status": e["args"].get("status"),
+                "bytes": size,
+                "duration": seconds,
+                "throughput": size / seconds if seconds else 0,
+            }
+        )
+    result = result or {}
+    return {
+        "job_id": job["job_id"],
+        "duration": job["duration"],
+        "success": result.get("success", job["root"].get("args", {}).get("error") is None),
+        "error": result.get("error") or (job["root"].get("args") or {}).get("error"),
+        "artifact": result.get("artifact"),
+        "steps": steps,
+        "selectors": selectors,
+        "uploads": uploads,
+        "retries": max(0, len(uploads) - 1),
+    }
+
+
+# ==================== HTML 渲染 ====================
+
+CSS = """
+body { font: 13px/1.5 -apple-system, "PingFang SC", "Microsoft YaHei", sans-serif; margin: 24px; color: #222; }
+h1 { font-size: 20px; } h2 { font-size: 16px; margin-top: 32px; } h3 { font-size: 14px; margin: 0; }
+table { border-collapse: collapse; margin: 8px 0; } td, th { border: 1px solid #ddd; padding: 3px 8px; text-align: left; }
+th { background: #f6f6f6; } .num { text-align: right; font-variant-numeric: tabular-nums; }
+.ok { color: #389e0d; } .fail { color: #cf1322; } .muted { color: #999; }
+.job { border: 1px solid #e5e5e5; border-radius: 6px; padding: 12px 16px; margin: 16px 0; }
+.job.failed { border-color: #ffa39e; background: #fffafa; }
+.wf { position: relative; height: 18px; background: #fafafa; margin: 2px 0; }
+.wf .bar { position: absolute; top: 2px; height: 14px; border-radius: 2px; background: #1890ff; }
+.wf .bar.login { background: #722ed1; } .wf .bar.prefetch { background: #13c2c2; } .wf .bar.err { background: #f5222d; }
+.wf-row { display: grid; grid-template-columns: 140px 1fr 70px; gap: 8px; align-items: center; }
+code { background: #f5f5f5; padding: 0 3px; } .winner { font-weight: bold; color: #389e0d; }
+img.shot { max-width: 720px; border: 1px solid #ddd; margin-top: 8px; }
+"""
+
+
+def _e(value) -> str:
+    return html.escape(str(value))
+
+
+def _waterfall(job: dict) -> str:
+    total = job["duration"] or 1
+    rows = []
+    for step in job["steps"]:
+        left = 100 * step["offset"] / total
+        width = max(0.3, 100 * step["duration"] / total)
+        classes = "bar " + step["cat"] + (" err" if step["error"] else "")
+        rows.append(
+            f'<div class="wf-row"><span>{_e(step["name"])}</span>'
+            f'<div class="wf"><div class="{classes}" style="left:{left:.2f}%;width:{width:.2f}%"'
+            f' title="{_e(step["error"] or "")}"></div></div>'
+            f'<span class="num">{step["duration"]:.3f}s</span></div>'
+        )
+    return "".join(rows) or '<p class="muted">无步骤区间</p>'
+
+
+def _selectors(job: dict) -> str:
+    if not job["selectors"]:
+        return ""
+    rows = []
+    for lookup in job["selectors"]:
+        candidates = " ".join(
+            f'<code class="{"winner" if c == lookup["winner"] else ""}">{_e(c)}</code>'
+            for c in lookup["candidates"]
+        )
+        result = "命中" if lookup["winner"] else '<span class="fail">未命中</span>'
+        rows.append(
+            f'<tr><td>{_e(lookup["field"])}</td><td>{result}</td>'
+            f'<td class="num">{lookup["duration"]:.3f}s</td><td>{candidates}</td></tr>'
+        )
+    return (
+        "<table><tr><th>字段</th><th>结果</th><th>耗时</th><th>候选（加粗为命中）</th></tr>"
+        + "".join(rows)
+        + "</table>"
+    )
+
+
+def _uploads(job: dict) -> str:
+    if not job["uploads"]:
+        return ""
+    rows = [
+        f'<tr><td class="num">{u["attempt"] + 1}</td><td>{_e(u["status"] or "-")}</td>'
+        f'<td class="num">{u["bytes"] / 1024:.1f} KB</td><td class="num">{u["duration"]:.3f}s</td>'
+        f'<td class="num">{u["throughput"] / 1024:.1f} KB/s</td></tr>'
+        for u in job["uploads"]
+    ]
+    return (
+        "<table><tr><th>尝试</th><th>状态</th><th>大小</th><th>耗时</th><th>吞吐</th></tr>"
+        + "".join(rows)
+        + "</table>"
+    )
+
+
+def _screenshot(job: dict) -> str:
+    if not job["artifact"]:
+        return ""
+    shot = Path(job["artifact"]) / "failure.jpg"
+    if not shot.exists():
+        return f'<p class="muted">失败现场: {_e(job["artifact"])}（截图已被清理）</p>'
+    data = base64.b64encode(shot.read_bytes()).decode("ascii")
+    return (
+        f'<p class="muted">失败现场: {_e(job["artifact"])}</p>'
+        f'<img class="shot" src="data:image/jpeg;base64,{data}">'
+    )
+
+
+def _summary(jobs: list) -> str:
+    ok = [job for job in jobs if job["success"]]
+    durations = defaultdict(list)
+    for job in ok:
+        totals = defaultdict(float)
+        for step in job["steps"]:
+            if step["cat"] == "step":
+                totals[step["name"]] += step["duration"]
+        for name, seconds in totals.items():
+            durations[name].append(seconds)
+    rows = [("total", summarize([job["duration"] for job in ok]))]
+    rows += [(name, summarize(values)) for name, values in durations.items()]
+    table = "".join(
+        f'<tr><td>{_e(name)}</td><td class="num">{stats["n"]}</td>'
+        f'<td class="num">{stats.get("p50", 0):.3f}</td><td class="num">{stats.get("p95", 0):.3f}</td>'
+        f'<td class="num">{stats.get("max", 0):.3f}</td></tr>'
+        for name, stats in rows
+        if stats.get("n")
+    )
+    uploads = [u for job in jobs for u in job["uploads"] if u["status"] and u["status"] < 400]
+    sent = sum(u["bytes"] for u in uploads)
+    seconds = sum(u["duration"] for u in uploads)
+    retries = sum(job["retries"] for job in jobs)
+    errors = defaultdict(int)
+    for job in jobs:
+        if not job["success"]:
+            errors[job["error"] or "未知"] += 1
+    error_rows = "".join(
+        f'<tr><td>{_e(reason)}</td><td class="num">{count}</td></tr>'
+        for reason, count in sorted(errors.items(), key=lambda item: -item[1])
+    )
+    return (
+        f"<p>任务 {len(jobs)} 个，成功 <span class=\"ok\">{len(ok)}</span>，"
+        f"失败 <span class=\"fail\">{len(jobs) - len(ok)}</span>；"
+        f"上传 {sent / 1024 / 1024:.1f} MB，平均吞吐 {(sent / seconds / 1024) if seconds else 0:.1f} KB/s，"
+        f"上传重试 {retries} 次</p>"
+        "<table><tr><th>步骤</th><th>n</th><th>p50 (s)</th><th>p95 (s)</th><th>max (s)</th></tr>"
+        + table
+        + "</table>"
+        + (f"<h3>失败原因</h3><table><tr><th>原因</th><th>次数</th></tr>{error_rows}</table>" if errors else "")
+    )
+
+
+def render(jobs: list, limit: int, source: str) -> str:
+    ordered = sorted(jobs, key=lambda job: (job["success"], -job["duration"]))
+    shown = ordered[:limit] if limit else ordered
+    sections = []
+    for job in shown:
+        status = '<span class="ok">成功</span>' if job["success"] else f'<span class="fail">失败: {_e(job["error"])}</span>'
+        retries = f"，上传重试 {job['retries']} 次" if job["retries"] else ""
+        sections.append(
+            f'<div class="job{"" if job["success"] else " failed"}" id="{_e(job["job_id"])}">'
+            f'<h3>{_e(job["job_id"])} — {job["duration"]:.2f}s {status}{retries}</h3>'
+            f"{_waterfall(job)}{_selectors(job)}{_uploads(job)}{_screenshot(job)}</div>"
+        )
+    omitted = len(ordered) - len(shown)
+    return (
+        '<!DOCTYPE html><html lang="zh-CN"><head><meta charset="utf-8">'
+        f"<title>发布运行报告</title><style>{CSS}</style></head><body>"
+        f"<h1>发布运行报告</h1><p class=\"muted\">{_e(source)} · 生成于 {datetime.now():%Y-%m-%d %H:%M:%S}</p>"
+        f"<h2>概览</h2>{_summary(jobs)}"
+        f"<h2>任务（失败优先，其次按耗时从慢到快）</h2>"
+        + "".join(sections)
+        + (f'<p class="muted">另有 {omitted} 个任务未展开（--limit）</p>' if omitted else "")
+        + "</body></html>"
+    )
+
+
+def build(trace_path, results_path=None, limit: int = 100) -> str:
+    results = load_results(results_path) if results_path else {}
+    jobs = [analyze_job(job, results.get(job["job_id"])) for job in group_jobs(load_trace(trace_path))]
+    source = f"trace: {trace_path}" + (f" · results: {results_path}" if results_path else "")
+    return render(jobs, limit, source)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="由追踪文件和发布结果生成 HTML 报告")
+    parser.add_argument("--trace", required=True, help="Chrome Trace JSON（--trace 导出）")
+    parser.add_argument("--results", help="发布结果：基准 JSON / 结果列表 / 结构化事件日志")
+    parser.add_argument("--limit", type=int, default=100, help="展开详情的任务数（0 表示全部）")
+    parser.add_argument("--output", "-o", default="report.html", help="输出 HTML 路径")
+    args = parser.parse_args()
+
+    output = Path(args.output)
+    output.write_text(build(args.trace, args.results, args.limit), encoding="utf-8")
+    print(f"📄 报告已生成: {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+故障恢复基准 - 对每种故障配置执行多次发布，衡量恢复能力与失败速度
+
+关注点：故障下是恢复成功，还是快速失败；失败前是否在逐个选择器超时上空耗。
+
+用法:
+  python -m scripts.bench.resilience --runs 5 --profiles upload_5xx,selector_drift,forced_logout
+"""
+
+import argparse
+import asyncio
+import json
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from ..mock_site import FAULT_PROFILES, MockCreatorSite, get_fault_profile
+from ..utils.event_log import setup_logging
+from .common import git_revision, make_test_image, summarize, workdir
+from .latency import run_once
+
+
+async def run_profile(site: MockCreatorSite, name: str, runs: int, image: Path, args) -> dict:
+    """在指定故障配置下执行多次发布"""
+    site.faults = get_fault_profile(name, seed=args.seed)
+    site.revoked.clear()
+    site.session_uploads.clear()
+    work = workdir()
+
+    # 先在无故障状态下完成登录，避免首次扫码耗时计入
+    site.faults, profile = get_fault_profile("none"), site.faults
+    await run_once(site, image, work, not args.headed, args.verbose)
+    site.faults = profile
+
+    results = []
+    for _ in range(runs):
+        results.append(await run_once(site, image, work, not args.headed, args.verbose))
+
+    ok = [r for r in results if r["success"]]
+    failed = [r for r in results if not r["success"]]
+    return {
+        "profile": name,
+        "runs": runs,
+        "success_rate": len(ok) / runs if runs else 0.0,
+        "success_total": summarize([r["total"] for r in ok]),
+        "time_to_fail": summarize([r["total"] for r in failed]),
+        "hung": sum(1 for r in failed if r["total"] > args.hang_threshold),
+        "errors": dict(Counter(r["error"] for r in failed)),
+        "results": results,
+    }
+
+
+def print_table(profiles: list):
+    print("\n🧯 故障恢复基准")
+    print(f"{'故障配置':<16}{'成功率':>8}{'成功p50':>10}{'失败p50':>10}{'失败max':>10}{'挂起':>6}  主要错误")
+    for item in profiles:
+        ok, fail = item["success_total"], item["time_to_fail"]
+        top = Counter(item["errors"]).most_common(1)
+        print(
+            f"{item['profile']:<16}{item['success_rate']:>8.0%}"
+            f"{ok.get('p50', 0):>10.2f}{fail.get('p50', 0):>10.2f}{fail.get('max', 0):>10.2f}"
+            f"{item['hung']:>6}  {top[0][0] if top else '-'}"
+        )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="故障恢复基准")
+    parser.add_argument("--runs", type=int, default=5, help="每种故障配置的发布次数")
+    parser.add_argument(
+        "--profiles",
+        default=",".join(name for name in FAULT_PROFILES if name != "none"),
+        help="故障配置，逗号分隔",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="故障随机种子")
+    parser.add_argument("--hang-threshold", type=float, default=30, help="失败耗时超过该值（秒）视为挂起")
+    parser.add_argument("--output", "-o", help="结果 JSON 路径")
+    parser.add_argument("--headed", action="store_true", help="显示浏览器窗口")
+    parser.add_argument("--verbose", action="store_true", help="保留发布流程输出")
+    args = parser.parse_args()
+    # 非 verbose 时只显示警告以上的日志，发布流程的进度输出不刷屏
+    setup_logging({"level": "INFO" if args.verbose else "WARNING"})
+
+    image = make_test_image(workdir())
+    site = MockCreatorSite(upload_latency=0.2, scan_delay=0.2).start()
+
+    profiles = []
+    try:
+        for name in [p.strip() for p in args.profiles.split(",") if p.strip()]:
+            print(f"💥 故障配置: {name}")
+            profiles.append(await run_profile(site, name, args.runs, image, args))
+    finally:
+        site.stop()
+
+    print_table(profiles)
+
+    if args.output:
+        report = {
+            "meta": {"revision": git_revision(), "time": datetime.now().isoformat(), "seed": args.seed},
+            "profiles": profiles,
+        }
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\n💾 结果已保存: {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
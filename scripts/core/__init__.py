@@ -5,7 +5,8 @@
 from .publisher import XiaohongshuPublisher
 from .browser_controller import BrowserController
 from .login_handler import LoginHandler
-from .content_generator import ContentGenerator, GeneratedContent
+from .content_generator import BatchResult, ContentGenerator, GeneratedContent
+from .page_pool import PublishPagePool
 
 __all__ = [
     "XiaohongshuPublisher",
@@ -13,4 +14,6 @@ __all__ = [
     "LoginHandler",
     "ContentGenerator",
     "GeneratedContent",
+    "BatchResult",
+    "PublishPagePool",
 ]
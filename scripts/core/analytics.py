@@ -0,0 +1,281 @@
+"""
+创作者数据同步 - 用登录会话分页拉取数据中心的笔记数据，增量写入本地 SQLite（可选 Parquet）
+
+数据中心接口按数据更新时间倒序分页。每个账号记录上次同步到的更新时间（游标），
+同步时并发请求一批页面，翻到早于游标的数据就停止；只追加内容有变化的笔记快照，
+游标和快照在同一个事务里提交，中途失败下次会从上一个游标重新开始。
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from playwright.async_api import Error as PlaywrightError
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # 可选依赖，缺失时只写 SQLite
+    pyarrow = None
+
+from ..utils.event_log import echo
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_FILE = "~/.xiaohongshu_publisher/analytics.sqlite3"
+
+# 接口字段 -> 本地列
+COLUMNS = {
+    "id": "note_id",
+    "title": "title",
+    "publish_time": "published_at",
+    "update_time": "updated_at",
+    "view_count": "views",
+    "like_count": "likes",
+    "collect_count": "collects",
+    "comment_count": "comments",
+    "share_count": "shares",
+}
+METRICS = ("views", "likes", "collects", "comments", "shares")
+FIELDS = ("account", *COLUMNS.values(), "row_hash", "synced_at")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS note_stats (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    account TEXT NOT NULL,
+    note_id TEXT NOT NULL,
+    title TEXT,
+    published_at INTEGER,
+    updated_at INTEGER,
+    views INTEGER,
+    likes INTEGER,
+    collects INTEGER,
+    comments INTEGER,
+    shares INTEGER,
+    row_hash TEXT NOT NULL,
+    synced_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS note_stats_note ON note_stats (account, note_id, seq);
+CREATE VIEW IF NOT EXISTS latest_note_stats AS
+SELECT s.* FROM note_stats s JOIN (
+    SELECT account, note_id, MAX(seq) AS seq FROM note_stats GROUP BY account, note_id
+) m ON s.seq = m.seq;
+CREATE TABLE IF NOT EXISTS sync_state (
+    account TEXT PRIMARY KEY,
+    cursor INTEGER NOT NULL,
+    synced_at TEXT NOT NULL
+);
+"""
+
+
+def row_hash(row: Dict) -> str:
+    """笔记快照内容的哈希（标题和各项数据），用来判断是否有变化"""
+    payload = json.dumps([row["title"], *(row[name] for name in METRICS)], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class AnalyticsStore:
+    """笔记数据快照（只追加）和每个账号的同步游标"""
+
+    def __init__(self, path: str = DEFAULT_STORE_FILE, parquet_dir: str = None):
+        self.path = Path(path).expanduser()
+        self.parquet_dir = Path(parquet_dir).expanduser() if parquet_dir else None
+        self._conn: sqlite3.Connection = None
+
+    @classmethod
+    def from_config(cls, options: dict = None) -> "AnalyticsStore":
+        options = options or {}
+        return cls(options.get("path", DEFAULT_STORE_FILE), options.get("parquet_dir"))
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, isolation_level=None, timeout=10)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def cursor(self, account: str) -> Optional[int]:
+        """账号上次同步到的数据更新时间（毫秒），从未同步过时为 None"""
+        row = self.conn.execute("SELECT cursor FROM sync_state WHERE account = ?", (account,)).fetchone()
+        return row["cursor"] if row else None
+
+    def hashes(self, account: str, note_ids) -> Dict[str, str]:
+        """这些笔记最新快照的内容哈希"""
+        note_ids = list(note_ids)
+        result = {}
+        for start in range(0, len(note_ids), 500):
+            chunk = note_ids[start : start + 500]
+            rows = self.conn.execute(
+                f"SELECT note_id, row_hash FROM latest_note_stats "
+                f"WHERE account = ? AND note_id IN ({', '.join('?' * len(chunk))})",
+                [account, *chunk],
+            ).fetchall()
+            result.update((row["note_id"], row["row_hash"]) for row in rows)
+        return result
+
+    def commit(self, account: str, rows: List[Dict], cursor: Optional[int]):
+        """在一个事务里追加快照并推进游标"""
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                f"INSERT INTO note_stats ({', '.join(FIELDS)}) VALUES ({', '.join('?' * len(FIELDS))})",
+                [[row[name] for name in FIELDS] for row in rows],
+            )
+            if cursor is not None:
+                conn.execute(
+                    "INSERT INTO sync_state (account, cursor, synced_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT (account) DO UPDATE SET cursor = excluded.cursor, synced_at = excluded.synced_at",
+                    (account, cursor, datetime.now().isoformat(timespec="seconds")),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        if rows and self.parquet_dir is not None:
+            self._write_parquet(account, rows)
+
+    def _write_parquet(self, account: str, rows: List[Dict]):
+        """本次新增的快照另存一个 Parquet 分片（account=<账号>/part-<时间>.parquet）"""
+        if pyarrow is None:
+            logger.warning("⚠️  未安装 pyarrow，跳过 Parquet 导出")
+            return
+        directory = self.parquet_dir / f"account={account}"
+        directory.mkdir(parents=True, exist_ok=True)
+        table = pyarrow.Table.from_pylist([{name: row[name] for name in FIELDS} for row in rows])
+        name = f"part-{time.strftime('%Y%m%dT%H%M%S')}-{len(rows)}.parquet"
+        pyarrow.parquet.write_table(table, directory / name)
+
+    def latest(self, account: str = None) -> List[Dict]:
+        """每条笔记的最新数据，按发布时间从新到旧"""
+        query, params = "SELECT * FROM latest_note_stats", []
+        if account:
+            query, params = query + " WHERE account = ?", [account]
+        rows = self.conn.execute(query + " ORDER BY published_at DESC", params).fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class AnalyticsSync:
+    """按配置的 analytics 段，把一个账号的数据中心笔记数据增量同步到本地"""
+
+    def __init__(self, request, config: dict, store: AnalyticsStore):
+        options = config.get("analytics", {})
+        self.request = request  # BrowserContext.request（APIRequestContext）
+        self.store = store
+        self.url = config["platform"]["creator_url"].rstrip("/") + config["api"]["note_analytics"]
+        self.page_size = options.get("page_size", 50)
+        self.concurrency = options.get("concurrency", 4)
+        self.overlap = int(options.get("overlap", 3600) * 1000)  # 游标回退，覆盖同步期间发生的更新
+        self.max_attempts = options.get("max_attempts", 4)
+        self.request_timeout = config.get("timeouts", {}).get("api_request", 10000)
+
+    async def _fetch_page(self, page: int) -> Dict:
+        """请求一页数据；5xx/超时按指数退避重试，登录过期或重试用尽时抛出 RuntimeError"""
+        for attempt in range(self.max_attempts):
+            try:
+                response = await self.request.get(
+                    self.url,
+                    params={"page": page, "page_size": self.page_size},
+                    timeout=self.request_timeout,
+                )
+                status = response.status
+                data = await response.json() if status == 200 else {}
+            except (PlaywrightError, ValueError) as e:
+                status, data = None, {"msg": str(e).splitlines()[0] if str(e) else type(e).__name__}
+            if status in (401, 403):
+                raise RuntimeError("登录已过期")
+            if status == 200 and data.get("success") and data.get("code", 0) == 0:
+                return data.get("data") or {}
+            logger.debug(f"数据页 {page} 请求失败 (status={status}, {data.get('msg')})，第 {attempt + 1} 次")
+            if attempt + 1 < self.max_attempts:
+                await asyncio.sleep(min(10.0, 0.5 * 2**attempt) * random.uniform(0.5, 1.0))
+        raise RuntimeError(f"数据页 {page} 请求失败")
+
+    @staticmethod
+    def _normalize(account: str, item: Dict, synced_at: str) -> Dict:
+        row = {column: item.get(field) for field, column in COLUMNS.items()}
+        for name in (*METRICS, "published_at", "updated_at"):
+            # 接口偶尔返回 null，统一成整数（更新时间为 0 表示未知）
+            row[name] = int(row[name] or 0)
+        row.update(account=account, synced_at=synced_at)
+        row["row_hash"] = row_hash(row)
+        return row
+
+    async def sync(self, account: str) -> Dict:
+        """同步一个账号，返回 {"pages", "fetched", "appended", "cursor", "seconds"}"""
+        started = time.perf_counter()
+        cursor = self.store.cursor(account)
+        since = cursor - self.overlap if cursor is not None else None
+        echo(f"📈 同步 {account} 的笔记数据（{'增量' if since is not None else '全量'}）...")
+        synced_at = datetime.now().isoformat(timespec="seconds")
+
+        def normalize(page: Dict) -> List[Dict]:
+            return [self._normalize(account, item, synced_at) for item in page.get("notes") or []]
+
+        def reached(page_rows: List[Dict]) -> bool:
+            """这一页已经翻到游标之前（空页表示到底）"""
+            if not page_rows:
+                return True
+            known = [row["updated_at"] for row in page_rows if row["updated_at"]]
+            return since is not None and bool(known) and min(known) < since
+
+        first = await self._fetch_page(1)
+        pages = [normalize(first)]
+        # 服务端可能把每页条数限制得比配置小，按实际返回的条数计算总页数
+        page_size = int(first.get("page_size") or 0) or len(pages[0]) or self.page_size
+        total_pages = -(-int(first.get("total") or 0) // page_size)
+
+        next_page = 2
+        while not reached(pages[-1]) and next_page <= total_pages:
+            # 一次并发请求一批页面，批内有一页到达游标就不再继续
+            batch = range(next_page, min(total_pages, next_page + self.concurrency - 1) + 1)
+            results = await asyncio.gather(*(self._fetch_page(page) for page in batch))
+            next_page = batch[-1] + 1
+            for page in results:
+                pages.append(normalize(page))
+                if reached(pages[-1]):
+                    break
+
+        rows: Dict[str, Dict] = {}
+        for page_rows in pages:
+            for row in page_rows:
+                if since is not None and row["updated_at"] and row["updated_at"] < since:
+                    continue
+                # 同步期间有笔记更新时，分页会错位出现重复行，保留更新时间较新的那条
+                if row["note_id"] not in rows or row["updated_at"] > rows[row["note_id"]]["updated_at"]:
+                    rows[row["note_id"]] = row
+
+        known = self.store.hashes(account, rows)
+        changed = [row for note_id, row in rows.items() if known.get(note_id) != row["row_hash"]]
+        new_cursor = max([cursor or 0, *(row["updated_at"] for row in rows.values())]) or None
+        self.store.commit(account, changed, new_cursor)
+
+        summary = {
+            "account": account,
+            "pages": len(pages),
+            "fetched": len(rows),
+            "appended": len(changed),
+            "cursor": new_cursor,
+            "seconds": round(time.perf_counter() - started, 2),
+        }
+        echo(
+            f"✅ 同步完成: {summary['pages']} 页，{summary['fetched']} 条笔记，"
+            f"新增/变化 {summary['appended']} 条 ({summary['seconds']}s)"
+        )
+        return summary
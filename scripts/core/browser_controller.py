@@ -3,10 +3,16 @@
 """
 
 import asyncio
+from collections import Counter
 from pathlib import Path
 from playwright.async_api import async_playwright, Page, Browser, BrowserContext
 import logging
 
+from .capture import FailureCapture
+from .page_helpers import install_page_helpers
+from ..utils import metrics
+from ..utils.tracing import current_span, tracer, traced
+
 logger = logging.getLogger(__name__)
 
 
@@ -20,30 +26,30 @@ class BrowserController:
         self.context: BrowserContext = None
         self.page: Page = None
         self.current_step = ""
+        self.stats = Counter()  # 运行指标，如自动关闭的弹窗数
+        self.launches = 0  # 本控制器启动浏览器的次数，大于 0 时再次启动即为重启
+        self.capture = FailureCapture(config)  # 失败现场采集（截图 + trace 窗口）
 
+    @traced()
     async def init(self) -> bool:
         """初始化浏览器"""
         try:
             logger.info("🚀 正在启动浏览器...")
+            # 同一进程中多个控制器（如负载基准的多个 worker）各自的首次启动不算重启
+            if self.launches:
+                metrics.BROWSER_RESTARTS.inc()
+            self.launches += 1
+            metrics.BROWSER_LAUNCHES.inc()
             self.playwright = await async_playwright().start()
             self.browser = await self.playwright.chromium.launch(
-                headless=False,  # 强制非无头模式，用户可见
+                headless=self.config.get("settings", {}).get("headless", False),
                 args=[
                     "--window-size=1440,900",
                     "--start-maximized",
                     "--disable-blink-features=AutomationControlled",
                 ],
             )
-            self.context = await self.browser.new_context(
-                viewport={"width": 1440, "height": 900},
-                user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
-            )
-            self.page = await self.context.new_page()
-
-            # 防止被检测为自动化
-            await self.page.add_init_script("""
-                Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
-            """)
+            await self._new_context()
 
             logger.info("✅ 浏览器启动成功")
             return True
@@ -52,6 +58,80 @@ class BrowserController:
             logger.error(f"❌ 浏览器启动失败: {e}")
             return False
 
+    async def _new_context(self):
+        """创建浏览器上下文（一个上下文对应一个账号的登录态）并打开首个页面"""
+        self.context = await self.browser.new_context(
+            viewport={"width": 1440, "height": 900},
+            user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
+        )
+        # 防止被检测为自动化（注册在上下文上，预热页面等新页面同样生效）
+        await self.context.add_init_script("""
+            Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
+        """)
+        await install_page_helpers(self.context)
+        await self.capture.attach(self.context)
+        # 每个新页面（含预热页面）都注册弹窗自动关闭
+        self.context.on("page", self._install_popup_handler)
+        self.page = await self.context.new_page()
+
+    def _sibling(self) -> "BrowserController":
+        """共享同一浏览器进程的控制器（不要对其调用 close，由原控制器统一关闭）"""
+        sibling = BrowserController(self.config)
+        sibling.playwright = self.playwright
+        sibling.browser = self.browser
+        sibling.stats = self.stats
+        sibling.capture = FailureCapture(self.config, self.capture.store)
+        return sibling
+
+    @traced()
+    async def new_tab(self) -> "BrowserController":
+        """在同一上下文（同一账号）中打开新标签页
+
+        trace 按上下文记录，并发标签页无法按步骤切分，因此标签页只采集失败截图。
+        """
+        tab = self._sibling()
+        tab.context = self.context
+        tab.page = await self.context.new_page()
+        return tab
+
+    @traced()
+    async def new_account(self) -> "BrowserController":
+        """在同一浏览器中新建隔离的上下文，用于登录另一个账号"""
+        account = self._sibling()
+        await account._new_context()
+        return account
+
+    async def _install_popup_handler(self, page: Page):
+        """注册遮挡弹窗处理：操作前发现已知弹窗的关闭按钮就先点掉"""
+        selector = self.config["selectors"].get("dialog_close")
+        if not selector:
+            return
+
+        async def dismiss(close_button):
+            try:
+                await close_button.first.click(timeout=2000)
+                self.stats["popups_dismissed"] += 1
+                metrics.POPUPS_DISMISSED.inc()
+                tracer.instant("popup_dismissed", selector=selector)
+                logger.info(f"🧹 已自动关闭弹窗 (累计 {self.stats['popups_dismissed']} 个)")
+            except Exception as e:
+                logger.warning(f"⚠️  自动关闭弹窗失败: {e}")
+
+        try:
+            await page.add_locator_handler(page.locator(selector), dismiss)
+        except Exception as e:
+            logger.warning(f"⚠️  注册弹窗处理失败: {e}")
+
+    @traced()
+    async def use_page(self, page: Page):
+        """切换到指定页面（如预热池交出的页面），并关闭原页面"""
+        previous = self.page
+        self.page = page
+        await page.bring_to_front()
+        if previous and previous is not page and not previous.is_closed():
+            await previous.close()
+
+    @traced()
     async def navigate(self, url: str, wait_until: str = "networkidle") -> bool:
         """导航到指定页面"""
         try:
@@ -66,6 +146,7 @@ class BrowserController:
             logger.error(f"❌ 页面导航失败: {e}")
             return False
 
+    @traced()
     async def find_element(self, selector: str, timeout: int = None) -> Page:
         """查找元素"""
         if timeout is None:
@@ -78,6 +159,52 @@ class BrowserController:
             logger.warning(f"⚠️  未找到元素: {selector}, 错误: {e}")
             return None
 
+    @traced()
+    async def find_first(
+        self,
+        selectors: list,
+        timeout: int = None,
+        state: str = "visible",
+        field: str = None,
+    ):
+        """同时等待多个候选选择器，返回最先命中的 (元素, 选择器)
+
+        所有候选共用一次超时，而不是每个候选各等一次 element_wait。
+        传入 field 时按字段记录命中的选择器或未命中。
+        """
+        if timeout is None:
+            timeout = self.config["timeouts"]["element_wait"]
+        current_span().args.update(field=field, candidates=list(selectors), winner=None)
+
+        combined = self.page.locator(selectors[0])
+        for selector in selectors[1:]:
+            combined = combined.or_(self.page.locator(selector))
+
+        try:
+            await combined.first.wait_for(state=state, timeout=timeout)
+        except Exception as e:
+            logger.warning(f"⚠️  未找到元素: {selectors}, 错误: {e}")
+            self._count_lookup(field, None)
+            return None
+
+        for selector in selectors:
+            query = selector if state == "attached" else f"{selector} >> visible=true"
+            element = await self.page.query_selector(query)
+            if element:
+                self._count_lookup(field, selector)
+                return element, selector
+        self._count_lookup(field, None)
+        return None
+
+    @staticmethod
+    def _count_lookup(field: str, selector: str):
+        current_span().args["winner"] = selector
+        if field:
+            metrics.SELECTOR_LOOKUPS.inc(
+                field=field, result="hit" if selector else "miss", selector=selector or ""
+            )
+
+    @traced()
     async def find_elements(self, selector: str) -> list:
         """查找多个元素"""
         try:
@@ -87,6 +214,7 @@ class BrowserController:
             logger.warning(f"⚠️  查找元素失败: {selector}, 错误: {e}")
             return []
 
+    @traced()
     async def click(self, selector: str, timeout: int = None) -> bool:
         """点击元素"""
         element = await self.find_element(selector, timeout)
@@ -101,6 +229,36 @@ class BrowserController:
                 logger.error(f"❌ 点击失败: {selector}, 错误: {e}")
         return False
 
+    @traced()
+    async def click_text(
+        self, label: str, role: str = None, timeout: int = None
+    ) -> bool:
+        """按可见文本点击（页面内文本索引直接定位到最近的可交互祖先）"""
+        if timeout is None:
+            timeout = self.config["timeouts"]["element_wait"]
+
+        try:
+            handle = await self.page.wait_for_function(
+                "([label, role]) => window.__xhs.resolveText(label, role)",
+                arg=[label, role],
+                timeout=timeout,
+            )
+            element = handle.as_element()
+        except Exception as e:
+            logger.warning(f"⚠️  未找到文本: {label}, 错误: {e}")
+            return False
+
+        try:
+            self.current_step = f"点击文本: {label}"
+            logger.info(f"👆 {self.current_step}")
+            await element.click()
+        except Exception as e:
+            logger.warning(f"⚠️  点击被拦截，改用脚本点击: {label}, 错误: {e}")
+            await element.evaluate("el => el.click()")
+        await self.random_delay(0.5, 1)
+        return True
+
+    @traced()
     async def fill(self, selector: str, text: str, timeout: int = None) -> bool:
         """填写表单"""
         element = await self.find_element(selector, timeout)
@@ -115,6 +273,7 @@ class BrowserController:
                 logger.error(f"❌ 填写失败: {selector}, 错误: {e}")
         return False
 
+    @traced()
     async def type_text(self, selector: str, text: str, delay: int = 100) -> bool:
         """逐字输入文本（模拟真人打字）"""
         element = await self.find_element(selector)
@@ -131,6 +290,7 @@ class BrowserController:
                 logger.error(f"❌ 输入失败: {e}")
         return False
 
+    @traced()
     async def upload_file(self, selector: str, file_path: str) -> bool:
         """上传文件"""
         element = await self.find_element(selector)
@@ -150,11 +310,15 @@ class BrowserController:
                 logger.error(f"❌ 上传失败: {e}")
         return False
 
+    @traced()
     async def screenshot(self, selector: str = None, path: str = None) -> str:
-        """截图"""
+        """截图（未指定路径时保存到有容量上限的产物目录）"""
+        managed = path is None
         try:
-            if path is None:
-                path = f"/tmp/screenshot_{self.current_step.replace(' ', '_')}.png"
+            if managed:
+                store = self.capture.store
+                store.root.mkdir(parents=True, exist_ok=True)
+                path = str(store.root / f"screenshot_{self.current_step.replace(' ', '_')}.png")
 
             if selector:
                 element = await self.find_element(selector)
@@ -165,12 +329,47 @@ class BrowserController:
 
             if self.config.get("logging", {}).get("show_screenshot", True):
                 logger.info(f"📸 截图已保存: {path}")
+            if managed:
+                self.capture.store.enforce(keep=Path(path))
 
             return path
         except Exception as e:
             logger.error(f"❌ 截图失败: {e}")
             return None
 
+    @traced()
+    async def debug_screenshot(self, name: str) -> str:
+        """流程中的调试截图，只在 capture.mode 为 debug 时保存"""
+        path = await self.capture.debug_screenshot(self.page, name)
+        return str(path) if path else None
+
+    async def call_helper(self, name: str, *args):
+        """调用注入的页面辅助函数 window.__xhs[name](...args)"""
+        return await self.page.evaluate(
+            "([name, args]) => window.__xhs[name](...args)", [name, list(args)]
+        )
+
+    async def find_by_text(
+        self, text: str, exact: bool = False, limit: int = 5
+    ) -> list:
+        """按可见文本查找元素，返回 {tag, class, text} 描述列表"""
+        try:
+            return await self.call_helper(
+                "describeByText", text, {"exact": exact, "limit": limit}
+            )
+        except Exception as e:
+            logger.warning(f"⚠️  按文本查找失败: {text}, 错误: {e}")
+            return []
+
+    async def form_snapshot(self) -> list:
+        """获取当前页面所有可见表单字段的快照"""
+        try:
+            return await self.call_helper("formSnapshot")
+        except Exception as e:
+            logger.warning(f"⚠️  获取表单快照失败: {e}")
+            return []
+
+    @traced()
     async def get_text(self, selector: str) -> str:
         """获取元素文本"""
         element = await self.find_element(selector)
@@ -181,6 +380,7 @@ class BrowserController:
                 pass
         return ""
 
+    @traced()
     async def is_visible(self, selector: str) -> bool:
         """检查元素是否可见"""
         element = await self.find_element(selector)
@@ -201,6 +401,7 @@ class BrowserController:
         await self.page.evaluate(f"window.scrollBy(0, -{pixels})")
         await self.random_delay(0.5, 1)
 
+    @traced()
     async def wait_for_selector(self, selector: str, timeout: int = None) -> bool:
         """等待元素出现"""
         if timeout is None:
@@ -212,6 +413,7 @@ class BrowserController:
         except:
             return False
 
+    @traced("delay", cat="delay")
     async def random_delay(self, min_seconds: float = 1, max_seconds: float = 3):
         """随机延时（模拟人类操作）"""
         import random
@@ -231,9 +433,11 @@ class BrowserController:
         min_d, max_d = random.choice(delays)
         await self.random_delay(min_d, max_d)
 
+    @traced()
     async def close(self):
         """关闭浏览器"""
         try:
+            await self.capture.close()
             if self.browser:
                 await self.browser.close()
             if self.playwright:
@@ -246,6 +450,7 @@ class BrowserController:
         """获取当前页面URL"""
         return self.page.url
 
+    @traced()
     async def refresh_page(self):
         """刷新页面"""
         await self.page.reload()
@@ -0,0 +1,223 @@
+"""
+失败现场采集 - 生产模式下只在失败时保存截图和最近 N 个步骤的 Playwright trace
+
+Playwright trace 按步骤切分为 chunk，只保留最近 N 个步骤的 chunk（暂存在临时目录，
+超出即删除）；失败时把这一窗口连同 JPEG 截图写入有容量上限、按 LRU 淘汰的产物目录。
+"""
+
+import logging
+import re
+import shutil
+import tempfile
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+from playwright.async_api import BrowserContext, Page
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ARTIFACT_DIR = "~/.xiaohongshu_publisher/artifacts"
+
+
+def _slug(text: str, limit: int = 40) -> str:
+    return re.sub(r"[^\w\-]+", "_", str(text)).strip("_")[:limit] or "unknown"
+
+
+class ArtifactStore:
+    """有容量上限的产物目录，超出上限时淘汰最久未访问的条目
+
+    每次失败保存为一个子目录，调试截图为单个文件。
+    """
+
+    def __init__(self, root: str = DEFAULT_ARTIFACT_DIR, max_bytes: int = 200 * 1024 * 1024):
+        self.root = Path(root).expanduser()
+        self.max_bytes = max_bytes
+
+    def new_entry(self, *parts: str) -> Path:
+        """创建一个新的产物子目录"""
+        name = "_".join([datetime.now().strftime("%Y%m%d-%H%M%S")] + [_slug(p) for p in parts if p])
+        entry = self.root / name
+        suffix = 1
+        while entry.exists():
+            suffix += 1
+            entry = self.root / f"{name}-{suffix}"
+        entry.mkdir(parents=True)
+        return entry
+
+    def touch(self, entry: Path):
+        """标记为最近访问（读取产物的工具调用，避免被优先淘汰）"""
+        try:
+            Path(entry).touch()
+        except OSError:
+            pass
+
+    @staticmethod
+    def _size(entry: Path) -> int:
+        if entry.is_file():
+            return entry.stat().st_size
+        return sum(f.stat().st_size for f in entry.rglob("*") if f.is_file())
+
+    def entries(self) -> list:
+        """所有产物条目，按最近访问时间从旧到新"""
+        if not self.root.exists():
+            return []
+        return sorted(self.root.iterdir(), key=lambda p: p.stat().st_mtime)
+
+    def enforce(self, keep: Path = None) -> int:
+        """淘汰最久未访问的产物直到总大小不超过上限，返回淘汰的数量"""
+        entries = [(entry, self._size(entry)) for entry in self.entries()]
+        total = sum(size for _, size in entries)
+        evicted = 0
+        for entry, size in entries:
+            if total <= self.max_bytes:
+                break
+            if keep is not None and entry == keep:
+                continue
+            if entry.is_dir():
+                shutil.rmtree(entry, ignore_errors=True)
+            else:
+                entry.unlink(missing_ok=True)
+            total -= size
+            evicted += 1
+        if evicted:
+            logger.info(f"🧹 产物目录超出上限，已淘汰 {evicted} 个旧产物")
+        return evicted
+
+
+class FailureCapture:
+    """按配置的 capture 段采集失败现场
+
+    mode:
+      production - 只在失败时保存截图和 trace 窗口（默认）
+      debug      - 额外保存流程中的每一张调试截图
+      off        - 不采集
+    """
+
+    def __init__(self, config: dict, store: ArtifactStore = None):
+        options = config.get("capture", {})
+        self.mode = options.get("mode", "production")
+        self.trace_steps = options.get("trace_steps", 5)
+        self.screenshot_quality = options.get("screenshot_quality", 70)
+        self.store = store or ArtifactStore(
+            options.get("artifact_dir", DEFAULT_ARTIFACT_DIR),
+            options.get("max_bytes", 200 * 1024 * 1024),
+        )
+        self.context: BrowserContext = None
+        self.current_step = ""
+        self._chunks: deque = deque()
+        self._spool: Path = None
+        self._chunk_index = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    @property
+    def tracing(self) -> bool:
+        return self.context is not None
+
+    async def attach(self, context: BrowserContext):
+        """在浏览器上下文上开启分块 trace（trace_steps 为 0 时只采集截图）"""
+        if not self.enabled or not self.trace_steps:
+            return
+        try:
+            await context.tracing.start(screenshots=True, snapshots=True)
+            await context.tracing.start_chunk(title="start")
+        except Exception as e:
+            logger.warning(f"⚠️  开启 Playwright trace 失败: {e}")
+            return
+        self.context = context
+        self._spool = Path(tempfile.mkdtemp(prefix="xhs_trace_"))
+
+    async def _rotate(self, title: str = None):
+        """结束当前 chunk 并暂存，只保留最近 trace_steps 个"""
+        self._chunk_index += 1
+        path = self._spool / f"{self._chunk_index:03d}_{_slug(self.current_step or 'start')}.zip"
+        await self.context.tracing.stop_chunk(path=str(path))
+        self._chunks.append(path)
+        while len(self._chunks) > self.trace_steps:
+            self._chunks.popleft().unlink(missing_ok=True)
+        if title is not None:
+            await self.context.tracing.start_chunk(title=title)
+
+    async def step(self, name: str):
+        """步骤边界：切分 trace chunk"""
+        if self.tracing:
+            try:
+                await self._rotate(title=name)
+            except Exception as e:
+                logger.warning(f"⚠️  切分 trace 失败: {e}")
+        self.current_step = name
+
+    async def on_failure(self, page: Page, reason: str, job_id: str = None) -> Path:
+        """保存失败现场（JPEG 截图 + 最近步骤的 trace），返回产物目录"""
+        if not self.enabled:
+            return None
+        try:
+            return await self._save_failure(page, reason, job_id)
+        except Exception as e:
+            # 采集失败不能掩盖原本的失败
+            logger.warning(f"⚠️  保存失败现场失败: {e}")
+            return None
+
+    async def _save_failure(self, page: Page, reason: str, job_id: str) -> Path:
+        entry = self.store.new_entry(job_id, self.current_step, reason)
+        started = time.perf_counter()
+
+        if page is not None and not page.is_closed():
+            try:
+                await page.screenshot(
+                    path=str(entry / "failure.jpg"),
+                    type="jpeg",
+                    quality=self.screenshot_quality,
+                )
+            except Exception as e:
+                logger.warning(f"⚠️  失败截图保存失败: {e}")
+
+        if self.tracing:
+            try:
+                await self._rotate(title=f"{self.current_step} (after failure)")
+                for chunk in self._chunks:
+                    shutil.copy2(chunk, entry / f"trace_{chunk.name}")
+            except Exception as e:
+                logger.warning(f"⚠️  trace 保存失败: {e}")
+
+        (entry / "reason.txt").write_text(
+            f"job_id: {job_id or ''}\nstep: {self.current_step}\nreason: {reason}\n", encoding="utf-8"
+        )
+        self.store.enforce(keep=entry)
+        logger.info(
+            f"📦 失败现场已保存: {entry} ({(time.perf_counter() - started) * 1000:.0f}ms)",
+            extra={"event": "failure_captured", "artifact": str(entry)},
+        )
+        return entry
+
+    async def debug_screenshot(self, page: Page, name: str) -> Path:
+        """调试截图：只在 debug 模式下保存，返回路径（未保存时为 None）"""
+        if self.mode != "debug" or page is None:
+            return None
+        self.store.root.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        path = self.store.root / f"{stamp}_debug_{_slug(name)}.jpg"
+        try:
+            await page.screenshot(path=str(path), type="jpeg", quality=self.screenshot_quality)
+        except Exception as e:
+            logger.warning(f"⚠️  调试截图失败: {e}")
+            return None
+        self.store.enforce(keep=path)
+        return path
+
+    async def close(self):
+        """停止 trace 并清理暂存的 chunk"""
+        if self.tracing:
+            try:
+                await self.context.tracing.stop()
+            except Exception:
+                pass
+            self.context = None
+        if self._spool:
+            shutil.rmtree(self._spool, ignore_errors=True)
+            self._spool = None
+        self._chunks.clear()
@@ -2,12 +2,22 @@
 AI内容生成器 - 根据图片智能生成小红书风格的标题、正文和标签
 """
 
+import argparse
+import json
 import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Optional
-from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Dict
+from dataclasses import dataclass, field, fields
 import logging
 
+from .image_analyzer import PixelAnalyzer
+from .text_index import TextSimilarityIndex
+from ..utils.keywords import KeywordClassifier, load_lexicon
+from ..utils.templates import SlotValues, TemplateLibrary
+
 logger = logging.getLogger(__name__)
 
 
@@ -23,6 +33,63 @@ class GeneratedContent:
     theme: str = ""
 
 
+@dataclass
+class BatchResult:
+    """批量生成的结果，按列存储（第 i 行对应输入的第 i 张图片）"""
+
+    path: List[str] = field(default_factory=list)
+    title: List[str] = field(default_factory=list)
+    content: List[str] = field(default_factory=list)
+    tags: List[List[str]] = field(default_factory=list)
+    image_type: List[str] = field(default_factory=list)
+    mood: List[str] = field(default_factory=list)
+    theme: List[str] = field(default_factory=list)
+
+    @classmethod
+    def empty(cls, size: int) -> "BatchResult":
+        return cls(**{f.name: [None] * size for f in fields(cls)})
+
+    def __len__(self) -> int:
+        return len(self.path)
+
+    def __getitem__(self, index: int) -> GeneratedContent:
+        return GeneratedContent(
+            title=self.title[index],
+            content=self.content[index],
+            tags=self.tags[index],
+            image_type=self.image_type[index],
+            mood=self.mood[index],
+            theme=self.theme[index],
+        )
+
+    def extend(self, other: "BatchResult"):
+        for f in fields(self):
+            getattr(self, f.name).extend(getattr(other, f.name))
+
+    def rows(self) -> Iterator[dict]:
+        columns = [(f.name, getattr(self, f.name)) for f in fields(self)]
+        for index in range(len(self)):
+            yield {name: column[index] for name, column in columns}
+
+    def write_jsonl(self, output) -> int:
+        """逐行写出 JSON Lines（output 为路径或已打开的文本文件），返回行数"""
+        if isinstance(output, (str, Path)):
+            path = Path(output).expanduser()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                return self.write_jsonl(f)
+        count = 0
+        for row in self.rows():
+            output.write(json.dumps(row, ensure_ascii=False) + "\n")
+            count += 1
+        return count
+
+
+def _generate_chunk(generator_cls: type, options: dict, paths: List[str], seed) -> BatchResult:
+    """子进程入口：在独立的生成器实例中处理一段输入"""
+    return generator_cls(options).generate_batch(paths, seed=seed)
+
+
 class ContentGenerator:
     """小红书内容生成器"""
 
@@ -162,6 +229,92 @@ class ContentGenerator:
         ],
     }
 
+    # 正文中间部分模板
+    BODY_TEMPLATES = {
+        "励志": [
+            """
+{theme}这件事，真的需要慢慢来。
+
+不必急于求成，也不必与他人比较。
+每个人的花期不同，不必焦虑有人提前盛开。
+
+记住：
+- 你的努力，时间看得见
+- 自律给你自由
+- 慢慢来，比较快
+
+愿你在{theme}的路上，永远保持热爱和勇气。💪
+""",
+            """
+最近很喜欢一句话：{motto}。
+
+{mood}的时刻值得被记录。
+
+{theme}教会我的几件事：
+1. 过程比结果更重要
+2. 享受当下
+3. 相信自己
+
+一起加油吧！✨🌟
+""",
+        ],
+        "情感": [
+            """{theme}这件事，每个人都有不同的感受。
+
+有时候，一段话就能戳中内心最柔软的地方。
+
+愿我们都能在{mood}中找到力量。
+
+无论你现在处于什么状态，都请记得：
+{comfort}
+
+#情感共鸣 #治愈系 #温暖时刻""",
+        ],
+        "美食": [
+            """今天必须分享一家让我惊艳的{theme}！
+
+{mood}感直接拉满！😍
+
+🍽️ 菜品评价：
+- 口味：⭐⭐⭐⭐⭐
+- 环境：⭐⭐⭐⭐
+- 服务：⭐⭐⭐⭐
+
+总的来说，是一次非常{mood}的用餐体验！
+
+下次还会再来！💯""",
+        ],
+        "日常": [
+            """分享一下最近的{theme}碎片✨
+
+每天都在努力生活，虽然平淡但很充实。
+
+一些小感悟：
+{insight}
+
+希望你们也能在{mood}中找到属于自己的小确幸💫""",
+        ],
+    }
+
+    # 正文模板中随机取值的槽位
+    BODY_CHOICES = {
+        "motto": ["慢慢来，比较快", "允许自己慢一点", "你已经很棒了"],
+        "comfort": ["你值得被爱", "你已经很努力了", "一切都会好起来的"],
+        "insight": ["生活就是要善于发现小美好", "平凡的日子里也有闪光时刻", "珍惜当下的每一刻"],
+    }
+
+    # 模板可用的槽位
+    TEMPLATE_SLOTS = (
+        "theme",
+        "topic",
+        "advice",
+        "emotion",
+        "mood",
+        "location",
+        "dish",
+        "dproduct",
+    ) + tuple(BODY_CHOICES)
+
     # 标签库
     TAG_CATEGORIES = {
         "励志": [
@@ -241,195 +394,130 @@ class ContentGenerator:
         "穿搭": ["穿搭", "衣服", "时尚", "ootd", "服装", "搭配"],
     }
 
-    def __init__(self):
-        pass
+    # 模板在类加载时编译一次
+    _titles = TemplateLibrary(TITLE_TEMPLATES, TEMPLATE_SLOTS, default="日常")
+    _intros = TemplateLibrary(CONTENT_INTROS, TEMPLATE_SLOTS, default="日常")
+    _outros = TemplateLibrary(CONTENT_OUTROS, TEMPLATE_SLOTS, default="日常")
+    _bodies = TemplateLibrary(BODY_TEMPLATES, TEMPLATE_SLOTS, default="日常")
+
+    # 各类型默认的主题和情绪
+    TYPE_DEFAULTS = {
+        "励志": {"theme": "自我成长", "mood": "治愈"},
+        "情感": {"theme": "情感共鸣", "mood": "温暖"},
+        "美食": {"theme": "美食探店", "mood": "满足"},
+        "美妆": {"theme": "美丽分享", "mood": "自信"},
+        "旅行": {"theme": "旅行见闻", "mood": "愉悦"},
+        "日常": {"theme": "生活记录", "mood": "平静"},
+    }
+
+    # 文件名中的命中比目录中的命中更能代表图片内容
+    FILENAME_WEIGHT = 2.0
+
+    def __init__(self, options: dict = None, text_index: TextSimilarityIndex = None):
+        """
+        Args:
+            options: 配置中的 content 段，keywords / keyword_file 为额外的分类词库，
+                image_analysis 为像素分析的配置
+            text_index: 已发布文案的指纹索引，设置后生成时避开过于相似的文案
+        """
+        self.options = options or {}
+        self.text_index = text_index
+        self.classifier = KeywordClassifier(
+            load_lexicon(self.IMAGE_TYPE_MAPPING),
+            load_lexicon(self.options.get("keyword_file")),
+            load_lexicon(self.options.get("keywords")),
+        )
+        self.pixel_analyzer = PixelAnalyzer(self.options.get("image_analysis"))
+
+    def classify(self, image_path: Path) -> List[tuple]:
+        """按关键词给图片打分，返回从高到低的 (类型, 得分)"""
+        image_path = Path(image_path)
+        return self.classifier.rank(
+            (str(image_path.parent), 1.0),
+            (image_path.name, self.FILENAME_WEIGHT),
+        )
 
     def analyze_image(self, image_path: Path) -> Dict:
         """
         分析图片，识别内容类型
-        实际场景中可以使用AI图像识别，这里用文件名推断
+        关键词命中时以关键词为准；没有命中时用像素特征推断类型，情绪总是优先取像素特征
         """
-        filename = image_path.name.lower()
-        file_path = str(image_path).lower()
-
-        # 根据文件名和路径判断图片类型
-        image_type = "日常"
-        mood = "平静"
-        theme = "生活"
-
-        for type_name, keywords in self.IMAGE_TYPE_MAPPING.items():
-            for keyword in keywords:
-                if keyword in filename or keyword in file_path:
-                    image_type = type_name
-                    break
-            if image_type != "日常":
-                break
+        categories = self.classify(image_path)
+        pixels = self.pixel_analyzer.analyze(image_path)
+
+        if categories:
+            image_type = categories[0][0]
+        elif pixels and pixels["type"]:
+            image_type = pixels["type"]
+        else:
+            image_type = "日常"
 
         # 根据类型设置默认主题和情绪
-        type_defaults = {
-            "励志": {"theme": "自我成长", "mood": "治愈"},
-            "情感": {"theme": "情感共鸣", "mood": "温暖"},
-            "美食": {"theme": "美食探店", "mood": "满足"},
-            "美妆": {"theme": "美丽分享", "mood": "自信"},
-            "旅行": {"theme": "旅行见闻", "mood": "愉悦"},
-            "日常": {"theme": "生活记录", "mood": "平静"},
+        defaults = self.TYPE_DEFAULTS.get(image_type, self.TYPE_DEFAULTS["日常"])
+        mood = pixels["mood"] if pixels else defaults["mood"]
+        theme = defaults["theme"]
+        if pixels and pixels["type"] == image_type and pixels["theme"]:
+            theme = pixels["theme"]
+
+        return {
+            "type": image_type,
+            "mood": mood,
+            "theme": theme,
+            "categories": categories,
+            "features": pixels["features"] if pixels else None,
         }
 
-        defaults = type_defaults.get(image_type, type_defaults["日常"])
-        if theme == "生活":
-            theme = defaults["theme"]
-        mood = defaults["mood"]
-
-        return {"type": image_type, "mood": mood, "theme": theme}
-
-    def generate_title(self, analysis: Dict, custom_title: str = None) -> str:
-        """生成标题"""
-        if custom_title:
-            # 用户提供了自定义标题
-            title = custom_title
-        else:
-            # 使用模板生成
-            category = analysis["type"]
-            templates = self.TITLE_TEMPLATES.get(category, self.TITLE_TEMPLATES["日常"])
-            template = random.choice(templates)
-
-            # 根据分析结果填充模板
-            replacements = {
+    def _slot_values(self, analysis: Dict, rng=random) -> SlotValues:
+        """本次生成的槽位表，只有被选中模板用到的槽位才会求值"""
+        return SlotValues(
+            {
                 "theme": analysis.get("theme", "生活"),
                 "topic": analysis.get("theme", "话题"),
                 "advice": "活好自己",
                 "emotion": analysis.get("mood", "治愈"),
+                "mood": analysis.get("mood", "平静"),
                 "location": "本地",
                 "dish": "美食",
                 "dproduct": "好物",
-            }
+                **self.BODY_CHOICES,
+            },
+            rng,
+        )
 
-            title = template
-            for key, value in replacements.items():
-                title = title.replace(f"{{{key}}}", value)
+    def generate_title(self, analysis: Dict, custom_title: str = None, rng=random) -> str:
+        """生成标题"""
+        if custom_title:
+            # 用户提供了自定义标题
+            title = custom_title
+        else:
+            # 随机选择一个已编译的模板，只填充它用到的槽位
+            title = self._titles.render(analysis["type"], self._slot_values(analysis, rng), rng)
 
         # 确保标题长度合适
-        max_length = self.TAG_CATEGORIES.get("励志", ["励志"])[
-            0
-        ]  # 使用配置的max_title_length
         if len(title) > 20:
             title = title[:19] + "…"
 
         return title
 
-    def generate_content(self, analysis: Dict, custom_content: str = None) -> str:
+    def generate_content(self, analysis: Dict, custom_content: str = None, rng=random) -> str:
         """生成正文"""
         if custom_content:
             return custom_content
 
         category = analysis["type"]
-        intros = self.CONTENT_INTROS.get(category, self.CONTENT_INTROS["日常"])
-        outros = self.CONTENT_OUTROS.get(category, self.CONTENT_OUTROS["日常"])
-
-        # 随机选择开头和结尾
-        intro = random.choice(intros)
-        outro = random.choice(outros)
-
-        # 生成中间内容
-        if category == "励志":
-            body = self._generate_motivational_body(analysis)
-        elif category == "情感":
-            body = self._generate_emotional_body(analysis)
-        elif category == "美食":
-            body = self._generate_food_body(analysis)
-        else:
-            body = self._generate_daily_body(analysis)
+        values = self._slot_values(analysis, rng)
+
+        # 开头、正文、结尾各自只渲染被选中的模板
+        intro = self._intros.render(category, values, rng)
+        body = self._bodies.render(category, values, rng)
+        outro = self._outros.render(category, values, rng)
 
         # 组合正文
         content = intro + "\n\n" + body + outro
 
         return content
 
-    def _generate_motivational_body(self, analysis: Dict) -> str:
-        """生成励志类正文"""
-        templates = [
-            f"""
-{analysis.get("theme", "成长")}这件事，真的需要慢慢来。
-
-不必急于求成，也不必与他人比较。
-每个人的花期不同，不必焦虑有人提前盛开。
-
-记住：
-- {random.choice(["你的努力，时间看得见"])}
-- {random.choice(["自律给你自由"])}
-- {random.choice(["慢慢来，比较快"])}
-
-愿你在{analysis.get("theme", "成长")}的路上，永远保持热爱和勇气。💪
-""",
-            f"""
-最近很喜欢一句话：{random.choice(["慢慢来，比较快", "允许自己慢一点", "你已经很棒了"])}。
-
-{analysis.get("mood", "治愈")}的时刻值得被记录。
-
-{analysis.get("theme", "生活感悟")}教会我的几件事：
-1. {random.choice(["过程比结果更重要"])}
-2. {random.choice(["享受当下"])}
-3. {random.choice(["相信自己"])}
-
-一起加油吧！✨🌟
-""",
-        ]
-        return random.choice(templates)
-
-    def _generate_emotional_body(self, analysis: Dict) -> str:
-        """生成情感类正文"""
-        return f"""
-{analysis.get("theme", "情感共鸣")}这件事，每个人都有不同的感受。
-
-有时候，一段话就能戳中内心最柔软的地方。
-
-愿我们都能在{analysis.get("mood", "温暖")}中找到力量。
-
-无论你现在处于什么状态，都请记得：
-{random.choice(["你值得被爱", "你已经很努力了", "一切都会好起来的"])}
-
-#情感共鸣 #治愈系 #温暖时刻
-""".strip()
-
-    def _generate_food_body(self, analysis: Dict) -> str:
-        """生成美食类正文"""
-        return f"""
-今天必须分享一家让我惊艳的{analysis.get("theme", "美食")}！
-
-{analysis.get("mood", "满足")}感直接拉满！😍
-
-🍽️ 菜品评价：
-- 口味：⭐⭐⭐⭐⭐
-- 环境：⭐⭐⭐⭐
-- 服务：⭐⭐⭐⭐
-
-总的来说，是一次非常{analysis.get("mood", "愉快")}的用餐体验！
-
-下次还会再来！💯
-""".strip()
-
-    def _generate_daily_body(self, analysis: Dict) -> str:
-        """生成日常类正文"""
-        return f"""
-分享一下最近的{analysis.get("theme", "生活")}碎片✨
-
-每天都在努力生活，虽然平淡但很充实。
-
-一些小感悟：
-{
-            random.choice(
-                [
-                    "生活就是要善于发现小美好",
-                    "平凡的日子里也有闪光时刻",
-                    "珍惜当下的每一刻",
-                ]
-            )
-        }
-
-希望你们也能在{analysis.get("mood", "平静")}中找到属于自己的小确幸💫
-""".strip()
-
-    def generate_tags(self, analysis: Dict, custom_tags: List[str] = None) -> List[str]:
+    def generate_tags(self, analysis: Dict, custom_tags: List[str] = None, rng=random) -> List[str]:
         """生成标签"""
         if custom_tags:
             return custom_tags[:9]  # 最多9个标签
@@ -442,8 +530,8 @@ class ContentGenerator:
         tags.extend(universal_tags)
 
         # 随机打乱，返回前5-7个标签
-        random.shuffle(tags)
-        return tags[: random.randint(5, 7)]
+        rng.shuffle(tags)
+        return tags[: rng.randint(5, 7)]
 
     def generate_full_content(
         self,
@@ -471,8 +559,7 @@ class ContentGenerator:
         )
 
         # 生成各部分内容
-        title = self.generate_title(analysis, custom_title)
-        content = self.generate_content(analysis, custom_content)
+        title, content = self._generate_distinct(analysis, custom_title, custom_content)
         tags = self.generate_tags(analysis, custom_tags)
 
         logger.info(f"✅ 内容生成完成:")
@@ -489,6 +576,99 @@ class ContentGenerator:
             theme=analysis["theme"],
         )
 
+    def _generate_distinct(
+        self, analysis: Dict, custom_title: str = None, custom_content: str = None
+    ) -> tuple:
+        """生成标题和正文；与已发布笔记过于相似时重新生成，次数用尽时取最不相似的候选"""
+        attempts = self.options.get("regenerate_attempts", 5)
+        best, best_key = None, None
+        for attempt in range(1, attempts + 1):
+            title = self.generate_title(analysis, custom_title)
+            content = self.generate_content(analysis, custom_content)
+            if self.text_index is None or (custom_title and custom_content):
+                return title, content
+
+            # 固定的自定义标题每次都一样，重新生成只能改变正文，只按正文判断
+            match = self.text_index.find(title, content, match_title=not custom_title)
+            if match is None:
+                return title, content
+
+            key = (match["title_distance"] + match["body_distance"], match["body_distance"])
+            if best_key is None or key > best_key:
+                best, best_key = (title, content), key
+            logger.info(
+                f"🔁 文案与已发布笔记「{match.get('title', '')}」过于相似"
+                f"（标题距离 {match['title_distance']}，正文距离 {match['body_distance']}），"
+                f"重新生成 {attempt}/{attempts}"
+            )
+
+        logger.warning("⚠️  多次生成仍与历史笔记相似，使用差异最大的候选")
+        return best
+
+    @staticmethod
+    def item_rng(seed, image_path) -> random.Random:
+        """单张图片的随机数发生器：只由种子和路径决定，与批次顺序和分片方式无关"""
+        return random.Random(f"{seed}:{image_path}")
+
+    def generate_batch(
+        self, paths: Iterable, seed=0, workers: int = None
+    ) -> BatchResult:
+        """
+        批量生成内容：先一次性分析所有图片并按类别分组，再逐组渲染
+
+        Args:
+            paths: 图片路径
+            seed: 随机种子，相同种子和路径总是得到相同的内容
+            workers: 进程数（大于 1 时按进程分片并行生成）
+
+        Returns:
+            BatchResult: 按列存储、与输入顺序一致的结果
+        """
+        paths = [str(p) for p in paths]
+        started = time.perf_counter()
+
+        if workers and workers > 1 and len(paths) > workers:
+            size = -(-len(paths) // workers)
+            chunks = [paths[i : i + size] for i in range(0, len(paths), size)]
+            result = BatchResult()
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for part in pool.map(
+                    _generate_chunk,
+                    [type(self)] * len(chunks),
+                    [self.options] * len(chunks),
+                    chunks,
+                    [seed] * len(chunks),
+                ):
+                    result.extend(part)
+        else:
+            result = BatchResult.empty(len(paths))
+            groups: Dict[str, List[int]] = {}
+            for index, path in enumerate(paths):
+                analysis = self.analyze_image(Path(path))
+                result.path[index] = path
+                result.image_type[index] = analysis["type"]
+                result.mood[index] = analysis["mood"]
+                result.theme[index] = analysis["theme"]
+                groups.setdefault(analysis["type"], []).append(index)
+
+            for category, indexes in groups.items():
+                for index in indexes:
+                    analysis = {
+                        "type": category,
+                        "mood": result.mood[index],
+                        "theme": result.theme[index],
+                    }
+                    rng = self.item_rng(seed, result.path[index])
+                    result.title[index] = self.generate_title(analysis, rng=rng)
+                    result.content[index] = self.generate_content(analysis, rng=rng)
+                    result.tags[index] = self.generate_tags(analysis, rng=rng)
+
+        logger.info(
+            f"✅ 批量生成完成: {len(result)} 条, "
+            f"{len(set(result.image_type))} 个类别, 耗时 {time.perf_counter() - started:.2f}s"
+        )
+        return result
+
     def preview_content(self, content: GeneratedContent) -> str:
         """预览生成的内容"""
         preview = f"""
@@ -507,3 +687,36 @@ class ContentGenerator:
 {"=" * 50}
 """
         return preview
+
+
+def main():
+    """批量预生成内容并写出 JSON Lines"""
+    parser = argparse.ArgumentParser(description="批量生成小红书内容")
+    parser.add_argument("inputs", nargs="+", help="图片文件或目录")
+    parser.add_argument("--seed", default="0", help="随机种子（相同种子结果可复现）")
+    parser.add_argument("--workers", type=int, default=1, help="并行进程数")
+    parser.add_argument("--output", "-o", default="-", help="JSON Lines 输出路径（- 为标准输出）")
+    parser.add_argument("--keywords", metavar="FILE", help="额外的分类词库（YAML/JSON）")
+    args = parser.parse_args()
+
+    suffixes = {".png", ".jpg", ".jpeg", ".webp", ".gif"}
+    paths = []
+    for item in args.inputs:
+        item = Path(item).expanduser()
+        if item.is_dir():
+            paths.extend(sorted(p for p in item.rglob("*") if p.suffix.lower() in suffixes))
+        else:
+            paths.append(item)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    generator = ContentGenerator({"keyword_file": args.keywords})
+    result = generator.generate_batch(paths, seed=args.seed, workers=args.workers)
+    if args.output == "-":
+        result.write_jsonl(sys.stdout)
+    else:
+        result.write_jsonl(args.output)
+        logger.info(f"📝 已写出: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+本地像素分析 - 用缩略图上的向量化特征推断图片的类型、情绪和主题
+
+特征：k-means 主色、亮度/冷暖/饱和度、文字密度估计（高对比度细边缘占比）、画幅比例。
+结果按文件内容哈希缓存在磁盘上，同一张图再次分析只需一次查找。
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = "~/.xiaohongshu_publisher/analysis_cache"
+
+# 特征算法变化时递增，旧缓存自动失效
+FEATURE_VERSION = 1
+
+COLOR_SIZE = 64  # 主色/亮度在 64×64 缩略图上计算
+EDGE_SIZE = 256  # 文字密度在长边 256 的灰度图上计算
+
+
+def _kmeans(pixels: np.ndarray, k: int, iterations: int = 8) -> tuple:
+    """小规模 k-means，初始中心取亮度分位点，结果确定"""
+    luma = pixels @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    order = np.argsort(luma)
+    centers = pixels[order[np.linspace(0, len(order) - 1, k).astype(int)]].copy()
+    for _ in range(iterations):
+        distances = ((pixels[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        labels = distances.argmin(axis=1)
+        for index in range(k):
+            members = pixels[labels == index]
+            if len(members):
+                centers[index] = members.mean(axis=0)
+    counts = np.bincount(labels, minlength=k)
+    return centers, counts / counts.sum()
+
+
+def extract_features(image: Image.Image, colors: int = 4) -> Dict:
+    """从 PIL 图片计算特征（与缓存无关，可直接用于内存中的图片）"""
+    width, height = image.size
+    rgb = image.convert("RGB")
+
+    small = np.asarray(rgb.resize((COLOR_SIZE, COLOR_SIZE), Image.BILINEAR), dtype=np.float32) / 255.0
+    pixels = small.reshape(-1, 3)
+    r, g, b = pixels[:, 0], pixels[:, 1], pixels[:, 2]
+    maximum, minimum = pixels.max(axis=1), pixels.min(axis=1)
+    saturation = np.where(maximum > 0, (maximum - minimum) / np.maximum(maximum, 1e-6), 0.0)
+
+    centers, shares = _kmeans(pixels, colors)
+    ranked = np.argsort(-shares)
+    dominant = [
+        ["#%02x%02x%02x" % tuple(int(round(c * 255)) for c in centers[i]), round(float(shares[i]), 3)]
+        for i in ranked
+        if shares[i] > 0
+    ]
+
+    # 文字：大量细小、高对比度的水平/垂直亮度突变
+    scale = EDGE_SIZE / max(width, height)
+    gray = rgb.convert("L").resize(
+        (max(1, round(width * scale)), max(1, round(height * scale))), Image.BILINEAR
+    )
+    luma = np.asarray(gray, dtype=np.int16)
+    if min(luma.shape) > 1:
+        dx = np.abs(np.diff(luma, axis=1))[:-1, :]
+        dy = np.abs(np.diff(luma, axis=0))[:, :-1]
+        text_density = float(((dx > 48) | (dy > 48)).mean())
+    else:
+        text_density = 0.0
+
+    aspect = height / width if width else 1.0
+    if aspect >= 1.2:
+        aspect_class = "portrait"
+    elif aspect <= 0.83:
+        aspect_class = "landscape"
+    else:
+        aspect_class = "square"
+
+    return {
+        "size": [width, height],
+        "colors": dominant,
+        "brightness": round(float((0.299 * r + 0.587 * g + 0.114 * b).mean()), 3),
+        "warmth": round(float((r - b).mean()), 3),
+        "saturation": round(float(saturation.mean()), 3),
+        "text_density": round(text_density, 3),
+        "aspect": round(aspect, 3),
+        "aspect_class": aspect_class,
+    }
+
+
+def interpret(features: Dict) -> Dict:
+    """把像素特征映射为类型/情绪/主题的建议（类型为空表示像素上看不出来）"""
+    brightness = features["brightness"]
+    warmth = features["warmth"]
+    saturation = features["saturation"]
+    text_density = features["text_density"]
+
+    if brightness < 0.3:
+        mood = "静谧"
+    elif warmth > 0.08:
+        mood = "温暖"
+    elif saturation > 0.45:
+        mood = "活力"
+    elif warmth < -0.05:
+        mood = "清新"
+    else:
+        mood = "平静"
+
+    image_type, theme = "", ""
+    if text_density > 0.04:
+        # 文字海报/金句图
+        image_type, theme = "励志", "文字海报"
+    elif features["aspect_class"] == "landscape" and saturation > 0.25 and text_density < 0.02:
+        image_type, theme = "旅行", "风景随拍"
+
+    return {"type": image_type, "mood": mood, "theme": theme}
+
+
+class PixelAnalyzer:
+    """按配置的 content.image_analysis 段分析图片像素，结果按内容哈希缓存"""
+
+    def __init__(self, options: dict = None):
+        options = options or {}
+        self.enabled = options.get("enabled", True)
+        self.colors = options.get("colors", 4)
+        cache_dir = options.get("cache_dir", DEFAULT_CACHE_DIR)
+        self.cache_dir = Path(cache_dir).expanduser() if cache_dir else None
+
+    @staticmethod
+    def content_hash(data: bytes) -> str:
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+    def _cache_path(self, digest: str) -> Optional[Path]:
+        if self.cache_dir is None:
+            return None
+        return self.cache_dir / digest[:2] / f"{digest}.v{FEATURE_VERSION}.json"
+
+    def _load(self, path: Optional[Path]) -> Optional[Dict]:
+        if path is None:
+            return None
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def _store(self, path: Optional[Path], result: Dict):
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # 先写临时文件再改名，多进程同时分析同一张图也不会读到半个文件
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"⚠️  写入分析缓存失败: {e}")
+
+    def analyze(self, image_path: Path) -> Optional[Dict]:
+        """返回 {"features": ..., "type", "mood", "theme"}；文件不可读或不是图片时返回 None"""
+        if not self.enabled:
+            return None
+        try:
+            data = Path(image_path).read_bytes()
+        except OSError:
+            return None
+
+        digest = self.content_hash(data)
+        cache_path = self._cache_path(digest)
+        cached = self._load(cache_path)
+        if cached is not None:
+            return cached
+
+        try:
+            with Image.open(Path(image_path)) as image:
+                size = image.size
+                # JPEG 直接按缩略尺寸解码，省去全尺寸解码
+                image.draft("RGB", (EDGE_SIZE, EDGE_SIZE))
+                features = extract_features(image, self.colors)
+            features["size"] = list(size)
+        except Exception as e:
+            logger.debug(f"像素分析失败 {image_path}: {e}")
+            return None
+
+        result = {"hash": digest, "features": features, **interpret(features)}
+        self._store(cache_path, result)
+        return result
@@ -0,0 +1,189 @@
+"""
+已发布图片的感知哈希索引 - 换了文件名、重新压缩或缩放的同一张图也能在上传前识别出来
+
+pHash（32×32 灰度图的 DCT 低频 8×8 与中位数比较）用多索引哈希按汉明距离检索，
+dHash（9×8 相邻像素亮度差）作为二次确认。索引以 JSON Lines 追加写入磁盘，首次查询时载入内存。
+"""
+
+import json
+import logging
+import time
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_FILE = "~/.xiaohongshu_publisher/image_index.jsonl"
+
+
+def _dct_matrix(size: int) -> np.ndarray:
+    """DCT-II 变换矩阵，二维 DCT 即 D @ X @ D.T"""
+    n = np.arange(size)
+    matrix = np.cos(np.pi * (2 * n[None, :] + 1) * n[:, None] / (2 * size))
+    matrix[0] *= 1 / np.sqrt(2)
+    return matrix * np.sqrt(2 / size)
+
+
+_DCT32 = _dct_matrix(32)
+_BIT_WEIGHTS = 1 << np.arange(63, -1, -1, dtype=np.uint64)
+
+
+def _pack(bits: np.ndarray) -> int:
+    return int((bits.reshape(-1).astype(np.uint64) * _BIT_WEIGHTS).sum())
+
+
+def phash(image: Image.Image) -> int:
+    """64 位感知哈希"""
+    gray = np.asarray(image.convert("L").resize((32, 32), Image.LANCZOS), dtype=np.float64)
+    low = (_DCT32 @ gray @ _DCT32.T)[:8, :8]
+    median = np.median(low.reshape(-1)[1:])  # 不含直流分量
+    return _pack(low > median)
+
+
+def dhash(image: Image.Image) -> int:
+    """64 位差异哈希"""
+    gray = np.asarray(image.convert("L").resize((9, 8), Image.LANCZOS), dtype=np.int16)
+    return _pack(gray[:, 1:] > gray[:, :-1])
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def image_hashes(image_path: Path) -> Tuple[int, int]:
+    """计算图片的 (pHash, dHash)"""
+    with Image.open(Path(image_path)) as image:
+        image.draft("L", (128, 128))
+        return phash(image), dhash(image)
+
+
+class MultiIndexHash:
+    """64 位哈希的多索引哈希（multi-index hashing）
+
+    把哈希切成 chunks 段，每段一张倒排表。两个哈希距离不超过 r 时，至少有一段的距离
+    不超过 r // chunks（抽屉原理），所以只需在每张表里枚举这么多位翻转的键，
+    再对少量候选计算完整的汉明距离。
+    """
+
+    def __init__(self, bits: int = 64, chunks: int = 4):
+        self.chunks = chunks
+        self.width = bits // chunks
+        self.mask = (1 << self.width) - 1
+        self.tables: List[Dict[int, list]] = [{} for _ in range(chunks)]
+        self.size = 0
+        self._flips: Dict[int, List[int]] = {}
+
+    def _flip_masks(self, radius: int) -> List[int]:
+        """段内翻转不超过 radius // chunks 位的所有掩码（按半径缓存）"""
+        bits = radius // self.chunks
+        if bits not in self._flips:
+            masks = [0]
+            for count in range(1, bits + 1):
+                masks.extend(sum(1 << b for b in combo) for combo in combinations(range(self.width), count))
+            self._flips[bits] = masks
+        return self._flips[bits]
+
+    def _keys(self, value: int) -> List[int]:
+        return [(value >> (i * self.width)) & self.mask for i in range(self.chunks)]
+
+    def add(self, value: int, item):
+        for table, key in zip(self.tables, self._keys(value)):
+            table.setdefault(key, []).append((value, item))
+        self.size += 1
+
+    def search(self, value: int, radius: int) -> Iterator[Tuple[int, object]]:
+        """产出所有距离不超过 radius 的 (距离, 附带数据)"""
+        flips = self._flip_masks(radius)
+        seen = set()
+        for table, key in zip(self.tables, self._keys(value)):
+            for flip in flips:
+                for candidate, item in table.get(key ^ flip, ()):
+                    if id(item) in seen:
+                        continue
+                    seen.add(id(item))
+                    distance = hamming(value, candidate)
+                    if distance <= radius:
+                        yield distance, item
+
+    def __len__(self) -> int:
+        return self.size
+
+
+class ImageHashIndex:
+    """已发布图片的感知哈希索引（按配置的 dedup 段）"""
+
+    def __init__(
+        self,
+        index_file: str = DEFAULT_INDEX_FILE,
+        phash_distance: int = 6,
+        dhash_distance: int = 10,
+    ):
+        self.index_file = Path(index_file).expanduser() if index_file else None
+        self.phash_distance = phash_distance
+        self.dhash_distance = dhash_distance
+        self.hashes = MultiIndexHash()
+        self._loaded = False
+
+    @classmethod
+    def from_config(cls, options: dict = None) -> "ImageHashIndex":
+        options = options or {}
+        return cls(
+            options.get("image_index", DEFAULT_INDEX_FILE),
+            options.get("phash_distance", 6),
+            options.get("dhash_distance", 10),
+        )
+
+    def load(self) -> "ImageHashIndex":
+        """从磁盘载入索引（只在第一次调用时读取）"""
+        if self._loaded:
+            return self
+        self._loaded = True
+        if self.index_file is None or not self.index_file.exists():
+            return self
+        started = time.perf_counter()
+        with open(self.index_file, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    self.hashes.add(int(entry["phash"], 16), entry)
+                except (ValueError, KeyError):
+                    continue
+        logger.info(
+            f"🗂️  已载入图片索引: {len(self.hashes)} 张 ({(time.perf_counter() - started) * 1000:.0f}ms)"
+        )
+        return self
+
+    def find(self, hashes: Tuple[int, int]) -> List[Dict]:
+        """查找近似重复的已发布图片，按 pHash 距离从近到远"""
+        self.load()
+        p_hash, d_hash = hashes
+        matches = []
+        for distance, entry in self.hashes.search(p_hash, self.phash_distance):
+            d_distance = hamming(d_hash, int(entry["dhash"], 16))
+            if d_distance <= self.dhash_distance:
+                matches.append({**entry, "distance": distance, "dhash_distance": d_distance})
+        matches.sort(key=lambda m: (m["distance"], m["dhash_distance"]))
+        return matches
+
+    def add(self, hashes: Tuple[int, int], **meta) -> Dict:
+        """记录一张已发布的图片（追加写入索引文件）"""
+        self.load()
+        entry = {
+            "phash": f"{hashes[0]:016x}",
+            "dhash": f"{hashes[1]:016x}",
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            **meta,
+        }
+        self.hashes.add(hashes[0], entry)
+        if self.index_file is not None:
+            self.index_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.index_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return entry
+
+    def __len__(self) -> int:
+        return len(self.load().hashes)
@@ -0,0 +1,200 @@
+"""
+发布账本 - SQLite 中只追加的发布记录，按幂等键保证重试和重启不会重复发布
+
+每次状态变化追加一行（不更新、不删除），某个幂等键的当前状态就是它最新的一行。
+点击发布前先在同一个写事务里检查并写入 submitting，进程在点击后、记录结果前退出时，
+下次运行看到 submitting 就不会再点一次。
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEDGER_FILE = "~/.xiaohongshu_publisher/ledger.sqlite3"
+
+SUBMITTING = "submitting"  # 即将/已经点击发布，结果未知
+PUBLISHED = "published"  # 平台已接受
+FAILED = "failed"  # 发布失败，可以重试
+
+# 发布后核验得到的最终审核结果（见 verifier）
+APPROVED = "approved"  # 审核通过，正常展示
+LIMITED = "limited"  # 审核通过但限流
+REJECTED = "rejected"  # 审核未通过，改稿（文案哈希变化）后可以重发
+DELETED = "deleted"  # 笔记已被删除，不再自动重发
+
+# 处于这些状态时同一幂等键不能再次发布（rejected 见 blocks）
+BLOCKING_STATES = {SUBMITTING, PUBLISHED, APPROVED, LIMITED, DELETED}
+
+FIELDS = (
+    "idempotency_key",
+    "job_id",
+    "account",
+    "state",
+    "content_hash",
+    "image_phash",
+    "image_dhash",
+    "note_id",
+    "title",
+    "error",
+    "recorded_at",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS publish_ledger (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT NOT NULL,
+    job_id TEXT,
+    account TEXT,
+    state TEXT NOT NULL,
+    content_hash TEXT,
+    image_phash TEXT,
+    image_dhash TEXT,
+    note_id TEXT,
+    title TEXT,
+    error TEXT,
+    recorded_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS publish_ledger_key ON publish_ledger (idempotency_key, seq);
+CREATE INDEX IF NOT EXISTS publish_ledger_note ON publish_ledger (note_id);
+CREATE TRIGGER IF NOT EXISTS publish_ledger_no_update BEFORE UPDATE ON publish_ledger
+BEGIN SELECT RAISE(ABORT, 'publish_ledger is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS publish_ledger_no_delete BEFORE DELETE ON publish_ledger
+BEGIN SELECT RAISE(ABORT, 'publish_ledger is append-only'); END;
+"""
+
+
+def file_digest(path: Path) -> str:
+    """文件内容的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def content_digest(title: str, content: str, tags: List[str]) -> str:
+    """笔记文案的 SHA-256（标题、正文、标签）"""
+    payload = json.dumps([title, content, list(tags or [])], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def blocks(entry: Optional[Dict], content_hash: str = None) -> bool:
+    """该记录是否阻止再次发布：被拒的笔记只有文案哈希变化时才放行（未给出文案哈希时按阻止处理）"""
+    if entry is None:
+        return False
+    if entry["state"] == REJECTED:
+        return content_hash is None or content_hash == entry["content_hash"]
+    return entry["state"] in BLOCKING_STATES
+
+
+def idempotency_key(account: str, image_digest: str) -> str:
+    """默认幂等键：同一账号发布同一张图片（按内容）只算一次"""
+    return hashlib.sha256(f"{account}:{image_digest}".encode("utf-8")).hexdigest()[:32]
+
+
+class PublishLedger:
+    """按配置的 ledger 段打开的发布账本"""
+
+    def __init__(self, path: str = DEFAULT_LEDGER_FILE):
+        self.path = Path(path).expanduser()
+        self._conn: sqlite3.Connection = None
+
+    @classmethod
+    def from_config(cls, options: dict = None) -> "PublishLedger":
+        options = options or {}
+        return cls(options.get("path", DEFAULT_LEDGER_FILE))
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # 自动提交模式，需要原子性的地方显式 BEGIN IMMEDIATE
+            self._conn = sqlite3.connect(self.path, isolation_level=None, timeout=10)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def _insert(self, key: str, state: str, fields: dict) -> Dict:
+        row = {name: fields.get(name) for name in FIELDS}
+        row.update(
+            idempotency_key=key,
+            state=state,
+            recorded_at=datetime.now().isoformat(timespec="milliseconds"),
+        )
+        self.conn.execute(
+            f"INSERT INTO publish_ledger ({', '.join(FIELDS)}) VALUES ({', '.join('?' * len(FIELDS))})",
+            [row[name] for name in FIELDS],
+        )
+        return row
+
+    def latest(self, key: str) -> Optional[Dict]:
+        """幂等键当前（最新）的记录"""
+        row = self.conn.execute(
+            "SELECT * FROM publish_ledger WHERE idempotency_key = ? ORDER BY seq DESC LIMIT 1", (key,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def history(self, key: str) -> List[Dict]:
+        """幂等键的全部记录，按时间先后"""
+        rows = self.conn.execute(
+            "SELECT * FROM publish_ledger WHERE idempotency_key = ? ORDER BY seq", (key,)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def claim(self, key: str, **fields) -> Optional[Dict]:
+        """原子地检查并写入 submitting
+
+        返回 None 表示可以点击发布；否则返回阻止本次发布的那条记录（已发布、结果未知或被拒且文案未改）。
+        """
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            current = self.latest(key)
+            if blocks(current, fields.get("content_hash")):
+                conn.execute("ROLLBACK")
+                return current
+            self._insert(key, SUBMITTING, fields)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return None
+
+    def record(self, key: str, state: str, **fields) -> Dict:
+        """追加一条状态记录（除 error 外，未给出的字段沿用该键上一条记录）"""
+        current = self.latest(key) or {}
+        merged = {name: current.get(name) for name in FIELDS if name != "error"}
+        merged.update({name: value for name, value in fields.items() if value is not None})
+        return self._insert(key, state, merged)
+
+    def latest_states(self, states=None, account: str = None) -> List[Dict]:
+        """每个幂等键的最新记录，可按状态和账号过滤"""
+        query = (
+            "SELECT l.* FROM publish_ledger l JOIN ("
+            "SELECT idempotency_key, MAX(seq) AS seq FROM publish_ledger GROUP BY idempotency_key"
+            ") m ON l.seq = m.seq"
+        )
+        conditions, params = [], []
+        if states:
+            conditions.append(f"l.state IN ({', '.join('?' * len(states))})")
+            params.extend(states)
+        if account:
+            conditions.append("l.account = ?")
+            params.append(account)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        rows = self.conn.execute(query + " ORDER BY l.seq", params).fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -13,6 +13,11 @@ import tkinter as tk
 from tkinter import messagebox
 from PIL import Image, ImageTk
 
+from . import routes
+from ..utils import metrics
+from ..utils.event_log import echo, prompt
+from ..utils.tracing import tracer, traced
+
 logger = logging.getLogger(__name__)
 
 
@@ -24,10 +29,12 @@ class LoginHandler:
         self.config = config
         self.qr_code_path = Path("/tmp/xhs_qr_code.png")
 
-        # Cookie持久化配置
-        self.cookie_dir = Path.home() / ".xiaohongshu_publisher"
+        # Cookie持久化配置（platform.cookie_file 可覆盖默认位置）
+        self.cookie_file = Path(
+            config["platform"].get("cookie_file", "~/.xiaohongshu_publisher/cookies.json")
+        ).expanduser()
+        self.cookie_dir = self.cookie_file.parent
         self.cookie_dir.mkdir(exist_ok=True)
-        self.cookie_file = self.cookie_dir / "cookies.json"
 
         self.root = None
         self.qr_label = None
@@ -131,15 +138,25 @@ class LoginHandler:
 
     # ==================== 登录状态检查 ====================
 
+    def is_login_redirect(self, url: str) -> bool:
+        """判断页面是否被重定向到了登录页"""
+        return routes.is_login_redirect(self.config, url)
+
+    @traced(cat="login")
     async def check_login_status(self) -> bool:
         """检查是否已登录"""
         logger.info("🔍 检查登录状态...")
         try:
             # 访问创作平台首页
             await self.browser.navigate(self.config["platform"]["creator_url"])
-            await asyncio.sleep(2)
 
-            # 检查登录成功指示器
+            # 被重定向到登录页说明未登录，无需再等待登录指示器
+            if self.is_login_redirect(self.browser.page.url):
+                tracer.instant("login_redirect", url=self.browser.page.url)
+                logger.info("⚠️  未登录状态（已跳转登录页）")
+                return False
+
+            # 检查登录成功指示器（候选选择器共用一次等待）
             login_success_selectors = [
                 self.config["selectors"]["login_success_indicator"],
                 ".user-avatar",
@@ -148,13 +165,9 @@ class LoginHandler:
                 ".header-user",
             ]
 
-            for selector in login_success_selectors:
-                element = await self.browser.find_element(selector)
-                if element:
-                    is_visible = await element.is_visible()
-                    if is_visible:
-                        logger.info("✅ 已登录状态")
-                        return True
+            if await self.browser.find_first(login_success_selectors, field="login_indicator"):
+                logger.info("✅ 已登录状态")
+                return True
 
             logger.info("⚠️  未登录状态")
             return False
@@ -163,15 +176,16 @@ class LoginHandler:
             logger.error(f"❌ 检查登录状态失败: {e}")
             return False
 
+    @traced(cat="login")
     async def login_with_qr(self) -> bool:
         """执行扫码登录流程"""
-        print("\n" + "=" * 50)
-        print("🔐 启动扫码登录流程")
-        print("=" * 50)
+        echo("\n" + "=" * 50)
+        echo("🔐 启动扫码登录流程")
+        echo("=" * 50)
 
         try:
             # 1. 点击登录按钮
-            print("👆 第一步：点击登录按钮...")
+            echo("👆 第一步：点击登录按钮...")
             login_btn_selectors = [
                 ".beer-login-btn",
                 ".login-btn",
@@ -185,90 +199,90 @@ class LoginHandler:
                 element = await self.browser.find_element(selector)
                 if element and await element.is_visible():
                     await element.click()
-                    print(f"✅ 已点击登录按钮: {selector}")
+                    echo(f"✅ 已点击登录按钮: {selector}")
                     login_success = True
                     await asyncio.sleep(3)
                     break
 
             if not login_success:
-                print("❌ 未找到登录按钮")
+                echo("❌ 未找到登录按钮")
                 return False
 
-            # 截图确认
-            await self.browser.screenshot(path="/tmp/xhs_clicked_login.png")
-            print("📸 已截图确认登录按钮点击")
+            # 调试模式下截图确认
+            if await self.browser.debug_screenshot("clicked_login"):
+                echo("📸 已截图确认登录按钮点击")
 
             # 2. 等待登录对话框出现
-            print("⏳ 第二步：等待登录对话框...")
+            echo("⏳ 第二步：等待登录对话框...")
             await asyncio.sleep(2)
 
             # 3. 点击下拉框选择登录方式
-            print("👆 第三步：点击登录方式下拉框...")
+            echo("👆 第三步：点击登录方式下拉框...")
             dropdown_clicked = await self.click_login_type_dropdown()
 
             if not dropdown_clicked:
-                # 如果找不到下拉框，尝试截图分析
-                await self.browser.screenshot(path="/tmp/xhs_dialog.png")
-                print("⚠️  未找到下拉框，已截图请查看")
-                print("💡 请在浏览器中手动选择扫码登录")
+                # 如果找不到下拉框，调试模式下截图分析
+                shot = await self.browser.debug_screenshot("login_dialog")
+                echo(f"⚠️  未找到下拉框{'，已截图请查看: ' + shot if shot else ''}")
+                echo("💡 请在浏览器中手动选择扫码登录")
 
             # 4. 选择扫码登录
-            print("👆 第四步：选择扫码登录...")
+            echo("👆 第四步：选择扫码登录...")
             qr_selected = await self.select_qr_login()
 
             if not qr_selected:
-                print("⚠️  自动选择扫码登录失败")
-                print("💡 请在浏览器中手动选择扫码登录")
-                await self.browser.screenshot(path="/tmp/xhs_select_type.png")
+                echo("⚠️  自动选择扫码登录失败")
+                echo("💡 请在浏览器中手动选择扫码登录")
+                await self.browser.debug_screenshot("select_login_type")
                 # 等待用户手动选择
-                print("\n⏳ 请在浏览器中选择扫码登录，选择好后按Enter继续...")
-                input()
+                echo("\n⏳ 请在浏览器中选择扫码登录，选择好后按Enter继续...")
+                prompt()
 
             # 5. 等待二维码出现
-            print("⏳ 第五步：等待二维码出现...")
+            echo("⏳ 第五步：等待二维码出现...")
             await asyncio.sleep(2)
 
             # 6. 获取并显示二维码
-            print("📱 第六步：获取二维码...")
+            echo("📱 第六步：获取二维码...")
             qr_success = await self.capture_and_display_qr()
 
             if not qr_success:
-                print("❌ 获取二维码失败")
-                await self.browser.screenshot(path="/tmp/xhs_no_qr.png")
-                print("💡 请查看截图，确认页面状态")
+                echo("❌ 获取二维码失败")
+                if await self.browser.debug_screenshot("no_qr"):
+                    echo("💡 请查看截图，确认页面状态")
 
             # 7. 等待用户扫码
-            print("\n⏳ 请使用小红书APP扫码登录...")
-            print("⏱️  二维码有效期为2分钟，请尽快扫码")
-            print("-" * 50)
+            echo("\n⏳ 请使用小红书APP扫码登录...")
+            echo("⏱️  二维码有效期为2分钟，请尽快扫码")
+            echo("-" * 50)
 
             # 8. 轮询检测登录状态
             login_success = await self.wait_for_login(timeout=120)
 
             if login_success:
-                print("\n" + "=" * 50)
-                print("✅ 登录成功！欢迎回来~")
-                print("=" * 50 + "\n")
+                echo("\n" + "=" * 50)
+                echo("✅ 登录成功！欢迎回来~")
+                echo("=" * 50 + "\n")
                 return True
             else:
-                print("\n❌ 登录超时，请重新尝试")
+                echo("\n❌ 登录超时，请重新尝试")
                 return False
 
         except Exception as e:
-            logger.error(f"❌ 扫码登录失败: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception(f"❌ 扫码登录失败: {e}")
             return False
 
+    @traced(cat="login")
     async def click_login_type_dropdown(self) -> bool:
         """点击登录方式下拉框"""
         try:
-            print("   查找登录方式下拉框...")
+            echo("   查找登录方式下拉框...")
+            label = self.config["labels"]["login_type_dropdown"]
 
-            # 查找包含"请选择选项"的元素（这是下拉框）
+            # 查找包含下拉框占位文本（"请选择选项"）的元素
             dropdown_selectors = [
-                'input[placeholder="请选择选项"]',
-                '.el-select:has-text("请选择选项")',
+                f'input[placeholder="{label}"]',
+                f'.el-select:has-text("{label}")',
                 '[class*="login-type"] input',
                 '.login-type-select input',
             ]
@@ -276,135 +290,79 @@ class LoginHandler:
             for selector in dropdown_selectors:
                 element = await self.browser.find_element(selector)
                 if element and await element.is_visible():
-                    print(f"   ✅ 找到下拉框: {selector}")
+                    echo(f"   ✅ 找到下拉框: {selector}")
                     await element.click()
                     await asyncio.sleep(1)
                     return True
 
             # 如果找不到，尝试查找下拉框容器
-            print("   🔍 尝试查找下拉框容器...")
-            containers = await self.browser.page.evaluate("""
-                () => {
-                    const all = document.querySelectorAll('*');
-                    const found = [];
-                    for (let el of all) {
-                        if (el.textContent && el.textContent.includes('请选择选项') && el.offsetParent !== null) {
-                            found.push({
-                                tag: el.tagName,
-                                class: el.className,
-                                text: el.textContent.substring(0, 100)
-                            });
-                        }
-                    }
-                    return found.slice(0, 5);
-                }
-            """)
+            echo("   🔍 尝试查找下拉框容器...")
+            containers = await self.browser.find_by_text(label)
 
             if containers:
-                print(f"   📍 找到包含'请选择选项'的元素:")
+                echo(f"   📍 找到包含'{label}'的元素:")
                 for item in containers:
-                    print(f"      <{item['tag']}> class='{item['class']}'")
-
-                # 点击找到的元素
-                if containers[0]:
-                    tag = containers[0]['tag'].lower()
-                    if tag == 'div' or tag == 'span':
-                        js_click = f"""
-                            () => {{
-                                const elements = document.querySelectorAll('{tag}');
-                                for (let el of elements) {{
-                                    if (el.textContent && el.textContent.includes('请选择选项')) {{
-                                        el.click();
-                                        return true;
-                                    }}
-                                }}
-                                return false;
-                            }}
-                        """
-                        clicked = await self.browser.page.evaluate(js_click)
-                        if clicked:
-                            print("   ✅ 已点击下拉框")
-                            await asyncio.sleep(1)
-                            return True
-
-            print("   ⚠️  未找到下拉框")
+                    echo(f"      <{item['tag']}> class='{item['class']}'")
+
+                # 通过文本索引点击最近的可交互元素
+                clicked = await self.browser.click_text(label)
+                if clicked:
+                    echo("   ✅ 已点击下拉框")
+                    await asyncio.sleep(1)
+                    return True
+
+            echo("   ⚠️  未找到下拉框")
             return False
 
         except Exception as e:
             logger.error(f"❌ 点击下拉框失败: {e}")
             return False
 
+    @traced(cat="login")
     async def select_qr_login(self) -> bool:
         """选择扫码登录选项"""
         try:
-            print("   查找扫码登录选项...")
+            echo("   查找扫码登录选项...")
+
+            label = self.config["labels"]["qr_login"]
 
             # 等待下拉选项出现
             await asyncio.sleep(1)
 
             # 查找包含"扫码登录"的选项
             qr_selectors = [
-                'li:has-text("扫码登录")',
+                f'li:has-text("{label}")',
                 '[class*="qrcode"]',
                 '.login-type-qrcode',
-                'text=扫码登录',
+                f"text={label}",
             ]
 
             for selector in qr_selectors:
                 element = await self.browser.find_element(selector)
                 if element and await element.is_visible():
-                    print(f"   ✅ 找到扫码登录选项: {selector}")
+                    echo(f"   ✅ 找到扫码登录选项: {selector}")
                     await element.click()
                     await asyncio.sleep(2)
-                    print("   ✅ 已选择扫码登录")
+                    echo("   ✅ 已选择扫码登录")
                     return True
 
             # 如果找不到，尝试JavaScript查找
-            print("   🔍 尝试JavaScript查找...")
-            options = await self.browser.page.evaluate("""
-                () => {
-                    const all = document.querySelectorAll('li, div, span');
-                    const found = [];
-                    for (let el of all) {
-                        if (el.textContent && el.textContent.includes('扫码登录') && el.offsetParent !== null) {
-                            found.push({
-                                tag: el.tagName,
-                                class: el.className,
-                                text: el.textContent.substring(0, 50)
-                            });
-                        }
-                    }
-                    return found.slice(0, 5);
-                }
-            """)
+            echo("   🔍 尝试JavaScript查找...")
+            options = await self.browser.find_by_text(label)
 
             if options:
-                print(f"   📍 找到扫码登录选项:")
+                echo(f"   📍 找到扫码登录选项:")
                 for item in options:
-                    print(f"      <{item['tag']}> class='{item['class']}' text='{item['text']}'")
-
-                # 点击找到的元素
-                if options[0]:
-                    tag = options[0]['tag'].lower()
-                    js_click = f"""
-                        () => {{
-                            const elements = document.querySelectorAll('{tag}');
-                            for (let el of elements) {{
-                                if (el.textContent && el.textContent.includes('扫码登录')) {{
-                                    el.click();
-                                    return true;
-                                }}
-                            }}
-                            return false;
-                        }}
-                    """
-                    clicked = await self.browser.page.evaluate(js_click)
-                    if clicked:
-                        print("   ✅ 已点击扫码登录")
-                        await asyncio.sleep(2)
-                        return True
-
-            print("   ⚠️  未找到扫码登录选项")
+                    echo(f"      <{item['tag']}> class='{item['class']}' text='{item['text']}'")
+
+                # 通过文本索引点击最近的可交互元素
+                clicked = await self.browser.click_text(label)
+                if clicked:
+                    echo("   ✅ 已点击扫码登录")
+                    await asyncio.sleep(2)
+                    return True
+
+            echo("   ⚠️  未找到扫码登录选项")
             return False
 
         except Exception as e:
@@ -415,60 +373,8 @@ class LoginHandler:
         """切换到扫码登录模式（兼容旧版本）"""
         # 新版本已经在login_with_qr中实现了
         return await self.select_qr_login()
-            else:
-                print("\n❌ 登录超时，请重新尝试")
-                return False
-
-        except Exception as e:
-            logger.error(f"❌ 扫码登录失败: {e}")
-            return False
-
-    async def switch_to_qr_mode(self) -> bool:
-        """切换到扫码登录模式"""
-        print("📱 尝试切换到扫码登录模式...")
-        try:
-            # 先点击"请选择选项"下拉框
-            dropdown_selectors = [
-                '.el-select:has-text("请选择选项")',
-                '[class*="login-type"]',
-                ".login-type-selector",
-                ".css-1ic7y4p",  # 下拉框常见class
-            ]
-
-            for selector in dropdown_selectors:
-                element = await self.browser.find_element(selector)
-                if element and await element.is_visible():
-                    print(f"👆 点击登录方式下拉框: {selector}")
-                    await element.click()
-                    await asyncio.sleep(1)
-                    break
-
-            # 选择扫码登录选项
-            qr_option_selectors = [
-                'li:has-text("扫码登录")',
-                '[class*="qrcode"]',
-                ".login-type-qrcode",
-                ".css-qrcode-option",
-                'xpath=//li[contains(text(),"扫码")]',
-            ]
-
-            for selector in qr_option_selectors:
-                element = await self.browser.find_element(selector)
-                if element and await element.is_visible():
-                    print(f"👆 选择扫码登录选项: {selector}")
-                    await element.click()
-                    await asyncio.sleep(2)
-                    print("✅ 已切换到扫码登录模式")
-                    return True
-
-            # 如果找不到切换选项，可能已经是扫码模式
-            print("ℹ️  已在扫码登录模式或无法找到切换选项")
-            return True
-
-        except Exception as e:
-            logger.warning(f"⚠️  切换到扫码模式时出错: {e}")
-            return True
 
+    @traced(cat="login")
     async def capture_and_display_qr(self) -> bool:
         """捕获并显示二维码"""
         try:
@@ -491,13 +397,13 @@ class LoginHandler:
             if qr_element:
                 # 保存二维码
                 await qr_element.screenshot(path=str(self.qr_code_path))
-                print(f"📸 二维码已保存: {self.qr_code_path}")
+                echo(f"📸 二维码已保存: {self.qr_code_path}")
 
                 # 显示二维码窗口
                 self.show_qr_window(str(self.qr_code_path))
                 return True
 
-            print("❌ 未找到二维码元素")
+            echo("❌ 未找到二维码元素")
             return False
 
         except Exception as e:
@@ -586,14 +492,16 @@ class LoginHandler:
             except:
                 pass
 
+    @traced(cat="login")
     async def wait_for_login(self, timeout: int = 120) -> bool:
         """等待登录成功"""
         check_interval = 3  # 每3秒检查一次
-        elapsed = 0
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
 
-        while elapsed < timeout:
+        while loop.time() < deadline:
             try:
-                # 检查是否有登录成功的元素
+                # 检查是否有登录成功的元素（等待本身即为检查间隔）
                 success_selectors = [
                     ".user-avatar",
                     ".user-name",
@@ -602,68 +510,66 @@ class LoginHandler:
                     ".user-avatar img",
                 ]
 
-                for selector in success_selectors:
-                    element = await self.browser.find_element(selector)
-                    if element and await element.is_visible():
-                        self.update_qr_status("✅ 登录成功！", "#52C41A")
-                        self.close_qr_window()
-                        return True
+                if await self.browser.find_first(
+                    success_selectors, timeout=check_interval * 1000
+                ):
+                    self.update_qr_status("✅ 登录成功！", "#52C41A")
+                    self.close_qr_window()
+                    return True
 
                 # 检查是否有错误提示
                 error_selectors = [".qrcode-error", '[class*="error"]']
 
-                for selector in error_selectors:
-                    element = await self.browser.find_element(selector)
-                    if element and await element.is_visible():
-                        error_text = await element.text_content()
-                        if error_text:
-                            print(f"⚠️  二维码状态: {error_text}")
+                found = await self.browser.find_first(error_selectors, timeout=100)
+                if found:
+                    error_text = await found[0].text_content()
+                    if error_text:
+                        echo(f"⚠️  二维码状态: {error_text}")
 
                 # 更新等待状态
-                remaining = timeout - elapsed
+                remaining = int(deadline - loop.time())
                 if remaining % 10 == 0 and remaining > 0:
-                    print(f"⏳ 等待扫码... ({remaining}秒后超时)")
+                    echo(f"⏳ 等待扫码... ({remaining}秒后超时)")
 
                 self.update_qr_status(f"等待扫码... {remaining}秒")
 
-                await asyncio.sleep(check_interval)
-                elapsed += check_interval
-
             except Exception as e:
                 logger.warning(f"⚠️  检查登录状态时出错: {e}")
                 await asyncio.sleep(check_interval)
-                elapsed += check_interval
 
         # 超时
         self.update_qr_status("❌ 二维码已过期", "#FF4D4F")
         return False
 
+    @traced(cat="login")
     async def handle_login(self) -> bool:
         """处理登录流程（优先Cookie + 扫码登录）"""
-        print("\n" + "=" * 50)
-        print("🔐 开始登录流程")
-        print("=" * 50)
+        echo("\n" + "=" * 50)
+        echo("🔐 开始登录流程")
+        echo("=" * 50)
 
         # 方法1: 尝试使用保存的Cookie登录
         if self.is_cookies_valid():
-            print("\n📂 尝试使用保存的Cookie登录...")
+            echo("\n📂 尝试使用保存的Cookie登录...")
             await self.load_cookies_to_browser()
-            await self.browser.navigate(self.config["platform"]["creator_url"])
-            await asyncio.sleep(2)
 
+            # check_login_status 会打开创作首页，这里无需重复导航
             if await self.check_login_status():
-                print("✅ Cookie登录成功！欢迎回来~")
+                echo("✅ Cookie登录成功！欢迎回来~")
                 return True
             else:
-                print("⚠️  Cookie已过期，需要重新登录")
+                echo("⚠️  Cookie已过期，需要重新登录")
 
-        # 方法2: 扫码登录
+        # 方法2: 扫码登录（确保当前在登录页）
+        if not self.is_login_redirect(self.browser.page.url):
+            await self.browser.navigate(self.config["platform"]["login_url"])
         login_success = await self.login_with_qr()
+        metrics.LOGIN_REFRESHES.inc(result="success" if login_success else "failure")
 
         if login_success:
             # 登录成功后保存cookies
-            print("💾 正在保存登录状态...")
+            echo("💾 正在保存登录状态...")
             await self.save_browser_cookies()
-            print("✅ 登录状态已保存，下次无需扫码")
+            echo("✅ 登录状态已保存，下次无需扫码")
 
         return login_success
@@ -0,0 +1,215 @@
+"""
+页面辅助函数库 - 每个浏览器上下文注入一次，之后通过 window.__xhs 调用
+避免每次 evaluate 都发送并重新解析整段脚本、全量扫描 document.querySelectorAll('*')
+"""
+
+from playwright.async_api import BrowserContext
+
+# 通过 TreeWalker 只遍历文本节点，命中的是文本所在的最内层元素而不是外层容器
+PAGE_HELPERS_SCRIPT = """
+(() => {
+    if (window.__xhs) return;
+
+    const FIELD_SELECTOR = 'input, textarea, select, [contenteditable="true"]';
+
+    function isVisible(el) {
+        if (!el || !el.isConnected) return false;
+        if (el.offsetParent !== null) return true;
+        const style = getComputedStyle(el);
+        return style.position === 'fixed' && style.display !== 'none' && style.visibility !== 'hidden';
+    }
+
+    function matches(value, text, exact) {
+        const v = (value || '').trim();
+        return exact ? v === text : v.includes(text);
+    }
+
+    function findByText(text, opts = {}) {
+        const { exact = false, visible = true, limit = 0, root = document.body } = opts;
+        const found = [];
+        if (!root) return found;
+        const walker = document.createTreeWalker(root, NodeFilter.SHOW_TEXT, {
+            acceptNode: (node) => matches(node.nodeValue, text, exact)
+                ? NodeFilter.FILTER_ACCEPT : NodeFilter.FILTER_SKIP,
+        });
+        let node;
+        while ((node = walker.nextNode())) {
+            const el = node.parentElement;
+            if (!el || found.includes(el)) continue;
+            if (visible && !isVisible(el)) continue;
+            found.push(el);
+            if (limit && found.length >= limit) break;
+        }
+        return found;
+    }
+
+    function queryVisible(selector, root = document) {
+        return Array.from(root.querySelectorAll(selector)).filter(isVisible);
+    }
+
+    function fieldHint(el) {
+        return [
+            el.getAttribute('placeholder'),
+            el.getAttribute('aria-label'),
+            el.getAttribute('data-placeholder'),
+            el.getAttribute('name'),
+        ].filter(Boolean).join(' ');
+    }
+
+    function locateField(keywords) {
+        const fields = queryVisible(FIELD_SELECTOR);
+        for (const keyword of [].concat(keywords)) {
+            const direct = fields.find((el) => fieldHint(el).includes(keyword));
+            if (direct) return direct;
+            for (const label of findByText(keyword)) {
+                const owner = label.closest('label');
+                if (owner && owner.control) return owner.control;
+                const box = label.closest('div, section, form');
+                const near = box && queryVisible(FIELD_SELECTOR, box)[0];
+                if (near) return near;
+            }
+        }
+        return null;
+    }
+
+    function describe(el) {
+        return {
+            tag: el.tagName,
+            class: typeof el.className === 'string' ? el.className : '',
+            text: (el.textContent || '').trim().substring(0, 100),
+        };
+    }
+
+    function formSnapshot() {
+        return queryVisible(FIELD_SELECTOR).map((el) => ({
+            ...describe(el),
+            type: el.getAttribute('type') || '',
+            hint: fieldHint(el),
+            value: 'value' in el ? el.value : (el.textContent || ''),
+        }));
+    }
+
+    // ---- 文本索引：可见文本 -> 最近的可交互祖先，MutationObserver 增量维护 ----
+    const INTERACTIVE = [
+        'a', 'button', 'input', 'select', 'textarea', 'label', 'li', 'summary',
+        '[onclick]', '[tabindex]', '[contenteditable="true"]',
+        '[role="button"]', '[role="link"]', '[role="tab"]', '[role="option"]',
+        '[role="menuitem"]', '[role="checkbox"]', '[role="radio"]', '[role="combobox"]',
+    ].join(', ');
+    const ROLE_SELECTORS = {
+        button: 'button, [role="button"], input[type="button"], input[type="submit"]',
+        link: 'a, [role="link"]',
+        tab: '[role="tab"]',
+        option: 'li, option, [role="option"]',
+        menuitem: '[role="menuitem"]',
+        checkbox: 'input[type="checkbox"], [role="checkbox"]',
+        textbox: 'input, textarea, [contenteditable="true"], [role="textbox"]',
+    };
+
+    const textIndex = new Map();
+    let indexed = false;
+
+    function normalize(value) {
+        return (value || '').replace(/\\s+/g, ' ').trim();
+    }
+
+    function indexNode(node) {
+        const key = normalize(node.nodeValue);
+        if (!key) return;
+        let nodes = textIndex.get(key);
+        if (!nodes) textIndex.set(key, (nodes = new Set()));
+        nodes.add(node);
+        node.__xhsKey = key;
+    }
+
+    function unindexNode(node) {
+        const key = node.__xhsKey;
+        if (key === undefined) return;
+        const nodes = textIndex.get(key);
+        if (nodes) {
+            nodes.delete(node);
+            if (!nodes.size) textIndex.delete(key);
+        }
+        delete node.__xhsKey;
+    }
+
+    function eachText(root, fn) {
+        if (root.nodeType === Node.TEXT_NODE) return fn(root);
+        if (root.nodeType !== Node.ELEMENT_NODE && root.nodeType !== Node.DOCUMENT_FRAGMENT_NODE) return;
+        const walker = document.createTreeWalker(root, NodeFilter.SHOW_TEXT);
+        let node;
+        while ((node = walker.nextNode())) fn(node);
+    }
+
+    const observer = new MutationObserver((records) => {
+        for (const record of records) {
+            if (record.type === 'characterData') {
+                unindexNode(record.target);
+                indexNode(record.target);
+                continue;
+            }
+            record.removedNodes.forEach((node) => eachText(node, unindexNode));
+            record.addedNodes.forEach((node) => eachText(node, indexNode));
+        }
+    });
+
+    function ensureIndex() {
+        if (indexed || !document.body) return;
+        eachText(document.body, indexNode);
+        observer.observe(document.body, { childList: true, subtree: true, characterData: true });
+        indexed = true;
+    }
+
+    function interactiveTarget(el, role) {
+        if (role) return el.closest(ROLE_SELECTORS[role] || `[role="${role}"]`);
+        return el.closest(INTERACTIVE) || el;
+    }
+
+    function pickTarget(nodes, role) {
+        for (const node of nodes) {
+            const el = node.parentElement;
+            if (!el || !isVisible(el)) continue;
+            const target = interactiveTarget(el, role);
+            if (target && isVisible(target)) return target;
+        }
+        return null;
+    }
+
+    function resolveText(label, role = null) {
+        ensureIndex();
+        const key = normalize(label);
+        const exact = textIndex.get(key);
+        const hit = exact && pickTarget(exact, role);
+        if (hit) return hit;
+        // 精确文本未命中时，退化为在索引键（而非整棵 DOM）中做包含匹配
+        for (const [text, nodes] of textIndex) {
+            if (text === key || !text.includes(key)) continue;
+            const target = pickTarget(nodes, role);
+            if (target) return target;
+        }
+        return null;
+    }
+
+    function clickText(label, role = null) {
+        const el = resolveText(label, role);
+        if (!el) return false;
+        el.click();
+        return true;
+    }
+
+    window.__xhs = {
+        isVisible, findByText, queryVisible, locateField, describe, formSnapshot,
+        resolveText, clickText,
+        describeByText: (text, opts) => findByText(text, opts).map(describe),
+        describeField: (keywords) => {
+            const el = locateField(keywords);
+            return el ? describe(el) : null;
+        },
+    };
+})();
+"""
+
+
+async def install_page_helpers(context: BrowserContext):
+    """向浏览器上下文注入辅助函数库（对之后打开的所有页面生效）"""
+    await context.add_init_script(PAGE_HELPERS_SCRIPT)
@@ -0,0 +1,148 @@
+"""
+发布页预热池 - 预先打开发布页面并保持就绪，任务到来时直接取用
+"""
+
+import asyncio
+import logging
+
+from playwright.async_api import Page
+
+from .routes import is_login_redirect, publish_route
+from ..utils.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+
+class PublishPagePool:
+    """发布页预热池
+
+    后台维护若干个已导航到发布页、已切到图文标签、上传输入框已挂载的页面。
+    每次 acquire() 立即交出一个就绪页面，并在后台补充新的页面，
+    稳定状态下任务开始到首次上传几乎无需等待。
+    """
+
+    def __init__(self, browser_controller, config: dict):
+        self.browser = browser_controller
+        self.config = config
+        options = config.get("prefetch", {})
+        self.size = options.get("size", 1)
+        self.retry_delay = options.get("retry_delay", 5)
+        self.max_retries = options.get("max_retries", 5)
+        self._ready: asyncio.Queue = asyncio.Queue()
+        self._tasks: set = set()
+        self._failures = 0  # 连续预热失败次数
+        self._closed = False
+        self._stopped = False  # 登录失效或连续失败过多，不再预热
+
+    async def start(self):
+        """启动预热，打开 size 个发布页面"""
+        logger.info(f"🔥 预热发布页面 x{self.size}")
+        for _ in range(self.size):
+            self._spawn()
+
+    def _spawn(self, delay: float = 0):
+        """在后台补充一个就绪页面"""
+        if self._closed or self._stopped:
+            return
+        task = asyncio.create_task(self._warm_page(delay))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    @traced(cat="prefetch")
+    async def _warm_page(self, delay: float = 0):
+        """打开发布页面并等待上传输入框就绪"""
+        if delay:
+            await asyncio.sleep(delay)
+
+        page = await self.browser.context.new_page()
+        try:
+            await page.goto(
+                publish_route(self.config, "image"),
+                wait_until="domcontentloaded",
+                timeout=self.config["timeouts"]["page_load"],
+            )
+            await self._select_image_tab(page)
+            await page.wait_for_selector(
+                self.config["selectors"]["image_input"],
+                state="attached",
+                timeout=self.config["timeouts"]["element_wait"],
+            )
+        except asyncio.CancelledError:
+            await page.close()
+            raise
+        except Exception as e:
+            redirected = is_login_redirect(self.config, page.url)
+            logger.warning(f"⚠️  预热发布页面失败: {e}")
+            await page.close()
+            self._retry(redirected)
+            return
+
+        if self._closed:
+            await page.close()
+            return
+
+        self._failures = 0
+        await self._ready.put(page)
+        logger.info(f"✅ 发布页面已就绪 (就绪数: {self._ready.qsize()})")
+
+    def _retry(self, redirected: bool):
+        """预热失败后按指数退避重试；被重定向到登录页或连续失败 max_retries 次后停止预热"""
+        self._failures += 1
+        if redirected:
+            logger.warning("⚠️  预热页面被重定向到登录页，停止预热")
+            self._stopped = True
+        elif self._failures > self.max_retries:
+            logger.warning(f"⚠️  预热连续失败 {self._failures} 次，停止预热")
+            self._stopped = True
+        else:
+            self._spawn(min(60, self.retry_delay * 2 ** (self._failures - 1)))
+
+    async def _select_image_tab(self, page: Page):
+        """切换到图文发布标签（标签不可见时跳过）"""
+        label = self.config.get("labels", {}).get("image_tab")
+        if not label:
+            return
+        try:
+            await page.evaluate("label => window.__xhs.clickText(label)", label)
+        except Exception as e:
+            logger.warning(f"⚠️  切换图文标签失败: {e}")
+
+    def _is_usable(self, page: Page) -> bool:
+        """检查预热页面是否仍可用（未关闭、未被重定向走）"""
+        return not page.is_closed() and "/publish" in page.url
+
+    @traced(cat="prefetch")
+    async def acquire(self, timeout: float = None) -> Page:
+        """取出一个就绪的发布页面，并在后台补充一个新页面"""
+        if timeout is None:
+            timeout = self.config["timeouts"]["page_load"] / 1000
+
+        while True:
+            if self._stopped and self._ready.empty():
+                # 不再预热，调用方改为直接打开发布页
+                raise asyncio.TimeoutError()
+            if self._ready.empty() and not self._tasks:
+                self._spawn()
+
+            page = await asyncio.wait_for(self._ready.get(), timeout)
+            self._spawn()
+
+            if self._is_usable(page):
+                return page
+
+            logger.warning(f"⚠️  预热页面已失效，丢弃: {page.url}")
+            if not page.is_closed():
+                await page.close()
+
+    async def close(self):
+        """停止预热并关闭所有未使用的页面"""
+        self._closed = True
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        # 等后台任务退出（各自关闭正在预热的页面），再关闭浏览器
+        await asyncio.gather(*tasks, return_exceptions=True)
+        while not self._ready.empty():
+            page = self._ready.get_nowait()
+            if not page.is_closed():
+                await page.close()
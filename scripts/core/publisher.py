@@ -7,21 +7,30 @@ import asyncio
 import argparse
 import sys
 import logging
+from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import Optional
 from datetime import datetime
 
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
 # 导入核心模块
 from .browser_controller import BrowserController
 from .login_handler import LoginHandler
 from .content_generator import ContentGenerator, GeneratedContent
+from .image_index import ImageHashIndex, image_hashes
+from . import ledger as publish_ledger
+from .text_index import TextSimilarityIndex
+from .page_pool import PublishPagePool
+from .routes import publish_route
+from .verifier import NoteStatusVerifier
+from .analytics import AnalyticsStore, AnalyticsSync
+from ..utils import event_log, metrics
+from ..utils.event_log import echo, prompt
+from ..utils.profiler import SamplingProfiler
+from ..utils.timing import StepTimer
+from ..utils.tracing import current_span, tracer, traced
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-)
 logger = logging.getLogger(__name__)
 
 
@@ -31,9 +40,29 @@ class XiaohongshuPublisher:
     def __init__(self, config_path: Optional[str] = None):
         self.config_path = config_path or self._find_config()
         self.config = self._load_config()
+        if not logging.getLogger().handlers:
+            # 调用方未配置日志时按配置初始化（异步写出，控制台渲染可关闭）
+            event_log.setup_logging(self.config.get("logging"))
+        self.account = self.config["platform"].get("account", "default")
         self.browser = BrowserController(self.config)
         self.login_handler = None
-        self.content_generator = ContentGenerator()
+        self.page_pool: Optional[PublishPagePool] = None
+        self.mock_site = None
+        self._owns_mock_site = False  # 外部传入的共享模拟站点（如基准）不由发布器停止
+        self.metrics_server = None
+        self.loop_lag_monitor = None
+        self.timer = StepTimer()
+        self.image_index = ImageHashIndex.from_config(self.config.get("dedup"))
+        self.text_index = TextSimilarityIndex.from_config(self.config.get("dedup"))
+        self.ledger = (
+            publish_ledger.PublishLedger.from_config(self.config.get("ledger"))
+            if self.config.get("ledger", {}).get("enabled", True)
+            else None
+        )
+        self.content_generator = ContentGenerator(
+            self.config.get("content"),
+            self.text_index if self.config.get("dedup", {}).get("enabled", True) else None,
+        )
 
     def _find_config(self) -> str:
         """查找配置文件"""
@@ -60,17 +89,112 @@ class XiaohongshuPublisher:
         with open(self.config_path, "r", encoding="utf-8") as f:
             return yaml.safe_load(f)
 
+    def _start_mock_site(self):
+        """启动本地模拟创作平台，并把 platform 地址指向它"""
+        from ..mock_site import MockCreatorSite
+
+        self.mock_site = MockCreatorSite.from_config(self.config["mock_site"]).start()
+        self._owns_mock_site = True
+        self.mock_site.point_config(self.config)
+
+    def _start_metrics(self):
+        """启动 Prometheus 指标端点和事件循环延迟监测"""
+        options = self.config.get("metrics", {})
+        self.metrics_server = metrics.MetricsServer.from_config(options).start()
+        self.loop_lag_monitor = metrics.LoopLagMonitor(
+            options.get("loop_lag_interval", 1.0)
+        ).start()
+
     async def initialize(self) -> bool:
         """初始化浏览器"""
-        success = await self.browser.init()
+        if self.config.get("mock_site", {}).get("enabled") and self.mock_site is None:
+            self._start_mock_site()
+        if self.config.get("metrics", {}).get("enabled") and self.metrics_server is None:
+            self._start_metrics()
+
+        with self.timer.step("launch"):
+            success = await self.browser.init()
         if success:
             self.login_handler = LoginHandler(self.browser, self.config)
         return success
 
-    async def ensure_login(self) -> bool:
-        """确保已登录"""
-        return await self.login_handler.handle_login()
+    async def ensure_login(self, prefetch: bool = True) -> bool:
+        """确保已登录（登录成功后按配置启动发布页预热；prefetch=False 时不打开发布页）"""
+        async with self._step("login_check"):
+            success = await self.login_handler.handle_login()
+        if success and prefetch and self.page_pool is None:
+            if self.config.get("prefetch", {}).get("enabled"):
+                self.page_pool = PublishPagePool(self.browser, self.config)
+                await self.page_pool.start()
+        return success
+
+    async def close(self):
+        """停止发布页预热并关闭浏览器，再停止本发布器启动的指标端点、延迟监测和模拟站点"""
+        if self.page_pool is not None:
+            await self.page_pool.close()
+            self.page_pool = None
+        await self.browser.close()
+        if self.loop_lag_monitor is not None:
+            self.loop_lag_monitor.stop()
+            self.loop_lag_monitor = None
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+            self.metrics_server = None
+        if self._owns_mock_site:
+            self.mock_site.stop()
+            self.mock_site = None
+            self._owns_mock_site = False
+
+    @asynccontextmanager
+    async def _step(self, name: str):
+        """流程步骤：计时，并在步骤边界切分失败现场的 trace 窗口"""
+        await self.browser.capture.step(name)
+        with self.timer.step(name):
+            yield
+
+    async def _open_publish_page(self, note_type: str = "image") -> bool:
+        """打开发布页面：图文优先用预热池，其次直达链接，被重定向到登录页时才走首页流程"""
+        if self.page_pool and note_type == "image":
+            try:
+                page = await self.page_pool.acquire()
+                await self.browser.use_page(page)
+                return True
+            except asyncio.TimeoutError:
+                logger.warning("⚠️  预热页面未就绪，改为直接打开发布页面")
+
+        await self.browser.navigate(publish_route(self.config, note_type))
+        if self.login_handler.is_login_redirect(self.browser.page.url):
+            logger.warning("⚠️  直达链接被重定向到登录页，改为从创作首页进入")
+            return await self._open_publish_from_home(note_type)
+
+        return await self._wait_upload_ready()
 
+    async def _open_publish_from_home(self, note_type: str = "image") -> bool:
+        """从创作首页点击"发布笔记"进入发布页面（图文笔记再切到图文标签）"""
+        await self.browser.navigate(self.config["platform"]["creator_url"])
+        if not await self.browser.click_text(self.config["labels"]["publish_entry"]):
+            logger.error("❌ 未找到发布笔记入口")
+            return False
+
+        if note_type == "image":
+            await self.browser.click_text(self.config["labels"]["image_tab"])
+
+        return await self._wait_upload_ready()
+
+    async def _wait_upload_ready(self) -> bool:
+        """等待上传输入框挂载，代替固定等待"""
+        try:
+            await self.browser.page.wait_for_selector(
+                self.config["selectors"]["image_input"],
+                state="attached",
+                timeout=self.config["timeouts"]["page_load"],
+            )
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️  发布页面上传框未就绪: {e}")
+            return False
+
+    @traced("publish_note", cat="job")
     async def publish_image_note(
         self,
         image_path: str,
@@ -78,6 +202,7 @@ class XiaohongshuPublisher:
         auto_generate: bool = True,
         preview: bool = True,
         confirm_before_publish: bool = True,
+        idempotency_key: str = None,
     ) -> dict:
         """
         发布图文笔记
@@ -88,111 +213,306 @@ class XiaohongshuPublisher:
             auto_generate: 是否自动生成内容
             preview: 是否预览生成的内容
             confirm_before_publish: 发布前是否需要确认
+            idempotency_key: 幂等键（可选，默认按账号 + 图片内容生成）
 
         Returns:
             dict: 发布结果
         """
+        job_id = event_log.bound("job_id") or event_log.new_job_id()
+        try:
+            current_span().args["job_id"] = job_id
+            with event_log.bind(job_id=job_id, account=self.account):
+                metrics.JOBS_STARTED.inc()
+                logger.info("任务开始", extra={"event": "job_started", "image": str(image_path)})
+                try:
+                    result = await self._publish_image_note(
+                        image_path, content, auto_generate, preview, confirm_before_publish, idempotency_key
+                    )
+                except Exception as e:
+                    metrics.JOBS_FAILED.inc(reason=type(e).__name__)
+                    logger.exception("任务异常", extra={"event": "job_failed", "error": str(e)})
+                    await self.browser.capture.on_failure(self.browser.page, type(e).__name__, job_id)
+                    raise
+
+                if result.get("success"):
+                    metrics.JOBS_SUCCEEDED.inc()
+                elif result.get("skipped"):
+                    metrics.JOBS_SKIPPED.inc(reason=result.get("error", "未知"))
+                elif result.get("canceled"):
+                    metrics.JOBS_FAILED.inc(reason="已取消")
+                else:
+                    reason = result.get("error", "未知")
+                    metrics.JOBS_FAILED.inc(reason=reason)
+                    artifact = await self.browser.capture.on_failure(self.browser.page, reason, job_id)
+                    if artifact:
+                        result["artifact"] = str(artifact)
+                result["job_id"] = job_id
+                result["timings"] = dict(self.timer.durations)
+                logger.info(
+                    "任务结束",
+                    extra={
+                        "event": "job_finished",
+                        "success": bool(result.get("success")),
+                        "error": result.get("error"),
+                        "artifact": result.get("artifact"),
+                        "timings": result["timings"],
+                    },
+                )
+                return result
+        finally:
+            # 每个任务只统计自身的步骤（含任务开始前本任务的启动/登录），结束后清零，
+            # 同一发布器连续发布时耗时不会累加到后面的任务
+            self.timer.reset()
+
+    async def _publish_image_note(
+        self,
+        image_path: str,
+        content: GeneratedContent,
+        auto_generate: bool,
+        preview: bool,
+        confirm_before_publish: bool,
+        idempotency_key: str = None,
+    ) -> dict:
         image_path = Path(image_path)
 
         if not image_path.exists():
             raise FileNotFoundError(f"图片不存在: {image_path}")
 
-        print(f"\n🖼️  准备发布图片: {image_path.name}")
-        print(f"📁 完整路径: {image_path.absolute()}")
+        echo(f"\n🖼️  准备发布图片: {image_path.name}")
+        echo(f"📁 完整路径: {image_path.absolute()}")
+
+        # 1. 幂等检查：同一幂等键已发布或上次提交结果未知时不再发布
+        ledger_key = self._ledger_key(image_path, idempotency_key)
+        if self.ledger is not None:
+            # 被拒的笔记要等生成文案后才知道是否改过稿，由点击前的 claim 判断
+            entry = self.ledger.latest(ledger_key)
+            if entry and entry["state"] in publish_ledger.BLOCKING_STATES:
+                return self._ledger_skip(entry)
+
+        # 2. 查重：同一张图换了文件名或重新压缩后再次排队时，不再走浏览器流程
+        hashes, duplicate = self._find_duplicate_image(image_path)
+        if duplicate:
+            echo(
+                f"⏭️  这张图片已发布过（{duplicate.get('time')}，{Path(duplicate.get('path', '')).name}，"
+                f"距离 {duplicate['distance']}），跳过"
+            )
+            return {"success": False, "skipped": True, "error": "重复图片", "duplicate": duplicate}
 
-        # 1. 生成内容
+        # 3. 生成内容
         if auto_generate:
-            print("\n🤖 正在AI生成内容...")
-            content = self.content_generator.generate_full_content(image_path)
+            echo("\n🤖 正在AI生成内容...")
+            with tracer.span("generate_content"):
+                content = self.content_generator.generate_full_content(image_path)
 
             if preview:
-                print(self.content_generator.preview_content(content))
+                echo(self.content_generator.preview_content(content))
 
             if confirm_before_publish:
-                print("\n" + "=" * 50)
-                confirm = input("以上内容是否满意？(y/n/q=退出): ").strip().lower()
+                echo("\n" + "=" * 50)
+                with tracer.span("confirm_content", "user"):
+                    confirm = prompt("以上内容是否满意？(y/n/q=退出): ").strip().lower()
                 if confirm == "q":
-                    print("👋 已取消发布")
+                    echo("👋 已取消发布")
                     return {"success": False, "canceled": True}
                 elif confirm == "n":
-                    print("\n📝 请手动修改或重新生成内容...")
+                    echo("\n📝 请手动修改或重新生成内容...")
                     # 这里可以实现手动输入逻辑
                     content = await self.manual_input_content()
         else:
             if content is None:
                 content = await self.manual_input_content()
 
-        # 2. 进入发布页面
-        print("\n🌐 正在打开发布页面...")
-        await self.browser.navigate(self.config["platform"]["publish_url"])
-        await asyncio.sleep(3)
-
-        # 3. 上传图片
-        print("📤 正在上传图片...")
-        upload_success = await self._upload_image(str(image_path.absolute()))
+        # 4. 进入发布页面
+        echo("\n🌐 正在打开发布页面...")
+        async with self._step("navigation"):
+            opened = await self._open_publish_page("image")
+        if not opened:
+            echo("⚠️  发布页面未就绪，继续尝试上传...")
+
+        # 5. 上传图片
+        echo("📤 正在上传图片...")
+        async with self._step("upload"):
+            upload_success = await self._upload_image(str(image_path.absolute()))
         if not upload_success:
-            print("❌ 图片上传失败")
-            return {"success": False, "error": "图片上传失败"}
-
-        print("✅ 图片上传完成")
-
-        # 4. 填写标题
-        print("📝 正在填写标题...")
-        await self._fill_title(content.title)
-
-        # 5. 填写正文
-        print("📝 正在填写正文...")
-        await self._fill_content(content.content)
-
-        # 6. 添加标签
-        print("🏷️  正在添加标签...")
-        for tag in content.tags:
-            await self._add_tag(tag)
-            await asyncio.sleep(0.3)
-
-        print("\n" + "=" * 50)
-        print("✅ 所有内容填写完成")
-        print("=" * 50)
-
-        # 7. 发布
+            echo("❌ 图片上传失败")
+            return {"success": False, "error": self._failure_reason("图片上传失败")}
+
+        echo("✅ 图片上传完成")
+
+        if self.login_handler.is_login_redirect(self.browser.page.url):
+            echo("❌ 登录已过期")
+            return {"success": False, "error": "登录已过期"}
+
+        # 6. 填写标题
+        echo("📝 正在填写标题...")
+        async with self._step("title"):
+            await self._fill_title(content.title)
+
+        # 7. 填写正文
+        echo("📝 正在填写正文...")
+        async with self._step("body"):
+            await self._fill_content(content.content)
+
+        # 8. 添加标签
+        echo("🏷️  正在添加标签...")
+        async with self._step("tags"):
+            for tag in content.tags:
+                if not await self._add_tag(tag):
+                    # 标签输入框不存在时后续标签同样会失败，不再逐个等待超时
+                    echo("⚠️  未找到标签输入框，跳过剩余标签")
+                    break
+                await asyncio.sleep(0.3)
+
+        echo("\n" + "=" * 50)
+        echo("✅ 所有内容填写完成")
+        echo("=" * 50)
+
+        # 9. 发布
         if confirm_before_publish:
-            print("\n🎯 请在浏览器中确认内容无误，然后:")
-            print("   - 点击'发布'按钮")
-            print("   - 或输入'p'直接发布")
-            print("   - 输入'n'重新编辑")
-            print("   - 输入'q'取消发布")
+            echo("\n🎯 请在浏览器中确认内容无误，然后:")
+            echo("   - 点击'发布'按钮")
+            echo("   - 或输入'p'直接发布")
+            echo("   - 输入'n'重新编辑")
+            echo("   - 输入'q'取消发布")
 
-            user_input = input("\n请选择操作 (p/n/q): ").strip().lower()
+            with tracer.span("confirm_publish", "user"):
+                user_input = prompt("\n请选择操作 (p/n/q): ").strip().lower()
 
             if user_input == "q":
-                print("👋 已取消发布")
+                echo("👋 已取消发布")
                 return {"success": False, "canceled": True}
             elif user_input == "n":
-                print("📝 请在浏览器中手动编辑内容...")
-                input("编辑完成后按Enter继续...")
+                echo("📝 请在浏览器中手动编辑内容...")
+                prompt("编辑完成后按Enter继续...")
             else:
                 # 默认直接发布
                 pass
 
-        # 执行发布
-        publish_success = await self._click_publish()
-
-        if publish_success:
-            print("\n" + "🎉" * 20)
-            print("✅ 发布成功！🎉")
-            print("🎉" * 20 + "\n")
+        # 执行发布：点击前在账本中原子地占用幂等键，点击后记录结果
+        if self.ledger is not None:
+            conflict = self.ledger.claim(
+                ledger_key,
+                job_id=event_log.bound("job_id"),
+                account=self.account,
+                content_hash=publish_ledger.content_digest(content.title, content.content, content.tags),
+                image_phash=f"{hashes[0]:016x}" if hashes else None,
+                image_dhash=f"{hashes[1]:016x}" if hashes else None,
+                title=content.title,
+            )
+            if conflict:
+                return self._ledger_skip(conflict)
+
+        async with self._step("publish_click"):
+            outcome = await self._click_publish()
+
+        error = None if outcome["success"] else self._publish_error(outcome)
+        if self.ledger is not None:
+            if outcome["success"]:
+                self.ledger.record(ledger_key, publish_ledger.PUBLISHED, note_id=outcome["note_id"])
+            elif outcome["clicked"] and not outcome["confirmed"]:
+                # 结果未知：保持 submitting，避免重试时重复发布
+                logger.warning("⚠️  发布结果未确认，账本保持 submitting 状态")
+            else:
+                detail = f"{error} (HTTP {outcome['status']}, code={outcome['code']}, msg={outcome['msg']})"
+                self.ledger.record(ledger_key, publish_ledger.FAILED, error=detail)
+
+        if outcome["success"]:
+            if hashes is not None:
+                self.image_index.add(
+                    hashes,
+                    path=str(image_path.absolute()),
+                    title=content.title,
+                    job_id=event_log.bound("job_id"),
+                    account=self.account,
+                )
+            if self.content_generator.text_index is not None:
+                self.text_index.add(
+                    content.title,
+                    content.content,
+                    job_id=event_log.bound("job_id"),
+                    account=self.account,
+                )
+
+            echo("\n" + "🎉" * 20)
+            echo("✅ 发布成功！🎉")
+            echo("🎉" * 20 + "\n")
 
             return {
                 "success": True,
                 "title": content.title,
                 "content": content.content[:100] + "...",
                 "tags": content.tags,
+                "note_id": outcome["note_id"],
+                "idempotency_key": ledger_key,
                 "publish_time": datetime.now().isoformat(),
+                "timings": dict(self.timer.durations),
             }
         else:
-            print("\n❌ 发布失败，请手动检查浏览器中的内容")
-            return {"success": False, "error": "发布失败"}
+            if outcome["confirmed"]:
+                echo(f"\n❌ 发布失败: {outcome['msg'] or error}（code={outcome['code']}）")
+            else:
+                echo("\n❌ 发布失败，请手动检查浏览器中的内容")
+            return {
+                "success": False,
+                "error": error,
+                "status": outcome["status"],
+                "code": outcome["code"],
+                "msg": outcome["msg"],
+                "idempotency_key": ledger_key,
+            }
 
+    def _publish_error(self, outcome: dict) -> str:
+        """发布失败的原因（平台返回的错误码和信息单独放在结果里）"""
+        if outcome["status"] in (401, 403):
+            return "登录已过期"
+        if outcome["confirmed"]:
+            return "发布被拒绝"
+        if outcome["clicked"]:
+            return "发布结果未确认"
+        return self._failure_reason("发布失败")
+
+    def _ledger_key(self, image_path: Path, idempotency_key: str = None) -> str:
+        """本次发布的幂等键：显式给出的键，否则按账号 + 图片内容（与是否查重无关，重启后不变）"""
+        if idempotency_key:
+            return idempotency_key
+        return publish_ledger.idempotency_key(self.account, publish_ledger.file_digest(image_path))
+
+    def _ledger_skip(self, entry: dict) -> dict:
+        """账本中已有阻止发布的记录时的结果"""
+        if entry["state"] == publish_ledger.SUBMITTING:
+            echo(f"⏭️  上次发布已提交但结果未确认（{entry['recorded_at']}，任务 {entry.get('job_id')}），跳过")
+            error = "发布结果未确认"
+        elif entry["state"] == publish_ledger.REJECTED:
+            echo(f"⏭️  笔记 {entry.get('note_id') or '未知'} 审核未通过且文案未修改，跳过")
+            error = "审核未通过"
+        else:
+            echo(
+                f"⏭️  已发布过（笔记 {entry.get('note_id') or '未知'}，{entry['state']}，{entry['recorded_at']}，"
+                f"任务 {entry.get('job_id')}），跳过"
+            )
+            error = "已发布"
+        return {"success": False, "skipped": True, "error": error, "ledger": entry}
+
+    def _find_duplicate_image(self, image_path: Path) -> tuple:
+        """计算图片的感知哈希并在已发布索引中查找，返回 (哈希, 最相近的已发布图片或 None)"""
+        if not self.config.get("dedup", {}).get("enabled", True):
+            return None, None
+        with tracer.span("dedup_image"):
+            try:
+                hashes = image_hashes(image_path)
+            except Exception as e:
+                logger.warning(f"⚠️  计算图片哈希失败，跳过查重: {e}")
+                return None, None
+            matches = self.image_index.find(hashes)
+        return hashes, matches[0] if matches else None
+
+    def _failure_reason(self, default: str) -> str:
+        """失败原因：页面已被重定向到登录页时报告登录失效"""
+        if self.login_handler.is_login_redirect(self.browser.page.url):
+            return "登录已过期"
+        return default
+
+    @traced(cat="publish")
     async def _upload_image(self, image_path: str) -> bool:
         """上传图片"""
         try:
@@ -204,13 +524,11 @@ class XiaohongshuPublisher:
                 '[class*="upload"] input[type="file"]',
             ]
 
-            for selector in file_input_selectors:
-                element = await self.browser.find_element(selector)
-                if element and await element.is_visible():
-                    await element.set_input_files(image_path)
-                    print(f"   已找到上传元素: {selector}")
-                    await asyncio.sleep(3)  # 等待上传
-                    return True
+            found = await self.browser.find_first(file_input_selectors, field="image_input")
+            if found:
+                element, selector = found
+                echo(f"   已找到上传元素: {selector}")
+                return await self._set_files_and_wait(element, image_path)
 
             # 如果找不到上传框，尝试点击上传区域
             upload_selectors = [
@@ -220,43 +538,74 @@ class XiaohongshuPublisher:
                 ".add-note-btn",
             ]
 
-            for selector in upload_selectors:
-                element = await self.browser.find_element(selector)
-                if element and await element.is_visible():
-                    await element.click()
-                    await asyncio.sleep(2)
-                    # 尝试再次上传
-                    for file_selector in file_input_selectors:
-                        file_element = await self.browser.find_element(file_selector)
-                        if file_element:
-                            await file_element.set_input_files(image_path)
-                            await asyncio.sleep(3)
-                            return True
-
-            print("⚠️  未找到上传元素，请手动上传")
+            found = await self.browser.find_first(upload_selectors, field="upload_area")
+            if found:
+                await found[0].click()
+                await asyncio.sleep(2)
+                # 尝试再次上传
+                found = await self.browser.find_first(
+                    file_input_selectors, state="attached", field="image_input"
+                )
+                if found:
+                    return await self._set_files_and_wait(found[0], image_path)
+
+            echo("⚠️  未找到上传元素，请手动上传")
             return False
 
         except Exception as e:
             logger.error(f"❌ 上传图片失败: {e}")
             return False
 
+    async def _set_files_and_wait(self, element, image_path: str) -> bool:
+        """选择文件并等待上传接口返回；服务端错误时重试，登录失效时立即失败"""
+        retries = self.config["settings"].get("upload_retries", 2)
+        size = Path(image_path).stat().st_size
+        for attempt in range(retries + 1):
+            with metrics.UPLOAD_SECONDS.time():
+                status = await self._set_files_with_response(element, image_path, attempt)
+            metrics.UPLOAD_BYTES.inc(size)
+            if status is None or status < 400:
+                return True
+            if status in (401, 403):
+                logger.error(f"❌ 上传被拒绝 (HTTP {status})，登录状态可能已失效")
+                return False
+            logger.warning(f"⚠️  上传失败 (HTTP {status})，重试 {attempt + 1}/{retries}")
+        return False
+
+    @traced("upload_request")
+    async def _set_files_with_response(self, element, image_path: str, attempt: int = 0):
+        """选择文件，返回上传接口的 HTTP 状态码（未观察到上传请求时返回 None）"""
+        pattern = self.config.get("api", {}).get("upload", "upload")
+        span = current_span()
+        span.args.update(bytes=Path(image_path).stat().st_size, attempt=attempt, status=None)
+        try:
+            async with self.browser.page.expect_response(
+                lambda r: pattern in r.url and r.request.method in ("POST", "PUT"),
+                timeout=self.config["timeouts"]["upload_wait"],
+            ) as response_info:
+                await element.set_input_files(image_path)
+            response = await response_info.value
+            span.args["status"] = response.status
+            return response.status
+        except PlaywrightTimeoutError:
+            logger.warning("⚠️  未观察到上传请求，按已上传处理")
+            return None
+
     async def _fill_title(self, title: str) -> bool:
         """填写标题"""
         title_selectors = [
             'input[placeholder*="标题"]',
-            'input[placeholder*="标题"]'.replace("标题", "标题"),
             '[class*="title"] input',
             ".title-input input",
         ]
 
-        for selector in title_selectors:
-            element = await self.browser.find_element(selector)
-            if element and await element.is_visible():
-                await element.fill(title)
-                print(f"   已填写标题: {title}")
-                return True
+        found = await self.browser.find_first(title_selectors, field="title")
+        if found:
+            await found[0].fill(title)
+            echo(f"   已填写标题: {title}")
+            return True
 
-        print("⚠️  未找到标题输入框")
+        echo("⚠️  未找到标题输入框")
         return False
 
     async def _fill_content(self, content: str) -> bool:
@@ -268,14 +617,13 @@ class XiaohongshuPublisher:
             ".rich-text-editor textarea",
         ]
 
-        for selector in content_selectors:
-            element = await self.browser.find_element(selector)
-            if element and await element.is_visible():
-                await element.fill(content)
-                print(f"   已填写正文 ({len(content)} 字)")
-                return True
+        found = await self.browser.find_first(content_selectors, field="body")
+        if found:
+            await found[0].fill(content)
+            echo(f"   已填写正文 ({len(content)} 字)")
+            return True
 
-        print("⚠️  未找到正文输入框")
+        echo("⚠️  未找到正文输入框")
         return False
 
     async def _add_tag(self, tag: str) -> bool:
@@ -287,20 +635,25 @@ class XiaohongshuPublisher:
             'input[placeholder*="标签"]',
         ]
 
-        for selector in tag_input_selectors:
-            element = await self.browser.find_element(selector)
-            if element and await element.is_visible():
-                await element.fill(tag)
-                await element.press("Enter")
-                print(f"   已添加标签: #{tag}")
-                return True
+        found = await self.browser.find_first(tag_input_selectors, field="tag")
+        if found:
+            await found[0].fill(tag)
+            await found[0].press("Enter")
+            echo(f"   已添加标签: #{tag}")
+            return True
 
         # 如果找不到输入框，尝试其他方式
         # 可以实现点击选择标签等逻辑
         return False
 
-    async def _click_publish(self) -> bool:
-        """点击发布按钮"""
+    @traced("publish_request", cat="publish")
+    async def _click_publish(self) -> dict:
+        """点击发布按钮，并从发布接口的响应中取得结果
+
+        Returns:
+            dict: clicked（已点击）、confirmed（收到接口响应）、success、note_id、
+                status（HTTP 状态码）、code / msg（平台返回的错误码和信息）
+        """
         publish_selectors = [
             ".publish-btn",
             'button[type="submit"]',
@@ -309,37 +662,92 @@ class XiaohongshuPublisher:
             'button:has-text("发布")',
         ]
 
-        for selector in publish_selectors:
-            element = await self.browser.find_element(selector)
-            if element and await element.is_visible():
-                try:
-                    await element.click()
-                    print("   已点击发布按钮")
-                    await asyncio.sleep(2)
-                    return True
-                except Exception as e:
-                    logger.warning(f"⚠️  点击发布按钮失败: {e}")
+        outcome = {
+            "clicked": False,
+            "confirmed": False,
+            "success": False,
+            "note_id": None,
+            "status": None,
+            "code": None,
+            "msg": None,
+        }
+
+        found = await self.browser.find_first(publish_selectors, field="publish_button")
+        if not found:
+            echo("⚠️  未找到发布按钮")
+            return outcome
+
+        pattern = self.config.get("api", {}).get("publish", "/web_api/sns/v2/note")
+        span = current_span()
+        try:
+            async with self.browser.page.expect_response(
+                lambda r: pattern in r.url and r.request.method == "POST",
+                timeout=self.config["timeouts"].get("publish_wait", 15000),
+            ) as response_info:
+                await found[0].click(timeout=self.config["timeouts"]["element_wait"])
+                outcome["clicked"] = True
+                echo("   已点击发布按钮")
+            response = await response_info.value
+        except PlaywrightTimeoutError as e:
+            if outcome["clicked"]:
+                # 已点击但没等到接口响应：笔记可能已经发出，结果未知
+                logger.warning("⚠️  未观察到发布接口响应，发布结果未确认")
+            else:
+                logger.warning(f"⚠️  点击发布按钮失败: {e}")
+            return outcome
+        except Exception as e:
+            logger.warning(f"⚠️  点击发布按钮失败: {e}")
+            return outcome
 
-        print("⚠️  未找到发布按钮")
-        return False
+        try:
+            data = await response.json()
+        except Exception:
+            data = {}
+        if not isinstance(data, dict):
+            data = {}
+        body = data.get("data") if isinstance(data.get("data"), dict) else {}
+        outcome.update(
+            confirmed=True,
+            status=response.status,
+            code=data.get("code"),
+            msg=data.get("msg"),
+            note_id=body.get("id") or body.get("note_id"),
+        )
+        outcome["success"] = response.ok and bool(data.get("success")) and data.get("code", 0) == 0
+        span.args.update(status=response.status, code=outcome["code"], note_id=outcome["note_id"])
+
+        if outcome["success"]:
+            echo(f"   发布接口已确认，笔记 ID: {outcome['note_id'] or '未返回'}")
+        else:
+            logger.warning(
+                f"⚠️  发布接口返回失败: HTTP {response.status}, code={outcome['code']}, msg={outcome['msg']}"
+            )
+        return outcome
 
     async def manual_input_content(self) -> GeneratedContent:
         """手动输入内容（交互模式）"""
-        print("\n📝 请手动输入内容:")
+        echo("\n📝 请手动输入内容:")
 
-        title = input("   标题: ").strip()
-        content = input("   正文: ").strip()
+        title = prompt("   标题: ").strip()
+        content = prompt("   正文: ").strip()
 
-        tags_str = input("   标签 (用逗号分隔): ").strip()
+        tags_str = prompt("   标签 (用逗号分隔): ").strip()
         tags = [t.strip() for t in tags_str.split(",")] if tags_str else []
 
         return GeneratedContent(title=title, content=content, tags=tags)
 
     async def run_auto(self, image_path: str, **kwargs) -> dict:
         """全自动模式"""
-        print("\n" + "🚀" * 20)
-        print("🚀 启动小红书全自动发布模式")
-        print("🚀" * 20)
+        job_id = event_log.new_job_id()
+        with event_log.bind(job_id=job_id, account=self.account), tracer.span(
+            "publish_job", "job", image=Path(image_path).name, job_id=job_id
+        ):
+            return await self._run_auto(image_path, **kwargs)
+
+    async def _run_auto(self, image_path: str, **kwargs) -> dict:
+        echo("\n" + "🚀" * 20)
+        echo("🚀 启动小红书全自动发布模式")
+        echo("🚀" * 20)
 
         try:
             # 1. 初始化
@@ -352,24 +760,25 @@ class XiaohongshuPublisher:
 
             # 3. 发布内容
             result = await self.publish_image_note(image_path, **kwargs)
+            result["metrics"] = dict(self.browser.stats)
 
             # 4. 发布成功后保存cookies
             if result.get("success"):
                 await self.login_handler.save_browser_cookies()
-                print("✅ 登录状态已保存")
+                echo("✅ 登录状态已保存")
 
             return result
 
         except KeyboardInterrupt:
-            print("\n\n⚠️  用户中断操作")
-            print("💡 浏览器保持打开状态，你可以手动查看页面")
-            print("📸 截图已保存，如需关闭浏览器，请手动关闭")
+            echo("\n\n⚠️  用户中断操作")
+            echo("💡 浏览器保持打开状态，你可以手动查看页面")
+            echo("📸 截图已保存，如需关闭浏览器，请手动关闭")
             return {"success": False, "error": "用户中断"}
 
         except Exception as e:
             logger.error(f"❌ 自动发布失败: {e}")
-            print("\n💡 浏览器保持打开状态，你可以手动查看页面")
-            print("📸 截图已保存，如需关闭浏览器，请手动关闭")
+            echo("\n💡 浏览器保持打开状态，你可以手动查看页面")
+            echo("📸 截图已保存，如需关闭浏览器，请手动关闭")
             return {"success": False, "error": str(e)}
 
         finally:
@@ -381,37 +790,93 @@ class XiaohongshuPublisher:
                 except:
                     pass
 
+    async def run_verify(self, account: str = None) -> list:
+        """核验账本中已发布笔记的审核状态（不打开页面）"""
+        if self.ledger is None:
+            echo("❌ 未启用发布账本，没有可核验的记录")
+            return []
+        if not await self.initialize():
+            return []
+        if not await self.ensure_login(prefetch=False):
+            return []
+        verifier = NoteStatusVerifier(self.browser.context.request, self.config, self.ledger)
+        return await verifier.verify(account=account or self.account)
+
+    async def run_sync(self, account: str = None) -> dict:
+        """增量同步账号的数据中心笔记数据（不打开页面）"""
+        if not await self.initialize():
+            return {"success": False, "error": "浏览器初始化失败"}
+        if not await self.ensure_login(prefetch=False):
+            return {"success": False, "error": "登录失败"}
+        store = AnalyticsStore.from_config(self.config.get("analytics"))
+        try:
+            summary = await AnalyticsSync(self.browser.context.request, self.config, store).sync(
+                account or self.account
+            )
+        except RuntimeError as e:
+            logger.error(f"❌ 数据同步失败: {e}")
+            return {"success": False, "error": str(e)}
+        finally:
+            store.close()
+        return {"success": True, **summary}
+
+    def run_resolve(self, key: str = None, state: str = None, note_id: str = None) -> list:
+        """处理结果未确认（submitting）的幂等键：不给 key 时列出，给出时人工确认为 published/failed"""
+        if self.ledger is None:
+            echo("❌ 未启用发布账本")
+            return []
+        if key is None:
+            entries = self.ledger.latest_states([publish_ledger.SUBMITTING], self.account)
+            if not entries:
+                echo("📭 没有结果未确认的发布")
+            for entry in entries:
+                echo(f"   {entry['idempotency_key']}  {entry['recorded_at']}  {entry.get('title') or ''}")
+            return entries
+
+        entry = self.ledger.latest(key)
+        if entry is None or entry["state"] != publish_ledger.SUBMITTING:
+            echo(f"❌ {key} 不是结果未确认的记录（当前: {entry['state'] if entry else '不存在'}）")
+            return []
+        if state not in (publish_ledger.PUBLISHED, publish_ledger.FAILED):
+            echo("❌ 请用 --resolve published 或 --resolve failed 指定确认结果")
+            return []
+        row = self.ledger.record(
+            key, state, note_id=note_id, error="人工确认未发布" if state == publish_ledger.FAILED else None
+        )
+        echo(f"✅ {key} 已确认为 {state}")
+        return [row]
+
     async def run_interactive(self):
         """交互模式"""
-        print("\n" + "💬" * 20)
-        print("💬 欢迎使用小红书发布助手（交互模式）")
-        print("💬" * 20)
+        echo("\n" + "💬" * 20)
+        echo("💬 欢迎使用小红书发布助手（交互模式）")
+        echo("💬" * 20)
 
         # 1. 选择发布类型
-        print("\n请选择发布类型:")
-        print("  1. 图文笔记")
-        print("  2. 视频笔记")
+        echo("\n请选择发布类型:")
+        echo("  1. 图文笔记")
+        echo("  2. 视频笔记")
 
         while True:
-            choice = input("\n请选择 (1/2): ").strip()
+            choice = prompt("\n请选择 (1/2): ").strip()
             if choice in ["1", "2"]:
                 note_type = "图文" if choice == "1" else "视频"
-                print(f"   已选择: {note_type}笔记")
+                echo(f"   已选择: {note_type}笔记")
                 break
-            print("   无效选择，请输入1或2")
+            echo("   无效选择，请输入1或2")
 
         # 2. 输入图片路径
-        image_path = input("\n请输入图片/视频路径: ").strip()
+        image_path = prompt("\n请输入图片/视频路径: ").strip()
 
         if not Path(image_path).exists():
-            print(f"❌ 文件不存在: {image_path}")
+            echo(f"❌ 文件不存在: {image_path}")
             return
 
         # 3. 选择是否自动生成内容
         auto_generate = True
         if note_type == "图文":
             generate_choice = (
-                input("\n是否自动生成标题和文案? (y/n, 默认y): ").strip().lower()
+                prompt("\n是否自动生成标题和文案? (y/n, 默认y): ").strip().lower()
             )
             if generate_choice == "n":
                 auto_generate = False
@@ -441,6 +906,16 @@ async def main():
   # 交互模式
   python publisher.py --interactive
 
+  # 核验已发布笔记的审核状态
+  python publisher.py --mode verify
+
+  # 列出/确认结果未确认的发布（崩溃在点击之后）
+  python publisher.py --mode resolve
+  python publisher.py --mode resolve --idempotency-key KEY --resolve published --note-id ID
+
+  # 增量同步数据中心的笔记数据（多个账号各用一份配置）
+  python publisher.py --mode sync --config config/account_b.yaml
+
   # 自定义内容
   python publisher.py --auto --image "/path/to/image.jpg" \\
       --title "自定义标题" --content "自定义内容" --tags "标签1,标签2"
@@ -448,19 +923,58 @@ async def main():
     )
 
     parser.add_argument(
-        "--mode", choices=["auto", "interactive"], default="auto", help="运行模式"
+        "--mode", choices=["auto", "interactive", "verify", "sync", "resolve"], default="auto", help="运行模式"
     )
+    parser.add_argument("--config", help="配置文件路径（默认自动查找 config/xiaohongshu.yaml）")
     parser.add_argument("--image", "-i", help="图片路径")
     parser.add_argument("--title", "-t", help="自定义标题")
     parser.add_argument("--content", "-c", help="自定义正文")
     parser.add_argument("--tags", help="自定义标签 (逗号分隔)")
     parser.add_argument("--no-preview", action="store_true", help="不预览直接发布")
     parser.add_argument("--no-confirm", action="store_true", help="发布前不确认")
+    parser.add_argument("--mock", action="store_true", help="使用本地模拟创作平台（离线运行）")
+    parser.add_argument(
+        "--allow-duplicate", action="store_true", help="不做相似图片/文案查重（同一图片文件仍按幂等键只发一次）"
+    )
+    parser.add_argument(
+        "--idempotency-key", help="幂等键：auto 模式下覆盖默认键（有意重发同一图片时使用），resolve 模式下指定要处理的键"
+    )
+    parser.add_argument(
+        "--resolve", choices=["published", "failed"], help="resolve 模式：把结果未确认的键确认为已发布/未发布"
+    )
+    parser.add_argument("--note-id", help="resolve 模式：确认为已发布时的笔记 ID（之后可用 verify 核验）")
+    parser.add_argument(
+        "--trace", metavar="PATH", help="导出 Chrome Trace JSON（可在 Perfetto 中打开）"
+    )
+    parser.add_argument(
+        "--metrics-port", type=int, help="在本地端口暴露 Prometheus 指标 (/metrics)"
+    )
+    parser.add_argument("--log-json", metavar="PATH", help="结构化事件日志（JSON Lines）路径")
+    parser.add_argument("--quiet", "-q", action="store_true", help="不在控制台输出进度和日志")
+    parser.add_argument(
+        "--profile",
+        metavar="PREFIX",
+        help="采样分析：写出 PREFIX.collapsed（火焰图）和 PREFIX.summary.json（按步骤的 cpu/idle/sleep）",
+    )
 
     args = parser.parse_args()
 
     # 创建发布器
-    publisher = XiaohongshuPublisher()
+    publisher = XiaohongshuPublisher(args.config)
+    if args.log_json or args.quiet:
+        options = dict(publisher.config.get("logging", {}))
+        if args.log_json:
+            options["json_file"] = args.log_json
+        event_log.setup_logging(options, console=False if args.quiet else None)
+    if args.trace:
+        tracer.enable()
+    if args.metrics_port is not None:
+        publisher.config.setdefault("metrics", {}).update(enabled=True, port=args.metrics_port)
+    if args.mock:
+        publisher.config["mock_site"]["enabled"] = True
+    if args.allow_duplicate:
+        publisher.config.setdefault("dedup", {})["enabled"] = False
+        publisher.content_generator.text_index = None
 
     # 准备参数
     kwargs = {
@@ -475,17 +989,42 @@ async def main():
         kwargs["custom_content"] = args.content
     if args.tags:
         kwargs["custom_tags"] = [t.strip() for t in args.tags.split(",")]
-
-    # 执行
-    if args.mode == "auto":
-        if not args.image:
-            # 使用默认测试图片
-            args.image = "/Users/mile/Downloads/jimeng-2025-12-11-2160-现代简约励志海报设计，采用温暖的橙黄色渐变背景，从底部的深橙色过渡到顶部的浅黄色....png"
-
-        result = await publisher.run_auto(args.image, **kwargs)
-        print(f"\n📊 发布结果: {result}")
-    else:
-        await publisher.run_interactive()
+    if args.idempotency_key and args.mode == "auto":
+        kwargs["idempotency_key"] = args.idempotency_key
+
+    profiler = SamplingProfiler().start() if args.profile else None
+
+    # 执行（结束时停止预热并关闭浏览器）
+    try:
+        if args.mode == "auto":
+            if not args.image:
+                # 使用默认测试图片
+                args.image = "/Users/mile/Downloads/jimeng-2025-12-11-2160-现代简约励志海报设计，采用温暖的橙黄色渐变背景，从底部的深橙色过渡到顶部的浅黄色....png"
+
+            result = await publisher.run_auto(args.image, **kwargs)
+            echo(f"\n📊 发布结果: {result}")
+        elif args.mode == "verify":
+            results = await publisher.run_verify()
+            for result in results:
+                echo(f"   {result['note_id']}: {result['state']}")
+        elif args.mode == "resolve":
+            publisher.run_resolve(args.idempotency_key, args.resolve, args.note_id)
+        elif args.mode == "sync":
+            result = await publisher.run_sync()
+            echo(f"\n📊 同步结果: {result}")
+        else:
+            await publisher.run_interactive()
+    finally:
+        await publisher.close()
+
+    if args.trace:
+        echo(f"🧭 追踪文件已保存: {tracer.export(args.trace)}")
+
+    if profiler:
+        profiler.stop()
+        collapsed, summary = profiler.write(args.profile)
+        echo(f"\n🔬 采样分析 ({profiler.samples} 个样本)\n{profiler.format_summary()}")
+        echo(f"   火焰图数据: {collapsed}\n   步骤汇总: {summary}")
 
 
 if __name__ == "__main__":
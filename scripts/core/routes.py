@@ -0,0 +1,21 @@
+"""
+平台地址 - 发布器、登录处理器和发布页预热池共用的发布页直达链接选择和登录页重定向判断
+"""
+
+from urllib.parse import urlparse
+
+NOTE_TYPES = ("image", "video", "draft")
+
+
+def publish_route(config: dict, note_type: str = "image") -> str:
+    """笔记类型（image/video/draft）对应的发布页直达链接，未配置时为发布页首页"""
+    if note_type not in NOTE_TYPES:
+        raise ValueError(f"未知的笔记类型: {note_type}")
+    platform = config["platform"]
+    return (platform.get("publish_routes") or {}).get(note_type, platform["publish_url"])
+
+
+def is_login_redirect(config: dict, url: str) -> bool:
+    """判断页面是否被重定向到了登录页"""
+    login_url = config["platform"]["login_url"]
+    return url.startswith(login_url) or "/login" in urlparse(url).path
@@ -0,0 +1,151 @@
+"""
+已发布文案的 SimHash 指纹索引 - 生成内容时避开与历史笔记过于相似的标题和正文
+
+标题按字符 2-gram、正文按字符 3-gram 计算 64 位 SimHash（n-gram 按出现次数加权），
+与图片索引一样用多索引哈希做汉明距离检索；索引以 JSON Lines 追加写入磁盘，首次查询时载入内存。
+"""
+
+import json
+import logging
+import re
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+from .image_index import MultiIndexHash, hamming
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_FILE = "~/.xiaohongshu_publisher/text_index.jsonl"
+
+_BITS = np.arange(64, dtype=np.uint64)
+_NOISE = re.compile(r"[\s#＃,，.。!！?？:：;；、…~～\-|｜]+")
+
+
+def _normalize(text: str) -> str:
+    return _NOISE.sub("", text or "").lower()
+
+
+def _mix(values: np.ndarray) -> np.ndarray:
+    """splitmix64 终混，让每一位都充分依赖输入"""
+    with np.errstate(over="ignore"):
+        values = values ^ (values >> np.uint64(30))
+        values = values * np.uint64(0xBF58476D1CE4E5B9)
+        values = values ^ (values >> np.uint64(27))
+        values = values * np.uint64(0x94D049BB133111EB)
+        return values ^ (values >> np.uint64(31))
+
+
+def simhash(text: str, n: int = 3) -> int:
+    """字符 n-gram 的 64 位 SimHash（所有 n-gram 的哈希在 NumPy 中一次算出，重复的 n-gram 按次数投票）"""
+    text = _normalize(text)
+    if not text:
+        return 0
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    width = min(n, len(codes))
+    count = len(codes) - width + 1
+    hashes = np.full(count, 0xCBF29CE484222325, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for offset in range(width):
+            hashes = (hashes ^ codes[offset : offset + count]) * np.uint64(0x100000001B3)
+    bits = (_mix(hashes)[:, None] >> _BITS) & np.uint64(1)
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 - count
+    return int(sum(1 << int(i) for i in np.nonzero(votes > 0)[0]))
+
+
+class TextSimilarityIndex:
+    """已发布笔记的标题/正文指纹索引（按配置的 dedup 段）"""
+
+    def __init__(
+        self,
+        index_file: str = DEFAULT_INDEX_FILE,
+        title_distance: int = 3,
+        body_distance: int = 6,
+    ):
+        self.index_file = Path(index_file).expanduser() if index_file else None
+        self.title_distance = title_distance
+        self.body_distance = body_distance
+        self.bodies = MultiIndexHash()
+        # 按正文指纹检索，再比较标题；模板生成的文案指纹高度重复，
+        # 相同的 (标题, 正文) 指纹只进索引一次，保留最近的一条记录
+        self.entries: Dict[tuple, Dict] = {}
+        self.size = 0
+        self._loaded = False
+
+    @classmethod
+    def from_config(cls, options: dict = None) -> "TextSimilarityIndex":
+        options = options or {}
+        return cls(
+            options.get("text_index", DEFAULT_INDEX_FILE),
+            options.get("title_distance", 3),
+            options.get("body_distance", 6),
+        )
+
+    @staticmethod
+    def fingerprint(title: str, body: str) -> tuple:
+        return simhash(title, 2), simhash(body, 3)
+
+    def _insert(self, entry: Dict):
+        pair = (int(entry["title_hash"], 16), int(entry["body_hash"], 16))
+        if pair not in self.entries:
+            self.bodies.add(pair[1], pair)
+        self.entries[pair] = entry
+        self.size += 1
+
+    def load(self) -> "TextSimilarityIndex":
+        """从磁盘载入索引（只在第一次调用时读取）"""
+        if self._loaded:
+            return self
+        self._loaded = True
+        if self.index_file is None or not self.index_file.exists():
+            return self
+        started = time.perf_counter()
+        with open(self.index_file, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    self._insert(json.loads(line))
+                except (ValueError, KeyError):
+                    continue
+        logger.info(
+            f"🗂️  已载入文案索引: {self.size} 条，{len(self.entries)} 组不同指纹 "
+            f"({(time.perf_counter() - started) * 1000:.0f}ms)"
+        )
+        return self
+
+    def find(self, title: str, body: str, match_title: bool = True) -> Optional[Dict]:
+        """返回与候选过于相似的已发布笔记，没有时返回 None
+
+        标题和正文都过近才算相似（模板标题池很小，只看标题几乎每条都会命中）；
+        match_title=False 时标题是固定的自定义标题，只比较正文。
+        """
+        self.load()
+        title_hash, body_hash = self.fingerprint(title, body)
+        for body_distance, pair in self.bodies.search(body_hash, self.body_distance):
+            title_distance = hamming(title_hash, pair[0])
+            if match_title and title_distance > self.title_distance:
+                continue
+            return {**self.entries[pair], "title_distance": title_distance, "body_distance": body_distance}
+        return None
+
+    def add(self, title: str, body: str, **meta) -> Dict:
+        """记录一条已发布的笔记（追加写入索引文件）"""
+        self.load()
+        title_hash, body_hash = self.fingerprint(title, body)
+        entry = {
+            "title_hash": f"{title_hash:016x}",
+            "body_hash": f"{body_hash:016x}",
+            "title": title,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            **meta,
+        }
+        self._insert(entry)
+        if self.index_file is not None:
+            self.index_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.index_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return entry
+
+    def __len__(self) -> int:
+        return self.load().size
@@ -0,0 +1,144 @@
+"""
+发布后状态核验 - 用登录会话的 context.request 直接调用创作平台接口，批量确认已发布笔记的审核结果
+
+不打开页面：请求共用浏览器上下文的 Cookie，信号量限制同时在途的请求数；
+审核中或临时错误（5xx/超时）按指数退避加抖动重试，得到最终状态后追加写入发布账本。
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Dict, List, Optional
+
+from playwright.async_api import Error as PlaywrightError
+
+from . import ledger as publish_ledger
+from ..utils import metrics
+from ..utils.event_log import echo
+from ..utils.tracing import current_span, traced
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"  # 仍在审核中（或重试用尽仍无结果），账本保持 published
+
+# 接口返回的笔记状态 -> 账本状态
+STATUS_MAP = {
+    "normal": publish_ledger.APPROVED,
+    "approved": publish_ledger.APPROVED,
+    "published": publish_ledger.APPROVED,
+    "limited": publish_ledger.LIMITED,
+    "rejected": publish_ledger.REJECTED,
+    "audit_failed": publish_ledger.REJECTED,
+    "deleted": publish_ledger.DELETED,
+    "reviewing": PENDING,
+    "auditing": PENDING,
+    "pending": PENDING,
+}
+
+
+class NoteStatusVerifier:
+    """按配置的 verify 段核验账本中已发布笔记的状态"""
+
+    def __init__(self, request, config: dict, ledger: publish_ledger.PublishLedger):
+        options = config.get("verify", {})
+        self.request = request  # BrowserContext.request（APIRequestContext）
+        self.ledger = ledger
+        self.url = config["platform"]["creator_url"].rstrip("/") + config["api"]["note_status"]
+        self.concurrency = options.get("concurrency", 8)
+        self.max_attempts = options.get("max_attempts", 6)
+        self.base_delay = options.get("base_delay", 1.0)
+        self.max_delay = options.get("max_delay", 30.0)
+        self.request_timeout = config.get("timeouts", {}).get("api_request", 10000)
+        self.session_expired = False
+
+    def pending(self, account: str = None) -> List[Dict]:
+        """账本中已发布、还没有最终审核结果的笔记"""
+        return [
+            entry
+            for entry in self.ledger.latest_states([publish_ledger.PUBLISHED], account)
+            if entry["note_id"]
+        ]
+
+    def _delay(self, attempt: int) -> float:
+        """第 attempt 次重试前的等待：指数增长、有上限，并加抖动避免所有请求同时重试"""
+        return min(self.max_delay, self.base_delay * 2**attempt) * random.uniform(0.5, 1.0)
+
+    async def _fetch(self, note_id: str) -> tuple:
+        """请求一次笔记状态，返回 (HTTP 状态码, 响应 JSON)；网络错误/超时时状态码为 None"""
+        try:
+            response = await self.request.get(
+                self.url.format(note_id=note_id), timeout=self.request_timeout
+            )
+        except PlaywrightError as e:
+            return None, {"msg": str(e).splitlines()[0]}
+        try:
+            data = await response.json()
+        except Exception:
+            data = {}
+        return response.status, data if isinstance(data, dict) else {}
+
+    def _classify(self, status: Optional[int], data: dict) -> Optional[str]:
+        """把一次响应归类为账本状态/PENDING；None 表示临时错误，需要重试"""
+        if status == 404:
+            return publish_ledger.DELETED
+        if status != 200 or not data.get("success") or data.get("code", 0) != 0:
+            return None
+        raw = str((data.get("data") or {}).get("status", "")).lower()
+        if raw not in STATUS_MAP:
+            logger.debug(f"未知的笔记状态 {raw!r}，按审核中处理")
+        return STATUS_MAP.get(raw, PENDING)
+
+    @traced("verify_note", cat="verify")
+    async def check(self, entry: Dict, semaphore: asyncio.Semaphore) -> Dict:
+        """核验一条笔记，得到最终状态时写入账本"""
+        note_id = entry["note_id"]
+        result = {"note_id": note_id, "idempotency_key": entry["idempotency_key"], "state": PENDING}
+        for attempt in range(self.max_attempts):
+            if self.session_expired:
+                result["error"] = "登录已过期"
+                break
+            # 只在请求期间占用并发名额，退避等待时让给其他笔记
+            async with semaphore:
+                status, data = await self._fetch(note_id)
+            result.update(attempts=attempt + 1, status=status, msg=data.get("msg"))
+            if status in (401, 403):
+                self.session_expired = True
+                result["error"] = "登录已过期"
+                break
+            state = self._classify(status, data)
+            if state not in (None, PENDING):
+                result["state"] = state
+                self.ledger.record(
+                    entry["idempotency_key"],
+                    state,
+                    note_id=note_id,
+                    error=data.get("msg") if state == publish_ledger.REJECTED else None,
+                )
+                metrics.NOTES_VERIFIED.inc(state=state)
+                break
+            if attempt + 1 < self.max_attempts:
+                await asyncio.sleep(self._delay(attempt))
+        current_span().args.update(note_id=note_id, state=result["state"], attempts=result.get("attempts"))
+        return result
+
+    async def verify(self, entries: List[Dict] = None, account: str = None) -> List[Dict]:
+        """并发核验（默认核验账本中该账号全部待确认的笔记），返回每条笔记的结果"""
+        entries = self.pending(account) if entries is None else entries
+        if not entries:
+            echo("📭 没有待核验的笔记")
+            return []
+        echo(f"🔎 核验 {len(entries)} 条笔记的状态（并发 {self.concurrency}）...")
+        self.session_expired = False
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = await asyncio.gather(*(self.check(entry, semaphore) for entry in entries))
+
+        counts: Dict[str, int] = {}
+        for result in results:
+            counts[result["state"]] = counts.get(result["state"], 0) + 1
+        summary = "，".join(f"{state} {count}" for state, count in sorted(counts.items()))
+        echo(f"✅ 核验完成 ({time.perf_counter() - started:.1f}s): {summary}")
+        if self.session_expired:
+            logger.warning("⚠️  登录已过期，部分笔记未核验")
+        return results
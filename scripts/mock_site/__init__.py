@@ -0,0 +1,8 @@
+"""
+本地模拟创作平台
+"""
+
+from .faults import FAULT_PROFILES, FaultProfile, get_fault_profile
+from .server import MockCreatorSite
+
+__all__ = ["MockCreatorSite", "FaultProfile", "FAULT_PROFILES", "get_fault_profile"]
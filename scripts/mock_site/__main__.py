@@ -0,0 +1,47 @@
+"""
+独立运行模拟创作平台: python -m scripts.mock_site --port 8765
+"""
+
+import argparse
+import logging
+import time
+
+from .faults import FAULT_PROFILES, get_fault_profile
+from .server import MockCreatorSite
+
+
+def main():
+    parser = argparse.ArgumentParser(description="小红书模拟创作平台")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--upload-latency", type=float, default=0.2, help="上传延迟（秒）")
+    parser.add_argument("--upload-bandwidth", type=float, default=0, help="上传带宽（字节/秒）")
+    parser.add_argument("--scan-delay", type=float, default=1.0, help="模拟扫码延迟（秒）")
+    parser.add_argument("--review-delay", type=float, default=2.0, help="笔记审核中的时长（秒）")
+    parser.add_argument("--stats-interval", type=float, default=60.0, help="笔记数据更新间隔（秒）")
+    parser.add_argument("--history-notes", type=int, default=0, help="预置的历史笔记数")
+    parser.add_argument("--faults", choices=list(FAULT_PROFILES), default="none", help="故障注入配置")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    site = MockCreatorSite(
+        host=args.host,
+        port=args.port,
+        upload_latency=args.upload_latency,
+        upload_bandwidth=args.upload_bandwidth,
+        scan_delay=args.scan_delay,
+        faults=get_fault_profile(args.faults),
+        review_delay=args.review_delay,
+        stats_interval=args.stats_interval,
+        history_notes=args.history_notes,
+    ).start()
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        site.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+模拟站点故障注入 - 可脚本化的故障配置，复现线上常见失败
+"""
+
+import random
+import threading
+import time
+from dataclasses import dataclass, field, replace
+
+# 选择器漂移：页面改版后 class 被重命名
+SELECTOR_DRIFT = {
+    "upload-area": "upload-wrapper-v2",
+    "title-input": "note-title-v2",
+    "editor-content": "note-desc-v2",
+    "tag-input": "topic-input-v2",
+    "publish-btn": "submit-note-v2",
+    "user-avatar": "creator-avatar-v2",
+    "user-name": "creator-nick-v2",
+    "login-btn": "sign-in-v2",
+}
+
+
+@dataclass
+class FaultProfile:
+    """故障配置"""
+
+    name: str = "none"
+    latency_spike_rate: float = 0.0  # 任意请求出现延迟尖刺的概率
+    latency_spike: float = 0.0  # 尖刺时长（秒）
+    upload_error_rate: float = 0.0  # 上传接口返回 5xx 的概率
+    upload_error_status: int = 503
+    render_delay: float = 0.0  # 发布页主体延迟渲染（秒）
+    selector_drift: bool = False  # 是否重命名页面 class
+    logout_after_uploads: int = 0  # 每个会话第 N 次上传时强制登出，0 表示不登出
+    seed: int = 0
+    _rng: random.Random = field(default=None, init=False, repr=False, compare=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self._rng = random.Random(self.seed)
+
+    def chance(self, rate: float) -> bool:
+        if rate <= 0:
+            return False
+        with self._lock:
+            return self._rng.random() < rate
+
+    def maybe_spike(self):
+        """按概率注入延迟尖刺"""
+        if self.chance(self.latency_spike_rate):
+            time.sleep(self.latency_spike)
+
+    def drift(self, html: str) -> str:
+        """按配置重命名页面中的 class"""
+        if not self.selector_drift:
+            return html
+        for old, new in SELECTOR_DRIFT.items():
+            html = html.replace(old, new)
+        return html
+
+
+FAULT_PROFILES = {
+    "none": FaultProfile(),
+    "latency_spikes": FaultProfile("latency_spikes", latency_spike_rate=0.2, latency_spike=3.0),
+    "upload_5xx": FaultProfile("upload_5xx", upload_error_rate=0.5),
+    "slow_render": FaultProfile("slow_render", render_delay=4.0),
+    "selector_drift": FaultProfile("selector_drift", selector_drift=True),
+    "forced_logout": FaultProfile("forced_logout", logout_after_uploads=1),
+    "chaos": FaultProfile(
+        "chaos",
+        latency_spike_rate=0.1,
+        latency_spike=2.0,
+        upload_error_rate=0.2,
+        render_delay=1.0,
+    ),
+}
+
+
+def get_fault_profile(name: str, seed: int = 0) -> FaultProfile:
+    """按名称获取故障配置（返回新实例，随机序列互不影响）"""
+    if name not in FAULT_PROFILES:
+        raise ValueError(f"未知故障配置: {name}，可选: {', '.join(FAULT_PROFILES)}")
+    return replace(FAULT_PROFILES[name], seed=seed)
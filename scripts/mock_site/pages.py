@@ -0,0 +1,184 @@
+"""
+模拟创作平台页面 - 与核心代码所用选择器保持一致
+"""
+
+BASE_STYLE = """
+<style>
+  body { font-family: sans-serif; margin: 0; }
+  .header { display: flex; justify-content: space-between; padding: 12px 24px; border-bottom: 1px solid #eee; }
+  .header-user { display: flex; align-items: center; gap: 8px; }
+  .user-avatar { width: 32px; height: 32px; border-radius: 50%; background: #ff2442; }
+  .main { padding: 24px; }
+  .btn { padding: 8px 20px; background: #ff2442; color: #fff; border: none; border-radius: 4px; cursor: pointer; }
+  .hidden { display: none !important; }
+  .login-dialog { border: 1px solid #ddd; padding: 24px; width: 360px; margin: 40px auto; }
+  .el-select input { width: 100%; cursor: pointer; }
+  .el-select-dropdown { list-style: none; padding: 0; border: 1px solid #ddd; }
+  .el-select-dropdown li { padding: 8px; cursor: pointer; }
+  .qrcode-img img { width: 200px; height: 200px; }
+  .creator-tab { display: inline-block; padding: 8px 16px; cursor: pointer; }
+  .creator-tab.active { border-bottom: 2px solid #ff2442; }
+  .upload-area { border: 2px dashed #ccc; padding: 40px; text-align: center; margin: 16px 0; }
+  .editor { display: flex; flex-direction: column; gap: 12px; max-width: 640px; }
+  .editor-content textarea { width: 100%; height: 160px; }
+  .tag-list span { margin-right: 6px; color: #13386c; }
+</style>
+"""
+
+HOME_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>小红书创作服务平台</title>""" + BASE_STYLE + """</head>
+<body>
+  <div class="header">
+    <div class="logo">小红书创作服务平台</div>
+    <div class="header-user"><div class="user-avatar"></div><span class="user-name">模拟账号</span></div>
+  </div>
+  <div class="main">
+    <a class="btn publish-entry" href="/publish/publish?from=menu&target=image">发布笔记</a>
+  </div>
+</body></html>
+"""
+
+LOGIN_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>登录 - 小红书创作服务平台</title>""" + BASE_STYLE + """</head>
+<body>
+  <div class="header"><div class="logo">小红书创作服务平台</div></div>
+  <div class="main">
+    <button class="btn login-btn" id="login-btn">登 录</button>
+    <div class="login-dialog hidden" id="dialog">
+      <div class="login-type el-select">
+        <input readonly placeholder="请选择选项" id="login-type">
+      </div>
+      <ul class="el-select-dropdown hidden" id="dropdown">
+        <li data-type="phone">手机号登录</li>
+        <li data-type="qrcode">扫码登录</li>
+      </ul>
+      <div class="qrcode-img hidden" id="qrcode"><img alt="qrcode" src="/qr.svg"></div>
+    </div>
+  </div>
+  <script>
+    const $ = (id) => document.getElementById(id);
+    $('login-btn').addEventListener('click', () => $('dialog').classList.remove('hidden'));
+    $('login-type').addEventListener('click', () => $('dropdown').classList.remove('hidden'));
+    $('dropdown').addEventListener('click', (e) => {
+      const li = e.target.closest('li');
+      if (!li) return;
+      $('login-type').value = li.textContent;
+      $('dropdown').classList.add('hidden');
+      if (li.dataset.type !== 'qrcode') return;
+      $('qrcode').classList.remove('hidden');
+      // 模拟手机扫码：延迟后由服务端下发登录态
+      setTimeout(async () => {
+        await fetch('/api/login/scan', { method: 'POST' });
+        location.href = '/';
+      }, __SCAN_DELAY_MS__);
+    });
+  </script>
+</body></html>
+"""
+
+PUBLISH_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>发布笔记 - 小红书创作服务平台</title>""" + BASE_STYLE + """</head>
+<body>
+  <div class="header">
+    <div class="logo">小红书创作服务平台</div>
+    <div class="header-user"><div class="user-avatar"></div><span class="user-name">模拟账号</span></div>
+  </div>
+  <div class="main">
+    <div class="tabs">
+      <div class="creator-tab" role="tab" data-target="video">上传视频</div>
+      <div class="creator-tab" role="tab" data-target="image">上传图文</div>
+    </div>
+    <div class="upload-area">
+      <p class="upload-tip">拖拽或点击上传图片</p>
+      <input type="file" id="file-input" accept="image/*" multiple>
+    </div>
+    <div class="editor hidden" id="editor">
+      <div class="upload-status" id="upload-status"></div>
+      <div class="title-input"><input placeholder="填写标题会有更多赞哦～" id="title" maxlength="20"></div>
+      <div class="editor-content"><textarea placeholder="输入正文描述，真诚有价值的分享予人温暖" id="content"></textarea></div>
+      <div class="tag-container">
+        <div class="tag-list" id="tag-list"></div>
+        <div class="tag-input"><input placeholder="输入标签后回车" id="tag-input"></div>
+      </div>
+      <button class="btn publish-btn" id="publish-btn" disabled>发布</button>
+      <div class="publish-result" id="publish-result"></div>
+    </div>
+  </div>
+  <script>
+    const $ = (id) => document.getElementById(id);
+    const state = { fileIds: [], pending: 0, tags: [] };
+
+    // 故障注入：延迟渲染发布页主体
+    const RENDER_DELAY = __RENDER_DELAY_MS__;
+    if (RENDER_DELAY) {
+      const main = document.querySelector('.main');
+      main.classList.add('hidden');
+      setTimeout(() => main.classList.remove('hidden'), RENDER_DELAY);
+    }
+
+    function selectTab(target) {
+      document.querySelectorAll('.creator-tab').forEach((tab) => {
+        tab.classList.toggle('active', tab.dataset.target === target);
+      });
+      $('file-input').accept = target === 'video' ? 'video/*' : 'image/*';
+    }
+    document.querySelectorAll('.creator-tab').forEach((tab) => {
+      tab.addEventListener('click', () => selectTab(tab.dataset.target));
+    });
+    selectTab(new URLSearchParams(location.search).get('target') || 'video');
+
+    $('file-input').addEventListener('change', async (e) => {
+      $('editor').classList.remove('hidden');
+      for (const file of e.target.files) {
+        state.pending += 1;
+        $('publish-btn').disabled = true;
+        $('upload-status').textContent = '上传中...';
+        const form = new FormData();
+        form.append('file', file);
+        const resp = await fetch('/api/upload', { method: 'POST', body: form });
+        if (resp.status === 401) {
+          location.href = '/login';
+          return;
+        }
+        const data = await resp.json();
+        state.pending -= 1;
+        if (data.success) state.fileIds.push(data.data.file_id);
+        $('upload-status').textContent = data.success ? '上传成功' : '上传失败';
+      }
+      $('publish-btn').disabled = state.pending > 0 || !state.fileIds.length;
+    });
+
+    $('tag-input').addEventListener('keydown', (e) => {
+      if (e.key !== 'Enter' || !e.target.value.trim()) return;
+      state.tags.push(e.target.value.trim());
+      const chip = document.createElement('span');
+      chip.textContent = '#' + e.target.value.trim();
+      $('tag-list').appendChild(chip);
+      e.target.value = '';
+    });
+
+    $('publish-btn').addEventListener('click', async () => {
+      const resp = await fetch('/web_api/sns/v2/note', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+          title: $('title').value,
+          desc: $('content').value,
+          tags: state.tags,
+          file_ids: state.fileIds,
+        }),
+      });
+      const data = await resp.json();
+      $('publish-result').textContent = data.success ? '发布成功' : ('发布失败: ' + data.msg);
+    });
+  </script>
+</body></html>
+"""
+
+QR_SVG = """<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 21 21" shape-rendering="crispEdges">
+<rect width="21" height="21" fill="#fff"/>
+<path d="M0 0h7v7h-7zM14 0h7v7h-7zM0 14h7v7h-7z" fill="#000"/>
+<path d="M1 1h5v5h-5zM15 1h5v5h-5zM1 15h5v5h-5z" fill="#fff"/>
+<path d="M2 2h3v3h-3zM16 2h3v3h-3zM2 16h3v3h-3zM9 9h3v3h-3zM14 14h2v2h-2zM17 17h3v3h-3z" fill="#000"/>
+</svg>
+"""
@@ -0,0 +1,366 @@
+"""
+本地模拟创作平台 - 离线运行完整发布流程和性能基准
+"""
+
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from datetime import datetime
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from .faults import FaultProfile, get_fault_profile
+from .pages import HOME_PAGE, LOGIN_PAGE, PUBLISH_PAGE, QR_SVG
+
+logger = logging.getLogger(__name__)
+
+SESSION_COOKIE = "web_session"
+REAL_CREATOR_URL = "https://creator.xiaohongshu.com"
+STATS_TICKS = 48  # 笔记数据在发布后更新这么多次后不再变化
+
+
+class MockCreatorSite:
+    """模拟小红书创作平台
+
+    提供登录/扫码、创作首页、发布页，以及带延迟和带宽限制的上传接口、
+    记录笔记的发布接口。在后台线程中运行，不依赖外部网络。
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        upload_latency: float = 0.2,
+        upload_bandwidth: float = 0,
+        scan_delay: float = 1.0,
+        faults: FaultProfile = None,
+        review_delay: float = 2.0,
+        stats_interval: float = 60.0,
+        analytics_latency: float = 0.05,
+        history_notes: int = 0,
+    ):
+        self.host = host
+        self.port = port
+        self.upload_latency = upload_latency  # 上传接口固定延迟（秒）
+        self.upload_bandwidth = upload_bandwidth  # 上传带宽（字节/秒），0 表示不限速
+        self.scan_delay = scan_delay  # 二维码出现后模拟扫码的延迟（秒）
+        self.review_delay = review_delay  # 笔记发布后处于审核中的时长（秒）
+        self.stats_interval = stats_interval  # 笔记数据的更新间隔（秒）
+        self.analytics_latency = analytics_latency  # 数据中心每页接口延迟（秒）
+        self.faults = faults or FaultProfile()
+        self.sessions: set = set()
+        self.revoked: set = set()
+        self.session_uploads: dict = {}
+        self.uploads: dict = {}
+        self.notes: list = []
+        self._lock = threading.Lock()
+        self._server: ThreadingHTTPServer = None
+        self._thread: threading.Thread = None
+        self.seed_history(history_notes)
+
+    @classmethod
+    def from_config(cls, options: dict) -> "MockCreatorSite":
+        """从配置的 mock_site 段创建"""
+        return cls(
+            host=options.get("host", "127.0.0.1"),
+            port=options.get("port", 0),
+            upload_latency=options.get("upload_latency", 0.2),
+            upload_bandwidth=options.get("upload_bandwidth", 0),
+            scan_delay=options.get("scan_delay", 1.0),
+            faults=get_fault_profile(options.get("fault_profile", "none")),
+            review_delay=options.get("review_delay", 2.0),
+            stats_interval=options.get("stats_interval", 60.0),
+            analytics_latency=options.get("analytics_latency", 0.05),
+            history_notes=options.get("history_notes", 0),
+        )
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> "MockCreatorSite":
+        """在后台线程启动服务"""
+        site = self
+
+        class Handler(MockRequestHandler):
+            pass
+
+        Handler.site = site
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"🧪 模拟创作平台已启动: {self.url}")
+        return self
+
+    def stop(self):
+        """停止服务"""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def point_config(self, config: dict):
+        """把配置中的 platform 地址指向模拟站点，并使用独立的 cookie 文件"""
+        platform = config["platform"]
+        for key in ("creator_url", "login_url", "publish_url"):
+            if key in platform:
+                platform[key] = platform[key].replace(REAL_CREATOR_URL, self.url)
+        platform["publish_routes"] = {
+            note_type: url.replace(REAL_CREATOR_URL, self.url)
+            for note_type, url in (platform.get("publish_routes") or {}).items()
+        }
+        platform["cookie_file"] = config.get("mock_site", {}).get(
+            "cookie_file", "~/.xiaohongshu_publisher/mock_cookies.json"
+        )
+
+    # ==================== 状态操作（供请求处理线程调用） ====================
+
+    def new_session(self) -> str:
+        token = f"mock-{uuid.uuid4().hex}"
+        with self._lock:
+            self.sessions.add(token)
+        return token
+
+    def is_logged_in(self, token: str) -> bool:
+        # 接受任意未被登出的非空会话，便于复用上次保存的 cookie
+        return bool(token) and token not in self.revoked
+
+    def count_upload(self, token: str) -> bool:
+        """记录会话的上传次数；达到强制登出阈值时吊销会话并返回 False"""
+        limit = self.faults.logout_after_uploads
+        with self._lock:
+            count = self.session_uploads.get(token, 0) + 1
+            self.session_uploads[token] = count
+            if limit and count >= limit:
+                self.revoked.add(token)
+                return False
+        return True
+
+    def record_upload(self, size: int) -> str:
+        file_id = uuid.uuid4().hex
+        with self._lock:
+            self.uploads[file_id] = size
+        return file_id
+
+    def render(self, html: str) -> str:
+        """按故障配置渲染页面"""
+        html = html.replace("__RENDER_DELAY_MS__", str(int(self.faults.render_delay * 1000)))
+        return self.faults.drift(html)
+
+    def record_note(self, payload: dict, token: str) -> dict:
+        note = {
+            "note_id": uuid.uuid4().hex[:24],
+            "title": payload.get("title", ""),
+            "desc": payload.get("desc", ""),
+            "tags": payload.get("tags", []),
+            "file_ids": payload.get("file_ids", []),
+            "session": token,
+            "time": datetime.now().isoformat(),
+            "published_at": time.time(),
+        }
+        with self._lock:
+            self.notes.append(note)
+        return note
+
+    def list_notes(self) -> list:
+        """已发布笔记的快照（在锁内复制，避免与写入线程并发读写）"""
+        with self._lock:
+            return list(self.notes)
+
+    def note_status(self, note_id: str) -> dict:
+        """笔记审核状态：发布后 review_delay 秒内为 reviewing，之后为 normal"""
+        with self._lock:
+            note = next((n for n in self.notes if n["note_id"] == note_id), None)
+        if note is None:
+            return None
+        reviewing = time.time() - note["published_at"] < self.review_delay
+        return {"id": note_id, "status": "reviewing" if reviewing else "normal"}
+
+    def seed_history(self, count: int):
+        """生成 count 条历史笔记（每小时一条，数据早已不再变化），用于数据同步联调"""
+        now = time.time()
+        for index in range(count):
+            published_at = now - (index + 1) * 3600
+            self.notes.append(
+                {
+                    "note_id": uuid.UUID(int=random.Random(index).getrandbits(128)).hex[:24],
+                    "title": f"历史笔记 {index + 1}",
+                    "session": None,
+                    "time": datetime.fromtimestamp(published_at).isoformat(),
+                    "published_at": published_at,
+                }
+            )
+
+    def note_stats(self, note: dict, now: float) -> dict:
+        """笔记当前的数据：发布后每 stats_interval 秒增长一次，STATS_TICKS 次后固定"""
+        ticks = min(STATS_TICKS, int((now - note["published_at"]) // self.stats_interval))
+        rng = random.Random(note["note_id"])
+        views = rng.randint(20, 200) * ticks
+        return {
+            "id": note["note_id"],
+            "title": note["title"],
+            "publish_time": int(note["published_at"] * 1000),
+            "update_time": int((note["published_at"] + ticks * self.stats_interval) * 1000),
+            "view_count": views,
+            "like_count": views * rng.randint(2, 10) // 100,
+            "collect_count": views * rng.randint(1, 5) // 100,
+            "comment_count": views * rng.randint(0, 2) // 100,
+            "share_count": views // 200,
+        }
+
+    def analytics_page(self, page: int, page_size: int) -> dict:
+        """数据中心笔记列表：按数据更新时间从新到旧分页"""
+        now = time.time()
+        with self._lock:
+            notes = list(self.notes)
+        rows = sorted(
+            (self.note_stats(note, now) for note in notes),
+            key=lambda row: (-row["update_time"], row["id"]),
+        )
+        start = (page - 1) * page_size
+        return {
+            "notes": rows[start : start + page_size],
+            "total": len(rows),
+            "page": page,
+            "page_size": page_size,
+        }
+
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    """模拟站点请求处理"""
+
+    site: MockCreatorSite = None
+
+    def log_message(self, format, *args):
+        logger.debug(f"mock {self.address_string()} {format % args}")
+
+    # ==================== 工具方法 ====================
+
+    def _session(self) -> str:
+        cookie = SimpleCookie(self.headers.get("Cookie", ""))
+        morsel = cookie.get(SESSION_COOKIE)
+        return morsel.value if morsel else ""
+
+    def _send(self, status: int, body: str, content_type: str, headers: dict = None):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _html(self, body: str):
+        self._send(200, self.site.render(body), "text/html")
+
+    def _json(self, payload, status: int = 200, headers: dict = None):
+        self._send(status, json.dumps(payload, ensure_ascii=False), "application/json", headers)
+
+    def _redirect(self, location: str):
+        self.send_response(302)
+        self.send_header("Location", location)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _read_body(self, throttle: bool = False) -> bytes:
+        """读取请求体；throttle 时按配置带宽限速"""
+        remaining = int(self.headers.get("Content-Length", 0))
+        chunks = []
+        while remaining > 0:
+            chunk = self.rfile.read(min(65536, remaining))
+            if not chunk:
+                break
+            chunks.append(chunk)
+            remaining -= len(chunk)
+            if throttle and self.site.upload_bandwidth:
+                time.sleep(len(chunk) / self.site.upload_bandwidth)
+        return b"".join(chunks)
+
+    # ==================== 路由 ====================
+
+    def do_GET(self):
+        self.site.faults.maybe_spike()
+        path = urlparse(self.path).path
+        logged_in = self.site.is_logged_in(self._session())
+
+        if path == "/login":
+            page = LOGIN_PAGE.replace("__SCAN_DELAY_MS__", str(int(self.site.scan_delay * 1000)))
+            return self._html(page)
+        if path == "/qr.svg":
+            return self._send(200, QR_SVG, "image/svg+xml")
+        if path == "/api/notes":
+            return self._json({"success": True, "data": self.site.list_notes()})
+        if path == "/api/galaxy/creator/datacenter/note/list":
+            if not logged_in:
+                return self._json({"success": False, "code": -100, "msg": "登录已过期"}, status=401)
+            query = parse_qs(urlparse(self.path).query)
+            try:
+                page = max(1, int(query.get("page", ["1"])[0]))
+                page_size = min(50, max(1, int(query.get("page_size", ["20"])[0])))
+            except ValueError:
+                return self._json({"success": False, "code": -1, "msg": "请求参数错误"}, status=400)
+            time.sleep(self.site.analytics_latency)
+            data = self.site.analytics_page(page, page_size)
+            return self._json({"success": True, "code": 0, "msg": "成功", "data": data})
+        if path.startswith("/web_api/sns/v2/note/"):
+            if not logged_in:
+                return self._json({"success": False, "code": -100, "msg": "登录已过期"}, status=401)
+            status = self.site.note_status(path.rsplit("/", 1)[-1])
+            if status is None:
+                return self._json({"success": False, "code": -404, "msg": "笔记不存在"}, status=404)
+            return self._json({"success": True, "code": 0, "msg": "成功", "data": status})
+
+        if path in ("/", "/new/home") or path.startswith("/publish"):
+            if not logged_in:
+                return self._redirect("/login")
+            return self._html(PUBLISH_PAGE if path.startswith("/publish") else HOME_PAGE)
+
+        self._json({"success": False, "msg": "not found"}, status=404)
+
+    def do_POST(self):
+        self.site.faults.maybe_spike()
+        path = urlparse(self.path).path
+        token = self._session()
+
+        if path == "/api/login/scan":
+            token = self.site.new_session()
+            return self._json(
+                {"success": True},
+                headers={"Set-Cookie": f"{SESSION_COOKIE}={token}; Path=/"},
+            )
+
+        if not self.site.is_logged_in(token):
+            self._read_body()
+            return self._json({"success": False, "code": -100, "msg": "登录已过期"}, status=401)
+
+        if path == "/api/upload":
+            size = len(self._read_body(throttle=True))
+            time.sleep(self.site.upload_latency)
+            if not self.site.count_upload(token):
+                return self._json({"success": False, "code": -100, "msg": "登录已过期"}, status=401)
+            if self.site.faults.chance(self.site.faults.upload_error_rate):
+                status = self.site.faults.upload_error_status
+                return self._json({"success": False, "msg": "服务繁忙"}, status=status)
+            file_id = self.site.record_upload(size)
+            return self._json({"success": True, "data": {"file_id": file_id, "size": size}})
+
+        if path == "/web_api/sns/v2/note":
+            try:
+                payload = json.loads(self._read_body() or b"{}")
+            except ValueError:
+                return self._json({"success": False, "code": -1, "msg": "请求格式错误"}, status=400)
+            if not isinstance(payload, dict):
+                return self._json({"success": False, "code": -1, "msg": "请求格式错误"}, status=400)
+            note = self.site.record_note(payload, token)
+            return self._json(
+                {"success": True, "code": 0, "msg": "成功", "data": {"id": note["note_id"]}}
+            )
+
+        self._json({"success": False, "msg": "not found"}, status=404)
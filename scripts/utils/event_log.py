@@ -0,0 +1,197 @@
+"""
+结构化日志 - JSON Lines 事件日志（带任务/账号/步骤关联 ID），经 QueueHandler 异步写出
+
+事件循环线程只把日志记录放入队列，文件和控制台 I/O 都在 QueueListener 的后台线程完成；
+人类可读的控制台输出只是可选的一个渲染器。
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+
+from .tracing import current_span
+
+# 面向用户的进度输出（原 print）走这个 logger，控制台渲染器原样输出其文本
+CONSOLE_LOGGER = "xhs.console"
+
+_context: ContextVar[dict] = ContextVar("xhs_log_context", default={})
+_console = logging.getLogger(CONSOLE_LOGGER)
+_console.setLevel(logging.INFO)  # 自带级别，根 logger 调高级别时进度输出也不会被过滤
+_listener: logging.handlers.QueueListener = None
+_queue: queue.Queue = None
+
+# LogRecord 自带的属性，其余属性视为 extra 传入的结构化字段
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {
+    "message", "asctime", "job_id", "account", "step", "span", "console",
+}
+
+
+def new_job_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+@contextmanager
+def bind(**fields):
+    """在当前协程上下文中绑定关联字段（如 job_id、account），期间的日志都会带上"""
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def bound(name: str):
+    """读取当前上下文中绑定的关联字段"""
+    return _context.get().get(name)
+
+
+def echo(message: str = ""):
+    """输出一条面向用户的进度信息（控制台渲染器原样显示，JSON 日志中为 console 事件）
+
+    未调用 setup_logging 时（临时脚本、被其他工具导入）直接打印到标准输出。
+    """
+    if _listener is None:
+        print(message, flush=True)
+        return
+    _console.info(message, extra={"console": True})
+
+
+def flush():
+    """等待队列中的日志全部写出（交互提示前调用，保证提示出现在之前的输出之后）"""
+    if _listener is not None:
+        _queue.join()
+
+
+def prompt(text: str = "") -> str:
+    """先刷新控制台输出再读取用户输入"""
+    flush()
+    return input(text)
+
+
+class ContextFilter(logging.Filter):
+    """在发出日志的线程/协程里补上关联字段（进入队列后上下文就丢失了）"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = _context.get()
+        record.job_id = context.get("job_id")
+        record.account = context.get("account")
+        span = current_span()
+        record.span = span.path if span else None
+        record.step = span.step if span else None
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """入队前只做 getMessage 和异常文本化，保留结构化字段供后台线程格式化"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(record.__dict__)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """每条记录一行 JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        event = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage().strip(),
+            "job_id": getattr(record, "job_id", None),
+            "account": getattr(record, "account", None),
+            "step": getattr(record, "step", None),
+            "span": getattr(record, "span", None),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                event[key] = value
+        if record.exc_text:
+            event["exc"] = record.exc_text
+        return json.dumps(event, ensure_ascii=False, default=str)
+
+
+class ConsoleFormatter(logging.Formatter):
+    """人类可读的控制台渲染：进度信息原样输出，其余日志按原有格式"""
+
+    def __init__(self):
+        super().__init__(
+            "%(asctime)s - %(name)s - %(levelname)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S"
+        )
+
+    def format(self, record: logging.LogRecord) -> str:
+        if getattr(record, "console", False):
+            return record.getMessage()
+        return super().format(record)
+
+
+def setup_logging(options: dict = None, console: bool = None) -> logging.handlers.QueueListener:
+    """按配置的 logging 段初始化日志：根 logger 只挂一个 QueueHandler，写出由后台线程完成
+
+    options 支持 level、console（是否渲染到控制台）、json_file（JSON Lines 路径，留空关闭）、
+    max_bytes / backup_count（按大小轮转）。console 参数优先于配置。
+    """
+    global _listener, _queue
+    options = options or {}
+    shutdown_logging()
+
+    handlers = []
+    if console if console is not None else options.get("console", True):
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(ConsoleFormatter())
+        handlers.append(stream)
+
+    json_file = options.get("json_file")
+    if json_file:
+        path = Path(json_file).expanduser()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(
+            path,
+            maxBytes=options.get("max_bytes", 10 * 1024 * 1024),
+            backupCount=options.get("backup_count", 5),
+            encoding="utf-8",
+        )
+        file_handler.setFormatter(JsonFormatter())
+        handlers.append(file_handler)
+
+    _queue = queue.Queue()
+    queue_handler = _QueueHandler(_queue)
+    queue_handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, logging.handlers.QueueHandler):
+            root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(options.get("level", "INFO"))
+
+    _listener = logging.handlers.QueueListener(_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging():
+    """停止后台写出线程（会先写完队列中剩余的日志）"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,128 @@
+"""
+关键词匹配 - Aho–Corasick 自动机，一次线性扫描找出文本中出现的所有关键词
+
+自动机只在构建时按关键词总长度付出代价，匹配耗时只与文本长度和命中数有关，
+与词库大小无关；KeywordClassifier 在其上按命中次数和权重给每个类别打分。
+"""
+
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterator, List, Mapping, Tuple
+
+import yaml
+
+
+class KeywordAutomaton:
+    """Aho–Corasick 多模式匹配自动机"""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[tuple]] = [[]]
+        self._built = False
+
+    def add(self, keyword: str, value=None):
+        """加入一个关键词，value 为命中时返回的附带值"""
+        if not keyword:
+            return
+        state = 0
+        for char in keyword:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((keyword, value))
+        self._built = False
+
+    def build(self) -> "KeywordAutomaton":
+        """按层序计算失败指针，并把失败链上的输出合并到每个状态"""
+        queue = deque(self._goto[0].values())
+        for state in queue:
+            self._fail[state] = 0
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+                queue.append(nxt)
+        self._built = True
+        return self
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, str, object]]:
+        """逐个产出 (结束位置, 关键词, 附带值)"""
+        if not self._built:
+            self.build()
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for keyword, value in out[state]:
+                yield index, keyword, value
+
+    def __len__(self) -> int:
+        return len(self._goto)
+
+
+def load_lexicon(source) -> Dict[str, Dict[str, float]]:
+    """读取词库：类别 -> 关键词列表，或类别 -> {关键词: 权重}
+
+    source 可以是字典，也可以是同样结构的 YAML/JSON 文件路径。
+    """
+    if not source:
+        return {}
+    if isinstance(source, (str, Path)):
+        with open(Path(source).expanduser(), "r", encoding="utf-8") as f:
+            source = yaml.safe_load(f) or {}
+    lexicon = {}
+    for category, keywords in source.items():
+        if isinstance(keywords, Mapping):
+            lexicon[category] = {str(k): float(w) for k, w in keywords.items()}
+        else:
+            lexicon[category] = {str(k): 1.0 for k in keywords or []}
+    return lexicon
+
+
+class KeywordClassifier:
+    """按关键词命中给类别打分
+
+    每次命中为类别加上 关键词权重 × 所在文本片段的倍数；同分时按词库中类别的先后排序。
+    """
+
+    def __init__(self, *lexicons: Mapping[str, Mapping[str, float]]):
+        self.categories: List[str] = []
+        self.automaton = KeywordAutomaton()
+        weights: Dict[Tuple[str, str], float] = {}
+        for lexicon in lexicons:
+            for category, keywords in lexicon.items():
+                if category not in self.categories:
+                    self.categories.append(category)
+                for keyword, weight in keywords.items():
+                    # 同一关键词在后面的词库中再次出现时覆盖权重
+                    weights[(keyword.lower(), category)] = weight
+        for (keyword, category), weight in weights.items():
+            self.automaton.add(keyword, (category, weight))
+        self.automaton.build()
+        self._order = {category: index for index, category in enumerate(self.categories)}
+
+    def score(self, *parts: Tuple[str, float]) -> Dict[str, float]:
+        """parts 为若干 (文本, 倍数)，返回命中类别的得分"""
+        scores: Dict[str, float] = {}
+        for text, multiplier in parts:
+            for _, _, (category, weight) in self.automaton.iter_matches(text.lower()):
+                scores[category] = scores.get(category, 0.0) + weight * multiplier
+        return scores
+
+    def rank(self, *parts: Tuple[str, float]) -> List[Tuple[str, float]]:
+        """按得分从高到低排列的 (类别, 得分)，没有命中时为空列表"""
+        scores = self.score(*parts)
+        return sorted(scores.items(), key=lambda item: (-item[1], self._order[item[0]]))
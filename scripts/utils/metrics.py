@@ -0,0 +1,314 @@
+"""
+运行指标 - 计数器 / 仪表 / 直方图注册表，以 Prometheus 文本格式在本地端口暴露
+
+记录只是带锁的字典累加；Chromium RSS 等需要采集的指标在被抓取时才计算，
+没有人抓取时几乎没有额外开销。
+"""
+
+import asyncio
+import bisect
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import psutil
+except ImportError:  # 可选依赖，缺失时不暴露 Chromium RSS
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+# 秒级步骤耗时的默认分桶
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: dict = {}
+        self._lock = threading.Lock()
+        if not self.labels:
+            self._values[()] = self._initial()
+
+    def _initial(self):
+        return 0
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} 需要标签 {self.labels}，实际为 {tuple(labels)}")
+        return tuple(labels[name] for name in self.labels)
+
+    def samples(self) -> list:
+        """返回 [(后缀, 标签值, 额外标签, 数值)]"""
+        with self._lock:
+            return [("", key, "", value) for key, value in self._values.items()]
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, key, extra, value in self.samples():
+            labels = _format_labels(self.labels, key, extra)
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """只增不减的计数器"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """可增可减的仪表；set_function 注册的函数在被抓取时才求值"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        super().__init__(name, help, labels)
+        self._function = None
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, function):
+        self._function = function
+
+    def samples(self) -> list:
+        if self._function is not None:
+            try:
+                value = self._function()
+            except Exception as e:
+                logger.warning(f"⚠️  采集指标失败: {self.name}, 错误: {e}")
+                return []
+            return [] if value is None else [("", (), "", value)]
+        return super().samples()
+
+
+class Histogram(_Metric):
+    """分桶直方图"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labels)
+
+    def _initial(self):
+        return [[0] * (len(self.buckets) + 1), 0.0, 0]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = self._initial()
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> list:
+        samples = []
+        with self._lock:
+            items = [(key, (list(state[0]), state[1], state[2])) for key, state in self._values.items()]
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                samples.append(("_bucket", key, f'le="{_format_value(bound)}"', cumulative))
+            samples.append(("_sum", key, "", total))
+            samples.append(("_count", key, "", count))
+        return samples
+
+
+class Registry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics: dict = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"指标已注册: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: tuple = ()) -> Counter:
+        return self._register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: tuple = ()) -> Gauge:
+        return self._register(Gauge(name, help, labels))
+
+    def histogram(
+        self, name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def render(self) -> str:
+        """生成 Prometheus 文本格式（0.0.4）"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+JOBS_STARTED = REGISTRY.counter("xhs_jobs_started_total", "开始的发布任务数")
+JOBS_SUCCEEDED = REGISTRY.counter("xhs_jobs_succeeded_total", "发布成功的任务数")
+JOBS_FAILED = REGISTRY.counter("xhs_jobs_failed_total", "发布失败的任务数", ("reason",))
+JOBS_SKIPPED = REGISTRY.counter("xhs_jobs_skipped_total", "发布前被跳过的任务数（如重复图片）", ("reason",))
+NOTES_VERIFIED = REGISTRY.counter("xhs_notes_verified_total", "发布后核验得到最终状态的笔记数", ("state",))
+STEP_SECONDS = REGISTRY.histogram("xhs_step_duration_seconds", "发布流程各步骤耗时", ("step",))
+SELECTOR_LOOKUPS = REGISTRY.counter(
+    "xhs_selector_lookups_total", "按字段统计的选择器命中/未命中", ("field", "result", "selector")
+)
+UPLOAD_BYTES = REGISTRY.counter("xhs_upload_bytes_total", "上传的文件字节数")
+UPLOAD_SECONDS = REGISTRY.histogram("xhs_upload_duration_seconds", "单次上传（选择文件到接口返回）耗时")
+LOGIN_REFRESHES = REGISTRY.counter("xhs_login_refreshes_total", "扫码重新登录次数", ("result",))
+BROWSER_LAUNCHES = REGISTRY.counter("xhs_browser_launches_total", "浏览器启动次数")
+BROWSER_RESTARTS = REGISTRY.counter("xhs_browser_restarts_total", "浏览器重启次数（同一控制器再次启动浏览器）")
+POPUPS_DISMISSED = REGISTRY.counter("xhs_popups_dismissed_total", "自动关闭的遮挡弹窗数")
+CHROMIUM_RSS = REGISTRY.gauge("xhs_chromium_rss_bytes", "Chromium 进程（本进程的子孙进程）常驻内存合计")
+LOOP_LAG = REGISTRY.histogram(
+    "xhs_event_loop_lag_seconds",
+    "asyncio 事件循环调度延迟",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+
+def chromium_rss() -> float:
+    """当前进程所有 Chromium 子孙进程的 RSS 合计（未安装 psutil 时返回 None）"""
+    if psutil is None:
+        return None
+    rss = 0
+    for child in psutil.Process(os.getpid()).children(recursive=True):
+        try:
+            name = child.name().lower()
+            if "chrom" in name or "headless_shell" in name:
+                rss += child.memory_info().rss
+        except psutil.Error:
+            continue
+    return rss
+
+
+CHROMIUM_RSS.set_function(chromium_rss)
+
+
+class LoopLagMonitor:
+    """周期性 sleep 并测量实际唤醒时间与预期的偏差，即事件循环被阻塞的时长"""
+
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self._task: asyncio.Task = None
+
+    def start(self) -> "LoopLagMonitor":
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run(), name="loop-lag-monitor")
+        return self
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            LOOP_LAG.observe(max(0.0, loop.time() - expected))
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+
+class MetricsServer:
+    """在后台线程中以 /metrics 暴露注册表"""
+
+    def __init__(self, registry: Registry = REGISTRY, host: str = "127.0.0.1", port: int = 9464):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server: ThreadingHTTPServer = None
+
+    @classmethod
+    def from_config(cls, options: dict) -> "MetricsServer":
+        """从配置的 metrics 段创建"""
+        return cls(host=options.get("host", "127.0.0.1"), port=options.get("port", 9464))
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/metrics"
+
+    def start(self) -> "MetricsServer":
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                logger.debug(f"metrics {self.address_string()} {format % args}")
+
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                data = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        logger.info(f"📈 指标端点已启动: {self.url}")
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -0,0 +1,159 @@
+"""
+采样分析 - 周期采样事件循环线程的 Python 调用栈，按当前步骤归属
+
+每个样本归为三类之一：
+  cpu   - 事件循环正在执行 Python 代码（内容生成、Pillow、JSON、Playwright 协议处理等）
+  sleep - 循环空闲，任务停在 asyncio.sleep 上（人为延时、固定等待）
+  idle  - 循环空闲，任务在等待其他结果（CDP 调用、网络、页面加载）
+
+输出 collapsed-stack 文件（可用 flamegraph.pl / speedscope 绘制火焰图）和按步骤的耗时汇总。
+"""
+
+import asyncio
+import json
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from .tracing import tracer
+
+IDLE_FUNCTIONS = {"select", "poll", "epoll", "kqueue", "control", "_poll"}
+UNTRACKED = "(untracked)"
+
+
+def _frame_name(code) -> str:
+    module = Path(code.co_filename).stem
+    return f"{module}.{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def _thread_stack(frame) -> list:
+    """线程调用栈，从外到内"""
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame.f_code))
+        frame = frame.f_back
+    names.reverse()
+    return names
+
+
+def _await_chain(task) -> list:
+    """挂起任务的 await 链（协程名，从外到内），用于归属等待时间"""
+    names = []
+    coro = task.get_coro()
+    while coro is not None and len(names) < 64:
+        code = getattr(coro, "cr_code", None) or getattr(coro, "gi_code", None) or getattr(coro, "ag_code", None)
+        if code is None:
+            # 链尾是 Future 等非协程对象，到此为止
+            break
+        names.append(_frame_name(code))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None) or getattr(coro, "ag_await", None)
+    return names
+
+
+class SamplingProfiler:
+    """在后台线程中按固定间隔采样事件循环线程
+
+    需要在事件循环中调用 start()；采样期间开启 tracer.track_active，
+    以便知道每个任务当前所在的步骤。
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.stacks: Counter = Counter()  # collapsed 栈 -> 秒
+        self.steps = defaultdict(Counter)  # 步骤 -> {cpu/idle/sleep: 秒}
+        self.samples = 0
+        self._loop: asyncio.AbstractEventLoop = None
+        self._thread_id: int = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread = None
+        self._started = 0.0
+        self.duration = 0.0
+
+    def start(self) -> "SamplingProfiler":
+        self._loop = asyncio.get_running_loop()
+        self._thread_id = threading.get_ident()
+        tracer.track_active = True
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="xhs-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        tracer.track_active = False
+        self.duration = time.perf_counter() - self._started
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            try:
+                self._sample(now - last)
+            except RuntimeError:
+                # 采样时任务表被事件循环修改，丢弃这个样本
+                pass
+            last = now
+
+    def _sample(self, weight: float):
+        frame = sys._current_frames().get(self._thread_id)
+        if frame is None:
+            return
+        self.samples += 1
+        active = dict(tracer.active)
+        running = asyncio.current_task(self._loop)
+
+        if running is not None or frame.f_code.co_name not in IDLE_FUNCTIONS:
+            span = active.get(running) if running is not None else None
+            step = (span.step if span else None) or UNTRACKED
+            self._add(step, "cpu", _thread_stack(frame), weight)
+            return
+
+        # 循环空闲：每个处于步骤中的挂起任务都记一次等待
+        waiting = [(task, span) for task, span in active.items() if isinstance(task, asyncio.Task)]
+        if not waiting:
+            self._add(UNTRACKED, "idle", [], weight)
+            return
+        for task, span in waiting:
+            chain = _await_chain(task)
+            state = "sleep" if chain and chain[-1] == "tasks.sleep" else "idle"
+            self._add(span.step or UNTRACKED, state, chain, weight)
+
+    def _add(self, step: str, state: str, stack: list, weight: float):
+        self.steps[step][state] += weight
+        self.stacks[";".join([step, f"[{state}]"] + stack)] += weight
+
+    def summary(self) -> dict:
+        steps = {}
+        for step, states in sorted(self.steps.items(), key=lambda item: -sum(item[1].values())):
+            steps[step] = {state: round(states.get(state, 0.0), 4) for state in ("cpu", "idle", "sleep")}
+        return {
+            "interval": self.interval,
+            "samples": self.samples,
+            "duration": round(self.duration, 4),
+            "steps": steps,
+        }
+
+    def write(self, prefix) -> tuple:
+        """写出 <prefix>.collapsed（毫秒为单位的样本权重）和 <prefix>.summary.json"""
+        prefix = Path(prefix).expanduser()
+        prefix.parent.mkdir(parents=True, exist_ok=True)
+        collapsed = prefix.with_name(prefix.name + ".collapsed")
+        with open(collapsed, "w", encoding="utf-8") as f:
+            for stack, seconds in self.stacks.most_common():
+                f.write(f"{stack} {max(1, round(seconds * 1000))}\n")
+        summary = prefix.with_name(prefix.name + ".summary.json")
+        summary.write_text(json.dumps(self.summary(), ensure_ascii=False, indent=2), encoding="utf-8")
+        return collapsed, summary
+
+    def format_summary(self) -> str:
+        lines = [f"{'步骤':<22}{'cpu':>10}{'idle':>10}{'sleep':>10}"]
+        for step, states in self.summary()["steps"].items():
+            lines.append(
+                f"{step:<24}{states['cpu']:>9.2f}s{states['idle']:>9.2f}s{states['sleep']:>9.2f}s"
+            )
+        return "\n".join(lines)
@@ -0,0 +1,101 @@
+"""
+文案模板引擎 - 模板在加载时编译一次为渲染函数，渲染时只求值被选中模板用到的槽位
+
+模板语法与 str.format 相同（只支持 {name} 形式的槽位），编译时检查槽位是否在声明的集合内；
+槽位的值由 SlotValues 按需求值并缓存，未被选中的模板和用不到的槽位都不会产生任何开销。
+"""
+
+import random
+from string import Formatter
+from typing import Callable, Dict, Iterable, List, Mapping
+
+_FORMATTER = Formatter()
+
+
+class Template:
+    """编译后的单个模板：预先切分好的字面量与槽位"""
+
+    __slots__ = ("source", "slots", "render")
+
+    def __init__(self, source: str, declared: Iterable[str] = None):
+        self.source = source
+        literals: List[str] = [""]
+        slots: List[str] = []
+        for literal, field, spec, conversion in _FORMATTER.parse(source):
+            literals[-1] += literal
+            if field is None:
+                continue
+            if not field.isidentifier() or spec or conversion:
+                raise ValueError(f"模板槽位只支持 {{name}} 形式: {source!r}")
+            slots.append(field)
+            literals.append("")
+
+        if declared is not None:
+            unknown = set(slots) - set(declared)
+            if unknown:
+                raise ValueError(f"模板使用了未声明的槽位 {sorted(unknown)}: {source!r}")
+
+        self.slots = tuple(dict.fromkeys(slots))
+        self.render = self._build(literals, slots)
+
+    @staticmethod
+    def _build(literals: List[str], slots: List[str]) -> Callable[[Mapping], str]:
+        if not slots:
+            text = literals[0]
+            return lambda values: text
+        head, pairs = literals[0], tuple(zip(slots, literals[1:]))
+
+        def render(values: Mapping) -> str:
+            parts = [head]
+            for slot, literal in pairs:
+                parts.append(values[slot])
+                parts.append(literal)
+            return "".join(parts)
+
+        return render
+
+    def __repr__(self) -> str:
+        return f"Template({self.source!r})"
+
+
+class TemplateLibrary:
+    """按类别组织的一组已编译模板，类别缺失时回退到默认类别"""
+
+    def __init__(self, templates: Mapping[str, List[str]], slots: Iterable[str], default: str):
+        slots = tuple(slots)
+        self.slots = slots
+        self.default = default
+        self.templates: Dict[str, List[Template]] = {
+            category: [Template(source, slots) for source in sources]
+            for category, sources in templates.items()
+        }
+
+    def choices(self, category: str) -> List[Template]:
+        return self.templates.get(category) or self.templates[self.default]
+
+    def render(self, category: str, values: Mapping, rng=random) -> str:
+        """随机选择一个模板并只渲染它"""
+        return rng.choice(self.choices(category)).render(values)
+
+
+class SlotValues(dict):
+    """按需求值的槽位表：第一次访问时调用对应的提供函数，结果在本次生成中缓存
+
+    providers 中的值可以是字符串（直接使用）、列表/元组（随机取一个）或无参函数。
+    """
+
+    def __init__(self, providers: Mapping, rng=random):
+        super().__init__()
+        self.providers = providers
+        self.rng = rng
+
+    def __missing__(self, slot: str) -> str:
+        provider = self.providers[slot]
+        if callable(provider):
+            value = provider()
+        elif isinstance(provider, (list, tuple)):
+            value = self.rng.choice(provider)
+        else:
+            value = provider
+        self[slot] = value
+        return value
@@ -0,0 +1,34 @@
+"""
+步骤计时 - 记录发布流程中各步骤的耗时
+"""
+
+import time
+from contextlib import contextmanager
+
+from .metrics import STEP_SECONDS
+from .tracing import tracer
+
+
+class StepTimer:
+    """按步骤名累计耗时（秒），同名步骤多次执行时累加
+
+    每个步骤同时是一个追踪区间，启用追踪后会出现在导出的时间线上；
+    耗时同时计入 xhs_step_duration_seconds 直方图。
+    """
+
+    def __init__(self):
+        self.durations: dict = {}
+
+    @contextmanager
+    def step(self, name: str):
+        start = time.perf_counter()
+        try:
+            with tracer.span(name, "step"):
+                yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.durations[name] = self.durations.get(name, 0.0) + elapsed
+            STEP_SECONDS.observe(elapsed, step=name)
+
+    def reset(self):
+        self.durations = {}
@@ -0,0 +1,230 @@
+"""
+调用链追踪 - 嵌套计时区间（任务 → 步骤 → 浏览器调用），导出为 Chrome Trace Event JSON
+
+导出的文件可直接在 Perfetto (https://ui.perfetto.dev) 或 chrome://tracing 中打开。
+"""
+
+import asyncio
+import functools
+import json
+import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+# 视为"步骤"的区间类别：日志的 step 字段、采样分析的归属都取最近的这类区间
+STEP_CATEGORIES = ("step", "login", "prefetch")
+
+
+@dataclass
+class Span:
+    """一个计时区间；parent 指向外层区间，用于还原 任务 → 步骤 → 调用 的层级"""
+
+    name: str
+    cat: str
+    start: float
+    parent: Optional["Span"] = None
+    args: dict = field(default_factory=dict)
+
+    @property
+    def path(self) -> str:
+        """从最外层到当前区间的名称路径，如 publish_job/upload/find_first"""
+        names = []
+        span = self
+        while span is not None:
+            names.append(span.name)
+            span = span.parent
+        return "/".join(reversed(names))
+
+    @property
+    def step(self) -> Optional[str]:
+        """所属步骤：自身或最近的步骤类外层区间的名称"""
+        span = self
+        while span is not None:
+            if span.cat in STEP_CATEGORIES:
+                return span.name
+            span = span.parent
+        return None
+
+    def root(self) -> "Span":
+        span = self
+        while span.parent is not None:
+            span = span.parent
+        return span
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("xhs_current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    """当前协程/线程所在的最内层区间（未在任何区间内时为 None）"""
+    return _current_span.get()
+
+
+class Tracer:
+    """记录计时区间的追踪器
+
+    区间层级始终通过 contextvars 维护（开销极小，日志、指标等可据此获知当前步骤）；
+    只有 enabled 时才记录事件用于导出。每个 asyncio 任务对应时间线上的一条轨道，
+    并发的预热页面、多账号任务不会叠在同一轨道上。
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.track_active = False  # 采样分析期间记录每个任务当前所在的区间
+        self.events: list = []
+        self.active: dict = {}
+        self._lanes = weakref.WeakKeyDictionary()
+        self._lane_names: dict = {}
+        self._lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def reset(self):
+        with self._lock:
+            self.events = []
+            self._lanes = weakref.WeakKeyDictionary()
+            self._lane_names = {}
+
+    @staticmethod
+    def _owner():
+        """当前 asyncio 任务，不在事件循环中时为当前线程"""
+        try:
+            owner = asyncio.current_task()
+        except RuntimeError:
+            owner = None
+        return owner if owner is not None else threading.current_thread()
+
+    def _lane(self) -> int:
+        """当前 asyncio 任务（或线程）对应的轨道编号"""
+        owner = self._owner()
+        with self._lock:
+            lane = self._lanes.get(owner)
+            if lane is None:
+                lane = len(self._lane_names) + 1
+                self._lanes[owner] = lane
+                name = owner.get_name() if isinstance(owner, asyncio.Task) else owner.name
+                self._lane_names[lane] = name
+            return lane
+
+    @contextmanager
+    def span(self, name: str, cat: str = "step", **args):
+        """计时区间上下文管理器，可在同步和异步代码中嵌套使用"""
+        span = Span(name, cat, time.perf_counter(), _current_span.get(), args)
+        token = _current_span.set(span)
+        owner = self._owner() if self.track_active else None
+        if owner is not None:
+            previous = self.active.get(owner)
+            self.active[owner] = span
+        try:
+            yield span
+        except BaseException as e:
+            span.args["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            if owner is not None:
+                if previous is not None:
+                    self.active[owner] = previous
+                else:
+                    self.active.pop(owner, None)
+            if self.enabled:
+                self._record(span, time.perf_counter())
+
+    def _record(self, span: Span, end: float):
+        event = {
+            "name": span.name,
+            "cat": span.cat,
+            "ph": "X",
+            "ts": span.start * 1e6,
+            "dur": (end - span.start) * 1e6,
+            "pid": os.getpid(),
+            "tid": self._lane(),
+        }
+        if span.args:
+            event["args"] = {k: _jsonable(v) for k, v in span.args.items()}
+        with self._lock:
+            self.events.append(event)
+
+    def instant(self, name: str, cat: str = "event", **args):
+        """记录一个瞬时事件（如弹窗被关闭、登录被重定向）"""
+        if not self.enabled:
+            return
+        event = {
+            "name": name,
+            "cat": cat,
+            "ph": "i",
+            "s": "t",
+            "ts": time.perf_counter() * 1e6,
+            "pid": os.getpid(),
+            "tid": self._lane(),
+        }
+        if args:
+            event["args"] = {k: _jsonable(v) for k, v in args.items()}
+        with self._lock:
+            self.events.append(event)
+
+    def to_chrome_trace(self) -> dict:
+        """生成 Chrome Trace Event 格式的数据"""
+        pid = os.getpid()
+        with self._lock:
+            metadata = [
+                {"name": "process_name", "ph": "M", "pid": pid, "args": {"name": "xiaohongshu-publisher"}}
+            ]
+            metadata += [
+                {"name": "thread_name", "ph": "M", "pid": pid, "tid": lane, "args": {"name": name}}
+                for lane, name in self._lane_names.items()
+            ]
+            events = sorted(self.events, key=lambda e: e["ts"])
+        return {"traceEvents": metadata + events, "displayTimeUnit": "ms"}
+
+    def export(self, path) -> Path:
+        """写出 Chrome Trace JSON 文件"""
+        path = Path(path).expanduser()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f, ensure_ascii=False)
+        return path
+
+
+def _jsonable(value):
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    return str(value)
+
+
+tracer = Tracer()
+
+
+def traced(name: str = None, cat: str = "browser"):
+    """把协程方法包在一个计时区间里，区间名默认取方法名
+
+    方法的首个参数是字符串或列表（选择器、URL、文本）时记入区间参数 target。
+    """
+
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            target = args[1] if len(args) > 1 else None
+            if isinstance(target, (str, list)):
+                span_args = {"target": str(target)[:200]}
+            else:
+                span_args = {}
+            with tracer.span(span_name, cat, **span_args):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
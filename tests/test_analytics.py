@@ -0,0 +1,102 @@
+"""
+创作者数据同步：字段归一化、游标回退与增量追加
+"""
+
+import asyncio
+
+import pytest
+
+from scripts.core.analytics import AnalyticsStore, AnalyticsSync, row_hash
+
+HOUR = 3600 * 1000
+CONFIG = {
+    "platform": {"creator_url": "http://mock"},
+    "api": {"note_analytics": "/list"},
+    "analytics": {"page_size": 10, "concurrency": 3, "overlap": 3600},
+}
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.status = 200
+        self._data = data
+
+    async def json(self):
+        return self._data
+
+
+class FakeRequest:
+    """按更新时间倒序分页的数据中心接口"""
+
+    def __init__(self, notes):
+        self.notes = notes
+        self.pages = []
+
+    async def get(self, url, params, timeout):
+        page, size = params["page"], params["page_size"]
+        self.pages.append(page)
+        rows = sorted(self.notes.values(), key=lambda n: -n["update_time"])
+        data = {"notes": rows[(page - 1) * size : page * size], "total": len(rows), "page_size": size}
+        return FakeResponse({"success": True, "code": 0, "data": data})
+
+
+def note(number, update_time, views=10):
+    return {
+        "id": f"n{number}",
+        "title": f"笔记 {number}",
+        "publish_time": update_time - HOUR,
+        "update_time": update_time,
+        "view_count": views,
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = AnalyticsStore(tmp_path / "analytics.sqlite3")
+    yield store
+    store.close()
+
+
+def test_normalize_coerces_nulls():
+    row = AnalyticsSync._normalize(
+        "acc", {"id": "n1", "title": "标题", "update_time": None, "like_count": "3"}, "2026-01-01T00:00:00"
+    )
+    assert row["note_id"] == "n1"
+    assert row["updated_at"] == 0 and row["published_at"] == 0
+    assert (row["views"], row["likes"], row["shares"]) == (0, 3, 0)
+    assert row["row_hash"] == row_hash(row)
+    assert row["account"] == "acc" and row["synced_at"] == "2026-01-01T00:00:00"
+
+
+def test_incremental_sync_with_overlap(store):
+    now = 1_000 * HOUR
+    notes = {f"n{i}": note(i, now - i * HOUR) for i in range(50)}
+    request = FakeRequest(notes)
+    sync = AnalyticsSync(request, CONFIG, store)
+
+    first = asyncio.run(sync.sync("acc"))
+    assert (first["pages"], first["fetched"], first["appended"]) == (5, 50, 50)
+    assert first["cursor"] == now
+    assert store.cursor("acc") == now
+
+    # 一条笔记数据变化（更新时间推进），一条在游标回退窗口内但没有变化
+    notes["n5"] = note(5, now + HOUR, views=99)
+    request.pages.clear()
+    second = asyncio.run(sync.sync("acc"))
+
+    assert request.pages == [1]  # 第一页就翻到了游标之前
+    assert second["fetched"] == 3  # n5，以及回退窗口（游标前 1 小时）内的 n0、n1
+    assert second["appended"] == 1
+    assert second["cursor"] == now + HOUR
+    latest = {row["note_id"]: row for row in store.latest("acc")}
+    assert latest["n5"]["views"] == 99
+    assert len(latest) == 50
+
+
+def test_unchanged_resync_appends_nothing(store):
+    notes = {f"n{i}": note(i, (100 - i) * HOUR) for i in range(12)}
+    sync = AnalyticsSync(FakeRequest(notes), CONFIG, store)
+    asyncio.run(sync.sync("acc"))
+    assert asyncio.run(sync.sync("acc"))["appended"] == 0
+    count = store.conn.execute("SELECT COUNT(*) FROM note_stats").fetchone()[0]
+    assert count == 12
@@ -0,0 +1,72 @@
+"""
+感知哈希和多索引哈希检索
+"""
+
+import random
+
+import pytest
+from PIL import Image, ImageDraw
+
+from scripts.core.image_index import ImageHashIndex, MultiIndexHash, hamming, image_hashes
+
+
+def flip(value: int, bits, rng: random.Random) -> int:
+    for bit in rng.sample(range(64), bits):
+        value ^= 1 << bit
+    return value
+
+
+@pytest.mark.parametrize("radius", [0, 3, 6, 10])
+def test_search_finds_exactly_the_items_within_radius(radius):
+    rng = random.Random(radius)
+    index = MultiIndexHash()
+    base = rng.getrandbits(64)
+    values = [rng.getrandbits(64) for _ in range(2000)]
+    values += [flip(base, bits, rng) for bits in range(0, 16)]
+    for number, value in enumerate(values):
+        index.add(value, number)
+
+    found = {item: distance for distance, item in index.search(base, radius)}
+
+    expected = {number for number, value in enumerate(values) if hamming(base, value) <= radius}
+    assert set(found) == expected
+    assert all(found[n] == hamming(base, values[n]) for n in found)
+    assert len(index) == len(values)
+
+
+def test_search_yields_each_item_once():
+    index = MultiIndexHash()
+    index.add(0, "zero")  # 四段都与查询相同，四张表都会命中
+    assert list(index.search(0, 8)) == [(0, "zero")]
+
+
+def poster(path, color, shift=0):
+    image = Image.new("RGB", (240, 320), color)
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((20 + shift, 40, 140 + shift, 200), fill=(250, 250, 250))
+    draw.ellipse((120, 180, 220, 300), fill=(30, 30, 30))
+    image.save(path)
+    return path
+
+
+def test_index_round_trip(tmp_path):
+    original = poster(tmp_path / "a.png", (200, 80, 60))
+    other = tmp_path / "b.png"
+    stripes = Image.new("RGB", (240, 320), (0, 0, 0))
+    draw = ImageDraw.Draw(stripes)
+    for x in range(0, 240, 20):
+        draw.line((x, 0, 240 - x, 320), fill=(255, 255, 255), width=6)
+    stripes.save(other)
+
+    index_file = tmp_path / "index.jsonl"
+    index = ImageHashIndex(index_file)
+    index.add(image_hashes(original), path=str(original))
+
+    # 缩放 + 重新压缩的同一张图
+    copy = tmp_path / "copy.jpg"
+    Image.open(original).resize((120, 160)).convert("RGB").save(copy, quality=70)
+    reloaded = ImageHashIndex(index_file)
+    matches = reloaded.find(image_hashes(copy))
+    assert [m["path"] for m in matches] == [str(original)]
+    assert reloaded.find(image_hashes(other)) == []
+    assert len(reloaded) == 1
@@ -0,0 +1,75 @@
+"""
+Aho–Corasick 关键词自动机和类别打分
+"""
+
+import pytest
+
+from scripts.utils.keywords import KeywordAutomaton, KeywordClassifier, load_lexicon
+
+
+def automaton(*keywords):
+    machine = KeywordAutomaton()
+    for keyword in keywords:
+        machine.add(keyword, keyword.upper())
+    return machine
+
+
+def test_overlapping_matches():
+    machine = automaton("he", "she", "his", "hers")
+    matches = list(machine.iter_matches("ushers"))
+    assert sorted((end, keyword) for end, keyword, _ in matches) == [(3, "he"), (3, "she"), (5, "hers")]
+    assert {value for _, _, value in matches} == {"HE", "SHE", "HERS"}
+
+
+def test_chinese_keywords_and_repeats():
+    machine = automaton("美食", "食谱", "甜品")
+    keywords = [keyword for _, keyword, _ in machine.iter_matches("美食谱和甜品，美食")]
+    assert keywords == ["美食", "食谱", "甜品", "美食"]
+
+
+def test_matches_agree_with_brute_force():
+    keywords = ["a", "ab", "bab", "bc", "bca", "c", "caa"]
+    text = "abccab" * 3 + "bcaab"
+    machine = automaton(*keywords)
+    expected = sorted(
+        (start + len(k) - 1, k) for k in keywords for start in range(len(text)) if text.startswith(k, start)
+    )
+    assert sorted((end, k) for end, k, _ in machine.iter_matches(text)) == expected
+
+
+def test_add_after_build_rebuilds():
+    machine = automaton("猫")
+    assert [k for _, k, _ in machine.iter_matches("猫狗")] == ["猫"]
+    machine.add("狗")
+    assert [k for _, k, _ in machine.iter_matches("猫狗")] == ["猫", "狗"]
+    machine.add("")  # 空关键词忽略
+    assert [k for _, k, _ in machine.iter_matches("")] == []
+
+
+def test_classifier_ranking():
+    classifier = KeywordClassifier(
+        load_lexicon({"美食": ["美食", "火锅"], "旅行": {"旅行": 2, "火锅": 0.5}, "日常": ["日常"]})
+    )
+    ranking = classifier.rank(("周末火锅", 1.0), ("美食 旅行 vlog", 2.0))
+    assert ranking == [("旅行", 4.5), ("美食", 3.0)]
+    assert classifier.rank(("什么都没有", 1.0)) == []
+
+
+def test_classifier_ties_follow_lexicon_order_and_overrides():
+    classifier = KeywordClassifier(
+        load_lexicon({"甲": ["共同"], "乙": ["共同"]}), load_lexicon({"乙": {"Extra": 3}})
+    )
+    assert classifier.rank(("共同", 1.0)) == [("甲", 1.0), ("乙", 1.0)]
+    assert classifier.rank(("EXTRA 共同", 1.0))[0] == ("乙", 4.0)  # 不区分大小写，后面的词库可追加/覆盖
+
+
+def test_load_lexicon_from_file(tmp_path):
+    path = tmp_path / "lexicon.yaml"
+    path.write_text("风景:\n  - 日落\n人像:\n  自拍: 1.5\n", encoding="utf-8")
+    assert load_lexicon(str(path)) == {"风景": {"日落": 1.0}, "人像": {"自拍": 1.5}}
+    assert load_lexicon(None) == {}
+
+
+@pytest.mark.parametrize("text", ["", "无关文本"])
+def test_classifier_no_hits(text):
+    assert KeywordClassifier(load_lexicon({"美食": ["火锅"]})).score((text, 1.0)) == {}
@@ -0,0 +1,90 @@
+"""
+发布账本：幂等占用、只追加、最新状态
+"""
+
+import sqlite3
+import threading
+
+import pytest
+
+from scripts.core import ledger as publish_ledger
+from scripts.core.ledger import PublishLedger
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = PublishLedger(tmp_path / "ledger.sqlite3")
+    yield ledger
+    ledger.close()
+
+
+def test_claim_race_has_one_winner(tmp_path):
+    path = tmp_path / "ledger.sqlite3"
+    PublishLedger(path).conn  # 先建表，避免并发建表
+    workers = 8
+    barrier = threading.Barrier(workers)
+    results = []
+
+    def worker(number):
+        ledger = PublishLedger(path)
+        barrier.wait()
+        results.append(ledger.claim("key", job_id=f"job-{number}"))
+        ledger.close()
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    winners = [r for r in results if r is None]
+    assert len(winners) == 1
+    assert all(r["state"] == publish_ledger.SUBMITTING for r in results if r is not None)
+    assert len(PublishLedger(path).history("key")) == 1
+
+
+def test_ledger_is_append_only(ledger):
+    ledger.record("key", publish_ledger.PUBLISHED, note_id="n1")
+    with pytest.raises(sqlite3.DatabaseError, match="append-only"):
+        ledger.conn.execute("UPDATE publish_ledger SET state = 'failed'")
+    with pytest.raises(sqlite3.DatabaseError, match="append-only"):
+        ledger.conn.execute("DELETE FROM publish_ledger")
+    assert ledger.latest("key")["state"] == publish_ledger.PUBLISHED
+
+
+def test_record_keeps_fields_and_history(ledger):
+    assert ledger.claim("key", account="a", content_hash="c1", title="标题") is None
+    ledger.record("key", publish_ledger.FAILED, error="超时")
+    ledger.record("key", publish_ledger.PUBLISHED, note_id="n1")
+
+    latest = ledger.latest("key")
+    assert [e["state"] for e in ledger.history("key")] == ["submitting", "failed", "published"]
+    assert (latest["account"], latest["title"], latest["note_id"]) == ("a", "标题", "n1")
+    assert latest["error"] is None  # error 不沿用
+
+
+def test_blocking_states(ledger):
+    ledger.record("failed", publish_ledger.FAILED)
+    assert ledger.claim("failed") is None  # 失败后可以重试
+
+    for state in (publish_ledger.PUBLISHED, publish_ledger.DELETED):
+        ledger.record(state, state)
+        assert ledger.claim(state)["state"] == state
+
+    ledger.record("rejected", publish_ledger.REJECTED, content_hash="old")
+    assert ledger.claim("rejected", content_hash="old") is not None
+    assert ledger.claim("rejected") is not None
+    assert ledger.claim("rejected", content_hash="new") is None  # 改稿后放行
+
+
+def test_latest_states(ledger):
+    ledger.record("a", publish_ledger.SUBMITTING, account="x")
+    ledger.record("a", publish_ledger.PUBLISHED, note_id="n1")
+    ledger.record("b", publish_ledger.PUBLISHED, account="y", note_id="n2")
+    ledger.record("c", publish_ledger.PUBLISHED, account="x", note_id="n3")
+    ledger.record("c", publish_ledger.APPROVED)
+
+    assert [e["idempotency_key"] for e in ledger.latest_states()] == ["a", "b", "c"]
+    assert [e["idempotency_key"] for e in ledger.latest_states([publish_ledger.PUBLISHED])] == ["a", "b"]
+    assert [e["note_id"] for e in ledger.latest_states([publish_ledger.PUBLISHED], "x")] == ["n1"]
+    assert ledger.latest_states([publish_ledger.SUBMITTING]) == []
@@ -0,0 +1,78 @@
+"""
+指标注册表的 Prometheus 文本输出
+"""
+
+import urllib.request
+
+import pytest
+
+from scripts.utils.metrics import MetricsServer, Registry
+
+
+def test_counter_render():
+    registry = Registry()
+    jobs = registry.counter("jobs_total", "任务数")
+    failed = registry.counter("failed_total", "失败数", ("reason",))
+    jobs.inc()
+    jobs.inc(2)
+    failed.inc(reason='upload "5xx"\n')
+
+    assert registry.render() == (
+        "# HELP jobs_total 任务数\n"
+        "# TYPE jobs_total counter\n"
+        "jobs_total 3\n"
+        "# HELP failed_total 失败数\n"
+        "# TYPE failed_total counter\n"
+        'failed_total{reason="upload \\"5xx\\"\\n"} 1\n'
+    )
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    step = registry.histogram("step_seconds", "步骤耗时", ("step",), buckets=(1, 0.1))
+    for value in (0.05, 0.5, 0.5, 3):
+        step.observe(value, step="upload")
+
+    lines = registry.render().splitlines()
+    assert lines[1] == "# TYPE step_seconds histogram"
+    assert lines[2:] == [
+        'step_seconds_bucket{step="upload",le="0.1"} 1',
+        'step_seconds_bucket{step="upload",le="1"} 3',
+        'step_seconds_bucket{step="upload",le="+Inf"} 4',
+        'step_seconds_sum{step="upload"} 4.05',
+        'step_seconds_count{step="upload"} 4',
+    ]
+
+
+def test_gauge_function_and_failures():
+    registry = Registry()
+    rss = registry.gauge("rss_bytes", "内存")
+    rss.set_function(lambda: 1024)
+    assert registry.render().splitlines()[-1] == "rss_bytes 1024"
+
+    # 采集不到（None）或采集出错时只输出元信息，不输出样本
+    for function in (lambda: None, lambda: 1 / 0):
+        rss.set_function(function)
+        assert registry.render().splitlines()[-1] == "# TYPE rss_bytes gauge"
+
+
+def test_labels_are_checked_and_names_unique():
+    registry = Registry()
+    counter = registry.counter("c_total", "计数", ("state",))
+    with pytest.raises(ValueError):
+        counter.inc(reason="x")
+    with pytest.raises(ValueError):
+        registry.counter("c_total", "重复")
+
+
+def test_metrics_endpoint():
+    registry = Registry()
+    registry.counter("up_total", "在线").inc()
+    server = MetricsServer(registry, port=0).start()
+    try:
+        with urllib.request.urlopen(server.url, timeout=5) as response:
+            body = response.read().decode("utf-8")
+        assert response.status == 200
+        assert "up_total 1" in body
+    finally:
+        server.stop()
@@ -0,0 +1,95 @@
+"""
+模拟创作平台的接口状态码
+"""
+
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from scripts.mock_site import MockCreatorSite
+from scripts.mock_site.server import SESSION_COOKIE
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+_opener = urllib.request.build_opener(_NoRedirect)
+
+
+@pytest.fixture(scope="module")
+def site():
+    site = MockCreatorSite(upload_latency=0, analytics_latency=0, review_delay=60).start()
+    yield site
+    site.stop()
+
+
+def request(site, path, method="GET", body=None, session="mock-test"):
+    """返回 (状态码, 响应头, 响应体)"""
+    req = urllib.request.Request(site.url + path, data=body, method=method)
+    if session:
+        req.add_header("Cookie", f"{SESSION_COOKIE}={session}")
+    try:
+        with _opener.open(req, timeout=5) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+def test_publish_page_redirects_to_login_without_session(site):
+    status, headers, _ = request(site, "/publish/publish", session=None)
+    assert status == 302
+    assert headers["Location"] == "/login"
+
+
+def test_publish_page_with_session(site):
+    status, _, body = request(site, "/publish/publish?from=menu&target=image")
+    assert status == 200
+    assert b"<html" in body.lower()
+
+
+def test_unknown_path_is_404(site):
+    assert request(site, "/nope")[0] == 404
+
+
+def test_publish_and_status(site):
+    payload = json.dumps({"title": "标题", "desc": "正文"}).encode("utf-8")
+    status, _, body = request(site, "/web_api/sns/v2/note", "POST", payload)
+    assert status == 200
+    note_id = json.loads(body)["data"]["id"]
+
+    status, _, body = request(site, f"/web_api/sns/v2/note/{note_id}")
+    assert status == 200
+    assert json.loads(body)["data"]["status"] == "reviewing"
+    assert request(site, "/web_api/sns/v2/note/missing")[0] == 404
+
+
+@pytest.mark.parametrize("body", [b"{not json", b"[1, 2]"])
+def test_malformed_publish_body_is_400(site, body):
+    status, _, data = request(site, "/web_api/sns/v2/note", "POST", body)
+    assert status == 400
+    assert json.loads(data)["success"] is False
+
+
+def test_expired_session_is_401(site):
+    site.revoked.add("mock-expired")
+    assert request(site, "/web_api/sns/v2/note", "POST", b"{}", session="mock-expired")[0] == 401
+    assert request(site, "/api/galaxy/creator/datacenter/note/list", session="mock-expired")[0] == 401
+
+
+@pytest.mark.parametrize("query", ["page=abc", "page_size=x"])
+def test_non_numeric_paging_is_400(site, query):
+    assert request(site, f"/api/galaxy/creator/datacenter/note/list?{query}")[0] == 400
+
+
+def test_analytics_page_size_is_capped(site):
+    site.seed_history(60)
+    status, _, body = request(site, "/api/galaxy/creator/datacenter/note/list?page=1&page_size=500")
+    data = json.loads(body)["data"]
+    assert status == 200
+    assert data["page_size"] == 50
+    assert len(data["notes"]) == 50
+    assert data["total"] == len(site.list_notes())
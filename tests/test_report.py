@@ -0,0 +1,67 @@
+"""
+运行报告：区间归入任务、结果文件读取
+"""
+
+import json
+
+from scripts.bench.report import group_jobs, load_results
+
+
+def span(name, ts, dur, tid=1, **args):
+    return {"name": name, "ph": "X", "pid": 1, "tid": tid, "ts": ts, "dur": dur, "args": args}
+
+
+def test_group_jobs_nesting():
+    events = [
+        span("upload", 20, 30),
+        span("publish_job", 0, 100),
+        span("publish_note", 5, 90, job_id="job-a"),
+        span("navigation", 10, 5),
+        span("publish_job", 200, 50),
+        span("title", 210, 10),
+        span("late", 240, 30),  # 超出任务结束时间
+        span("other_lane", 10, 5, tid=2),  # 没有任务的轨道
+    ]
+
+    first, second = group_jobs(events)
+
+    assert first["job_id"] == "job-a"  # 内层 publish_note 提供 job_id，不单独成为任务
+    assert first["duration"] == 100 / 1e6
+    assert [e["name"] for e in first["spans"]] == ["navigation", "upload"]
+    assert second["job_id"] == "job-2"
+    assert [e["name"] for e in second["spans"]] == ["title"]
+
+
+def test_group_jobs_per_lane():
+    events = [span("publish_job", 0, 100, tid=1), span("publish_job", 50, 100, tid=2), span("upload", 60, 10, tid=2)]
+
+    jobs = {job["root"]["tid"]: job for job in group_jobs(events)}
+
+    assert len(jobs) == 2
+    assert jobs[1]["spans"] == []
+    assert [e["name"] for e in jobs[2]["spans"]] == ["upload"]
+
+
+def test_load_results_formats(tmp_path):
+    runs = [{"job_id": "a", "success": True}, {"job_id": "b", "success": False}]
+    events = [
+        {"event": "job_started", "job_id": "a"},
+        {"event": "job_finished", "job_id": "a", "success": True},
+    ]
+
+    bench = tmp_path / "latency.json"
+    bench.write_text(json.dumps({"runs": runs}), encoding="utf-8")
+    plain = tmp_path / "runs.json"
+    plain.write_text(json.dumps(runs), encoding="utf-8")
+    log = tmp_path / "events.log"
+    log.write_text("\n".join(json.dumps(e) for e in events), encoding="utf-8")
+    single = tmp_path / "single.jsonl"
+    single.write_text(json.dumps(events[1]) + "\n", encoding="utf-8")
+    single_log = tmp_path / "single.log"
+    single_log.write_text(json.dumps(events[1]) + "\n", encoding="utf-8")
+
+    assert set(load_results(bench)) == {"a", "b"}
+    assert set(load_results(plain)) == {"a", "b"}
+    assert load_results(log) == {"a": events[1]}
+    assert load_results(single) == {"a": events[1]}
+    assert load_results(single_log) == {"a": events[1]}
@@ -0,0 +1,60 @@
+"""
+模板编译和槽位填充
+"""
+
+import random
+
+import pytest
+
+from scripts.utils.templates import SlotValues, Template, TemplateLibrary
+
+
+def test_compile_and_render():
+    template = Template("{mood}的{theme}，{mood}！", ["mood", "theme", "unused"])
+    assert template.slots == ("mood", "theme")
+    assert template.render({"mood": "治愈", "theme": "日落"}) == "治愈的日落，治愈！"
+
+
+def test_literal_template_and_escaped_braces():
+    assert Template("没有槽位").render({}) == "没有槽位"
+    assert Template("{{字面}} {name}").render({"name": "值"}) == "{字面} 值"
+
+
+@pytest.mark.parametrize("source", ["{name:>10}", "{name!r}", "{items[0]}", "{a.b}"])
+def test_only_plain_slots(source):
+    with pytest.raises(ValueError):
+        Template(source)
+
+
+def test_undeclared_slot():
+    with pytest.raises(ValueError, match="未声明"):
+        Template("{mood}{typo}", ["mood"])
+
+
+def test_slot_values_are_lazy_and_cached():
+    calls = []
+    values = SlotValues(
+        {
+            "fixed": "固定",
+            "choice": ["甲", "乙", "丙"],
+            "computed": lambda: calls.append(1) or "算出",
+            "never": lambda: pytest.fail("用不到的槽位不应求值"),
+        },
+        random.Random(0),
+    )
+    template = Template("{fixed}{choice}{computed}{choice}{computed}")
+
+    text = template.render(values)
+
+    choice = text[2]
+    assert choice in "甲乙丙"
+    assert text == f"固定{choice}算出{choice}算出"  # 同一次生成中槽位值不变
+    assert calls == [1]
+
+
+def test_library_falls_back_to_default_category():
+    library = TemplateLibrary({"日常": ["{mood}日常"], "美食": ["{dish}好吃"]}, ["mood", "dish"], "日常")
+    assert library.render("美食", {"dish": "火锅"}) == "火锅好吃"
+    assert library.render("未知", {"mood": "开心"}) == "开心日常"
+    with pytest.raises(ValueError):
+        TemplateLibrary({"日常": ["{other}"]}, ["mood"], "日常")
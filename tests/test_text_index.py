@@ -0,0 +1,49 @@
+"""
+文案 SimHash 索引的记录与查找
+"""
+
+from scripts.core.text_index import TextSimilarityIndex, simhash
+
+TITLE = "周末去海边看日落｜治愈系vlog"
+BODY = "傍晚的海风很温柔，沙滩上的人不多，坐在礁石上看着太阳一点点沉下去，整个人都放松了。推荐大家找个晴天来试试。"
+
+
+def test_simhash_ignores_punctuation_and_case():
+    assert simhash("Hello, 世界！") == simhash("hello世界")
+    assert simhash("") == 0
+
+
+def test_find_add_round_trip(tmp_path):
+    index_file = tmp_path / "text_index.jsonl"
+    index = TextSimilarityIndex(index_file)
+    assert index.find(TITLE, BODY) is None
+
+    entry = index.add(TITLE, BODY, note_id="n1")
+    assert entry["note_id"] == "n1"
+
+    reloaded = TextSimilarityIndex(index_file)
+    match = reloaded.find(TITLE + "！", BODY.replace("，", " "))
+    assert match["note_id"] == "n1"
+    assert match["title_distance"] == 0 and match["body_distance"] == 0
+    assert len(reloaded) == 1
+
+
+def test_requires_both_title_and_body(tmp_path):
+    index = TextSimilarityIndex(None)
+    index.add(TITLE, BODY)
+
+    other_body = "今天在家做了一顿火锅，牛油锅底配上鲜切肥牛和毛肚，朋友们吃得停不下来，收拾厨房花了一个小时。"
+    assert index.find(TITLE, other_body) is None  # 只有标题相同
+    assert index.find("完全不同的标题：城市夜跑记录", BODY) is None  # 只有正文相同
+    # 固定的自定义标题只比较正文
+    assert index.find("完全不同的标题：城市夜跑记录", BODY, match_title=False) is not None
+    assert index.find(TITLE, other_body, match_title=False) is None
+
+
+def test_duplicate_fingerprints_indexed_once():
+    index = TextSimilarityIndex(None)
+    for number in range(5):
+        index.add(TITLE, BODY, note_id=f"n{number}")
+    assert len(index) == 5
+    assert len(index.entries) == 1
+    assert index.find(TITLE, BODY)["note_id"] == "n4"  # 保留最近的一条